@@ -0,0 +1,121 @@
+"""
+Columnar, NumPy backed view over play rows for analytics pages
+"""
+
+from operator import itemgetter
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.extensions import db
+from app.models.play import PlayModel
+
+NUMERIC_COLUMNS = frozenset({
+    'quarter', 'down', 'distance', 'yard_line', 'gain_loss', 'penalty_spot_yard',
+    'rusher_number', 'passer', 'receiver', 'tackler1', 'tackler2', 'interceptor',
+    'returner', 'returner_yard', 'kicker', 'kicker_yard',
+})
+
+
+class PlayFrame:
+    """Plays loaded column by column into NumPy arrays.
+
+    Numeric columns are float64 arrays with NaN for NULL. Every other column is
+    dictionary encoded: an int32 code per play plus the list of distinct values
+    (NULL included) in order of first appearance.
+    """
+
+    __slots__ = ('_length', '_numeric', '_codes', '_categories')
+
+    def __init__(self, length: int, numeric: Dict[str, np.ndarray],
+                 codes: Dict[str, np.ndarray], categories: Dict[str, list]) -> None:
+        self._length = length
+        self._numeric = numeric
+        self._codes = codes
+        self._categories = categories
+
+    def __len__(self) -> int:
+        return self._length
+
+    @property
+    def columns(self) -> List[str]:
+        return [*self._numeric, *self._codes]
+
+    # ---- loading ----
+
+    @classmethod
+    def load(cls, columns: Sequence[str], *criteria, joins: Iterable = (),
+             order_by: Sequence = (PlayModel.id,)) -> 'PlayFrame':
+        """Select only the given play columns, filtered by SQLAlchemy criteria.
+
+        ``joins`` holds join targets, or (target, onclause) tuples, applied in order.
+        Runs as a Core select on the session's connection: plain column tuples need
+        none of the ORM result processing, which is most of the cost on large loads.
+        """
+        select = db.select(*[getattr(PlayModel, name) for name in columns])
+        for target in joins:
+            select = select.join(*target) if isinstance(target, tuple) else select.join(target)
+        if criteria:
+            select = select.where(*criteria)
+        rows = db.session.connection().execute(select.order_by(*order_by)).tuples().all()
+        return cls.from_rows(columns, rows)
+
+    @classmethod
+    def from_rows(cls, columns: Sequence[str], rows: Sequence[tuple]) -> 'PlayFrame':
+        """Build a frame from row tuples in the order of ``columns``"""
+        length = len(rows)
+        numeric, codes, categories = {}, {}, {}
+        for position, name in enumerate(columns):
+            values = list(map(itemgetter(position), rows))
+            if name in NUMERIC_COLUMNS:
+                # numpy turns None into NaN for float arrays
+                numeric[name] = np.array(values, dtype=np.float64).reshape(length)
+            else:
+                codes[name], categories[name] = cls._encode(values)
+        return cls(length, numeric, codes, categories)
+
+    @staticmethod
+    def _encode(values: list) -> Tuple[np.ndarray, list]:
+        distinct = list(dict.fromkeys(values))
+        lookup = {value: code for code, value in enumerate(distinct)}
+        encoded = np.fromiter(map(lookup.__getitem__, values), dtype=np.int32, count=len(values))
+        return encoded, distinct
+
+    # ---- column access ----
+
+    def values(self, name: str, fill: Optional[float] = None) -> np.ndarray:
+        """Numeric column, NaN replaced by ``fill`` when given"""
+        column = self._numeric[name]
+        if fill is None:
+            return column
+        return np.where(np.isnan(column), fill, column)
+
+    def codes(self, name: str) -> np.ndarray:
+        return self._codes[name]
+
+    def categories(self, name: str) -> list:
+        return self._categories[name]
+
+    def equals(self, name: str, value) -> np.ndarray:
+        """Boolean mask of plays whose categorical column equals ``value``"""
+        try:
+            code = self._categories[name].index(value)
+        except ValueError:
+            return np.zeros(self._length, dtype=bool)
+        return self._codes[name] == code
+
+    def filter(self, mask: np.ndarray) -> 'PlayFrame':
+        """New frame with the plays selected by a boolean mask (categories are shared)"""
+        return PlayFrame(
+            int(np.count_nonzero(mask)),
+            {name: column[mask] for name, column in self._numeric.items()},
+            {name: column[mask] for name, column in self._codes.items()},
+            self._categories,
+        )
+
+    # ---- aggregation ----
+
+    def value_counts(self, name: str) -> Dict[object, int]:
+        """Count per distinct value, in order of first appearance, zero counts dropped"""
+        counts = np.bincount(self._codes[name], minlength=len(self._categories[name]))
+        return {label: int(count) for label, count in zip(self._categories[name], counts) if count}
@@ -0,0 +1,94 @@
+"""
+Online (Welford) statistics that can be updated play by play and merged
+"""
+
+import math
+from typing import Dict, Iterable, Optional
+
+
+class RunningStats:
+    """Count, sum, Welford mean/M2 and a value histogram for one call sheet key.
+
+    Plays can be added and removed again (edits, deletes) and two instances can be
+    merged with Chan's parallel formula, so per-game aggregates combine into team or
+    season aggregates without touching plays. The histogram maps each distinct
+    integer value to its count; gains are whole yards, so it stays small and gives
+    an exact, mergeable median.
+    """
+
+    __slots__ = ('count', 'total', 'mean', 'm2', 'histogram')
+
+    def __init__(self, count: int = 0, total: float = 0, mean: float = 0.0, m2: float = 0.0,
+                 histogram: Optional[Dict[int, int]] = None) -> None:
+        self.count = count
+        self.total = total
+        self.mean = mean
+        self.m2 = m2
+        self.histogram = dict(histogram or {})
+
+    @classmethod
+    def of(cls, values: Iterable[int]) -> 'RunningStats':
+        stats = cls()
+        for value in values:
+            stats.add(value)
+        return stats
+
+    def add(self, value: int) -> None:
+        self.count += 1
+        self.total += value
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.histogram[value] = self.histogram.get(value, 0) + 1
+
+    def remove(self, value: int) -> None:
+        """Undo a previous ``add(value)``"""
+        if self.histogram.get(value, 0) <= 0:
+            raise ValueError(f'{value} was never added')
+        if self.count == 1:
+            self.count, self.total, self.mean, self.m2, self.histogram = 0, 0, 0.0, 0.0, {}
+            return
+        delta = value - self.mean
+        self.count -= 1
+        self.total -= value
+        self.mean -= delta / self.count
+        self.m2 = max(0.0, self.m2 - delta * (value - self.mean))
+        self.histogram[value] -= 1
+        if not self.histogram[value]:
+            del self.histogram[value]
+
+    def merge(self, other: 'RunningStats') -> 'RunningStats':
+        """Fold ``other`` into this instance and return it"""
+        if not other.count:
+            return self
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.mean += delta * other.count / count
+        self.count = count
+        self.total += other.total
+        for value, hits in other.histogram.items():
+            self.histogram[value] = self.histogram.get(value, 0) + hits
+        return self
+
+    @property
+    def std_dev(self) -> float:
+        """Sample standard deviation, 0 below two values"""
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0
+
+    @property
+    def median(self):
+        """Median like statistics.median: a value for odd counts, the mean of the middle two otherwise"""
+        if not self.count:
+            return 0
+        lower_rank, upper_rank = (self.count - 1) // 2, self.count // 2
+        lower = upper = None
+        seen = 0
+        for value in sorted(self.histogram):
+            seen += self.histogram[value]
+            if lower is None and seen > lower_rank:
+                lower = value
+            if seen > upper_rank:
+                upper = value
+                break
+        return lower if self.count % 2 else (lower + upper) / 2
@@ -0,0 +1,117 @@
+"""
+Down, distance, field zone and hash matrix of play calls, binned with NumPy
+"""
+
+from typing import Dict, List
+
+import numpy as np
+
+from app.analytics.play_frame import PlayFrame
+
+SITUATION_COLUMNS = ('down', 'distance', 'yard_line', 'hash', 'play_type', 'off_play', 'gain_loss')
+
+DOWNS = (1, 2, 3, 4)
+# distance buckets: upper bounds are exclusive edges for np.digitize
+DISTANCE_LABELS = ('1-3', '4-6', '7-10', '11+')
+DISTANCE_EDGES = (4, 7, 11)
+# field zones by yards from the offense's own goal line
+ZONE_LABELS = ('Backed Up', 'Own Territory', 'Opponent Territory', 'Red Zone')
+ZONE_EDGES = (20, 50, 80)
+HASHES = ('L', 'M', 'R')
+ALL_HASHES = 'All'
+# play calls listed per cell, most frequent first
+TOP_PLAY_CALLS = 3
+
+
+def field_position(yard_line: np.ndarray) -> np.ndarray:
+    """Yards from the own goal line (0-100) of field-format yard lines, like GameController.convert"""
+    return np.where(yard_line < 0, -yard_line, 100 - yard_line)
+
+
+def situation_matrix(frame: PlayFrame) -> dict:
+    """Plays binned into down x distance x zone x hash cells.
+
+    Every cell holds its play count, average gain, the mix of play types (run,
+    pass, ...) and its most called plays. Plays without a down, distance or yard
+    line are left out; plays without a hash only count towards the 'All' hash.
+    Only cells with plays are returned.
+    """
+    down = frame.values('down', fill=0)
+    distance = frame.values('distance', fill=0)
+    yard_line = frame.values('yard_line', fill=np.nan)
+    valid = (down >= 1) & (down <= len(DOWNS)) & (distance >= 1) & ~np.isnan(yard_line)
+    frame = frame.filter(valid)
+    down, distance, yard_line = down[valid], distance[valid], yard_line[valid]
+    hashes = (*HASHES, ALL_HASHES)
+    matrix = {'plays': len(frame), 'downs': list(DOWNS), 'distances': list(DISTANCE_LABELS),
+              'zones': list(ZONE_LABELS), 'hashes': list(hashes), 'play_types': [], 'cells': []}
+    if not len(frame):
+        return matrix
+
+    # one cell id per play, the extra hash slot collects plays with no (or an unknown) hash
+    hash_slot = np.full(len(frame), len(HASHES), dtype=np.int64)
+    for index, value in enumerate(HASHES):
+        hash_slot[frame.equals('hash', value)] = index
+    shape = (len(DOWNS), len(DISTANCE_LABELS), len(ZONE_LABELS), len(HASHES) + 1)
+    cell = np.ravel_multi_index((
+        down.astype(np.int64) - 1,
+        np.digitize(distance, DISTANCE_EDGES),
+        np.digitize(field_position(yard_line), ZONE_EDGES),
+        hash_slot,
+    ), shape)
+    cells = int(np.prod(shape))
+
+    counts = np.bincount(cell, minlength=cells).reshape(shape)
+    gains = np.bincount(cell, weights=frame.values('gain_loss', fill=0), minlength=cells).reshape(shape)
+    types = _crosstab(frame, cell, cells, 'play_type').reshape(*shape, -1)
+    calls = _crosstab(frame, cell, cells, 'off_play').reshape(*shape, -1)
+
+    # the 'All' hash replaces the unknown slot: the sum over every hash slot
+    counts, gains, types, calls = (np.concatenate((array[:, :, :, :len(HASHES)],
+                                                   array.sum(axis=3, keepdims=True)), axis=3)
+                                   for array in (counts, gains, types, calls))
+
+    type_labels = [label if label else '-' for label in frame.categories('play_type')]
+    call_labels = [label if label else '-' for label in frame.categories('off_play')]
+    type_totals = types[..., -1, :].reshape(-1, len(type_labels)).sum(axis=0)
+    top = np.argsort(-calls, axis=-1, kind='stable')[..., :TOP_PLAY_CALLS]
+    plays = len(frame)
+
+    entries = matrix['cells']
+    for position in zip(*np.nonzero(counts)):
+        count = int(counts[position])
+        down_index, distance_index, zone_index, hash_index = (int(value) for value in position)
+        entries.append({
+            'down': DOWNS[down_index],
+            'distance': DISTANCE_LABELS[distance_index],
+            'zone': ZONE_LABELS[zone_index],
+            'hash': hashes[hash_index],
+            'count': count,
+            'percent': count * 100 / plays if hash_index == len(HASHES) else None,
+            'average': float(gains[position]) / count,
+            'play_types': _mix(type_labels, types[position], count),
+            'play_calls': [{'off_play': call_labels[code], 'count': int(calls[position][code])}
+                           for code in top[position].tolist() if calls[position][code]],
+        })
+    matrix['play_types'] = sorted({label for label, total in zip(type_labels, type_totals.tolist()) if total})
+    return matrix
+
+
+def situation_grid(matrix: dict) -> Dict[tuple, dict]:
+    """Cells of a matrix by (hash, down, distance, zone), for rendering it as a table"""
+    return {(cell['hash'], cell['down'], cell['distance'], cell['zone']): cell for cell in matrix['cells']}
+
+
+def _crosstab(frame: PlayFrame, cell: np.ndarray, cells: int, name: str) -> np.ndarray:
+    """Plays per (cell, value of a categorical column) as a cells x values array"""
+    size = max(len(frame.categories(name)), 1)
+    return np.bincount(cell * size + frame.codes(name), minlength=cells * size).reshape(cells, size)
+
+
+def _mix(labels: List[str], counts: np.ndarray, total: int) -> Dict[str, float]:
+    """Percent of the plays of a cell per play type, types sharing a label are added up"""
+    mix: Dict[str, float] = {}
+    for label, count in zip(labels, counts.tolist()):
+        if count:
+            mix[label] = mix.get(label, 0) + count * 100 / total
+    return mix
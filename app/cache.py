@@ -0,0 +1,137 @@
+"""
+In-process result cache for aggregate pages (call sheets, dashboards)
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional
+
+from flask import Flask
+
+from app.models.game import GameModel
+
+
+class ResultCache:
+    """LRU cache with a TTL bound and tag based invalidation.
+
+    Every entry carries a set of tags such as ('game', 3) or ('team', 'Berlin Rebels').
+    Writes invalidate the tags they touch, so only the affected entries are dropped.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: float = 300.0, config_prefix: str = 'RESULT_CACHE') -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.config_prefix = config_prefix
+        self._entries: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+        self._tags: Dict[Hashable, set] = {}
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0, 'invalidations': 0}
+        # bumped on every invalidation, lets a miss notice a write that happened while it computed
+        self._epoch = 0
+        self._tag_epochs: Dict[Hashable, int] = {}
+        self._cleared_epoch = 0
+
+    def init_app(self, app: Flask) -> None:
+        self.max_entries = app.config.get(f'{self.config_prefix}_MAX_ENTRIES', self.max_entries)
+        self.ttl = app.config.get(f'{self.config_prefix}_TTL', self.ttl)
+        app.extensions[self.config_prefix.lower()] = self
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any], tags: Iterable[Hashable] = ()) -> Any:
+        """Cached value for ``key``, computing and storing it on a miss"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at, _ = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._counters['hits'] += 1
+                    return value
+                self._remove(key)
+                self._counters['expirations'] += 1
+            self._counters['misses'] += 1
+            started = self._epoch
+
+        # computed outside the lock, concurrent misses for one key may both compute
+        value = compute()
+
+        with self._lock:
+            tag_set = frozenset(tags)
+            if started < self._cleared_epoch or any(self._tag_epochs.get(tag, 0) > started for tag in tag_set):
+                return value  # a write landed meanwhile, the value may already be stale
+            self._remove(key)
+            self._entries[key] = (value, time.monotonic() + self.ttl, tag_set)
+            for tag in tag_set:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._counters['evictions'] += 1
+        return value
+
+    def invalidate(self, *tags: Hashable) -> int:
+        """Drop every entry carrying one of ``tags``, returns the number dropped"""
+        dropped = 0
+        with self._lock:
+            self._epoch += 1
+            for tag in tags:
+                self._tag_epochs[tag] = self._epoch
+                for key in list(self._tags.get(tag, ())):
+                    self._remove(key)
+                    dropped += 1
+            self._counters['invalidations'] += dropped
+        return dropped
+
+    def clear(self) -> None:
+        with self._lock:
+            self._epoch += 1
+            self._cleared_epoch = self._epoch
+            self._entries.clear()
+            self._tags.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counters, size=len(self._entries), max_entries=self.max_entries)
+
+    def _remove(self, key: Hashable) -> Optional[tuple]:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            for tag in entry[2]:
+                keys = self._tags.get(tag)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del self._tags[tag]
+        return entry
+
+
+# tag of results built from all offensive plays, touched by any play write
+ALL_PLAYS = ('plays',)
+
+
+def game_tag(game_id: int) -> tuple:
+    return 'game', game_id
+
+
+def team_tag(team_name: str) -> tuple:
+    return 'team', team_name
+
+
+def game_result_tags(game: GameModel) -> list:
+    """Tags of every cached result built from the plays or drives of ``game``"""
+    tags = [game_tag(game.id), ALL_PLAYS]
+    # team call sheets can select the opponent on either side
+    for team in (game.home_team, game.away_team):
+        if team is not None:
+            tags.append(team_tag(team.name))
+    return tags
+
+
+def invalidate_game_results(game_id: int) -> None:
+    """Drop cached results that depend on the plays or drives of one game"""
+    game = GameModel.query.get(game_id)
+    result_cache.invalidate(*(game_result_tags(game) if game else [game_tag(game_id), ALL_PLAYS]))
+
+
+result_cache = ResultCache()
@@ -0,0 +1,225 @@
+"""
+Server side drive and play charts: SVG and PNG rendering plus a content-addressed image store
+"""
+
+import hashlib
+import io
+import os
+import re
+import threading
+from typing import Callable, List, NamedTuple, Optional, Sequence, Tuple
+from xml.sax.saxutils import escape
+
+from flask import Flask
+from PIL import Image, ImageDraw, ImageFont
+
+from app.palette import readable_text_color
+
+CHART_FORMATS = {'svg': 'image/svg+xml', 'png': 'image/png'}
+
+DEFAULT_TEAM_COLOR = '#010748'
+FIELD_COLOR = '#2e7d32'
+BACKGROUND_COLOR = '#f5f5f5'
+# bar fill by result, checked before gain/loss like the CSS classes of the old charts
+RESULT_COLORS = {'touchdown': '#28a745', 'punt': '#ffc107', 'field-goal': '#17a2b8'}
+GAIN_COLOR = '#0177f5'
+LOSS_COLOR = '#ff0000'
+
+WIDTH = 1200
+ROW_HEIGHT = 60
+BAR_HEIGHT = 50
+TOP = 40
+BOTTOM = 60
+FONT_SIZE = 14
+TEAM_FONT_SIZE = 26
+
+HEX_COLOR = re.compile(r'#[0-9a-fA-F]{6}')
+
+
+class ChartBar(NamedTuple):
+    """One drive or play: yards from the home goal line (0-100) and its label"""
+    start: float
+    end: float
+    label: str
+    result: str = ''
+    loss: bool = False
+
+
+class ChartTeams(NamedTuple):
+    """Names and end zone colors of the two teams, home on the left"""
+    home: str
+    away: str
+    home_color: str
+    away_color: str
+
+    @classmethod
+    def of(cls, game) -> 'ChartTeams':
+        home, away = game.home_team, game.away_team
+        return cls(home.name if home else 'HOME', away.name if away else 'OPPONENT',
+                   _color(home.primary_color if home else None), _color(away.primary_color if away else None))
+
+
+def _color(value: Optional[str]) -> str:
+    return value if value and HEX_COLOR.fullmatch(value) else DEFAULT_TEAM_COLOR
+
+
+def bar_color(bar: ChartBar) -> str:
+    return RESULT_COLORS.get(bar.result.lower().replace(' ', '-'), LOSS_COLOR if bar.loss else GAIN_COLOR)
+
+
+# ---- geometry, shared by both formats ----
+
+def x_of(yards: float) -> float:
+    """Horizontal pixel of a field position, end zones take 8.33% on each side"""
+    return (yards / 1.2 + 8.33) * WIDTH / 100
+
+
+def chart_height(bars: Sequence[ChartBar]) -> int:
+    return len(bars) * ROW_HEIGHT + TOP + BOTTOM
+
+
+def bar_box(bar: ChartBar, index: int) -> Tuple[float, float, float, float]:
+    """(left, top, width, height) of a bar; touchdowns run into the end zone"""
+    left = x_of(bar.start)
+    if bar.result.lower() == 'touchdown':
+        width = 0.92 * WIDTH - left
+    else:
+        width = abs(bar.end - bar.start) / 1.2 * WIDTH / 100
+    return left, TOP + index * ROW_HEIGHT, max(width, 0), BAR_HEIGHT
+
+
+def yard_marks() -> List[Tuple[float, str]]:
+    """(x, label) of the yard lines every 5 yards, negative labels on the home half"""
+    marks = []
+    for yard in range(5, 100, 5):
+        label = '50' if yard == 50 else str(-yard if yard < 50 else 100 - yard)
+        marks.append((x_of(yard), label))
+    return marks
+
+
+def team_font_size(name: str, height: int) -> int:
+    """Font size that fits a team name along the end zone, at most TEAM_FONT_SIZE"""
+    return max(8, min(TEAM_FONT_SIZE, int((height - 20) / (max(len(name), 1) * 0.7))))
+
+
+# ---- rendering ----
+
+def render_svg(teams: ChartTeams, bars: Sequence[ChartBar]) -> bytes:
+    height = chart_height(bars)
+    home_end, away_start = 0.085 * WIDTH, 0.9175 * WIDTH
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {WIDTH} {height}" '
+        f'width="{WIDTH}" height="{height}" font-family="sans-serif" font-size="{FONT_SIZE}">',
+        f'<rect width="{WIDTH}" height="{height}" fill="{BACKGROUND_COLOR}"/>',
+        f'<rect width="{home_end:.2f}" height="{height}" fill="{teams.home_color}"/>',
+        f'<rect x="{home_end:.2f}" width="{away_start - home_end:.2f}" height="{height}" fill="{FIELD_COLOR}"/>',
+        f'<rect x="{away_start:.2f}" width="{WIDTH - away_start:.2f}" height="{height}" fill="{teams.away_color}"/>',
+    ]
+    for (name, color, left, right) in ((teams.home, teams.home_color, 0, home_end),
+                                       (teams.away, teams.away_color, away_start, WIDTH)):
+        x, y = (left + right) / 2, height / 2
+        parts.append(f'<text x="{x:.2f}" y="{y:.2f}" transform="rotate(-90 {x:.2f} {y:.2f})" '
+                     f'text-anchor="middle" dominant-baseline="middle" font-size="{team_font_size(name, height)}" '
+                     f'fill="{readable_text_color(color)}">{escape(name.upper())}</text>')
+    for x, label in yard_marks():
+        parts.append(f'<line x1="{x:.2f}" x2="{x:.2f}" y2="{height}" stroke="#fff" stroke-width="2" opacity="0.7"/>')
+        parts.append(f'<text x="{x:.2f}" y="{height - 6}" text-anchor="middle" fill="#fff" stroke="#000" '
+                     f'stroke-width="2" paint-order="stroke">{label}</text>')
+    for index, bar in enumerate(bars):
+        left, top, width, bar_height = bar_box(bar, index)
+        parts.append(f'<rect x="{left:.2f}" y="{top}" width="{width:.2f}" height="{bar_height}" '
+                     f'fill="{bar_color(bar)}" stroke="#000" stroke-width="2"/>')
+        parts.append(f'<text x="{left + width / 2:.2f}" y="{top + bar_height / 2}" text-anchor="middle" '
+                     f'dominant-baseline="middle" fill="#fff" stroke="#000" stroke-width="2" '
+                     f'paint-order="stroke">{escape(bar.label)}</text>')
+    parts.append('</svg>')
+    return '\n'.join(parts).encode('utf-8')
+
+
+def render_png(teams: ChartTeams, bars: Sequence[ChartBar]) -> bytes:
+    height = chart_height(bars)
+    home_end, away_start = round(0.085 * WIDTH), round(0.9175 * WIDTH)
+    image = Image.new('RGB', (WIDTH, height), BACKGROUND_COLOR)
+    draw = ImageDraw.Draw(image)
+    draw.rectangle((0, 0, home_end, height), fill=teams.home_color)
+    draw.rectangle((home_end, 0, away_start, height), fill=FIELD_COLOR)
+    draw.rectangle((away_start, 0, WIDTH, height), fill=teams.away_color)
+    font = ImageFont.load_default(size=FONT_SIZE)
+
+    for name, color, left, right in ((teams.home, teams.home_color, 0, home_end),
+                                     (teams.away, teams.away_color, away_start, WIDTH)):
+        # drawn horizontally on its own layer, then turned to read bottom to top
+        text = name.upper()
+        team_font = ImageFont.load_default(size=team_font_size(text, height))
+        box = draw.textbbox((0, 0), text, font=team_font)
+        layer = Image.new('RGBA', (box[2] - box[0] + 4, box[3] - box[1] + 4), (0, 0, 0, 0))
+        ImageDraw.Draw(layer).text((2 - box[0], 2 - box[1]), text, font=team_font, fill=readable_text_color(color))
+        layer = layer.rotate(90, expand=True)
+        image.paste(layer, (round((left + right - layer.width) / 2), round((height - layer.height) / 2)), layer)
+
+    for x, label in yard_marks():
+        draw.line((x, 0, x, height), fill='#b9d3ba', width=2)
+        draw.text((x, height - 6), label, font=font, fill='#fff', anchor='ms', stroke_width=1, stroke_fill='#000')
+    for index, bar in enumerate(bars):
+        left, top, width, bar_height = bar_box(bar, index)
+        draw.rectangle((left, top, left + width, top + bar_height), fill=bar_color(bar), outline='#000', width=2)
+        draw.text((left + width / 2, top + bar_height / 2), bar.label, font=font, fill='#fff', anchor='mm',
+                  stroke_width=1, stroke_fill='#000')
+
+    output = io.BytesIO()
+    image.save(output, format='PNG', optimize=True)
+    return output.getvalue()
+
+
+RENDERERS: dict = {'svg': render_svg, 'png': render_png}
+
+
+class ChartStore:
+    """Rendered charts on disk, named by the SHA-256 of their bytes.
+
+    A name never changes its content, so the files can be served with a long
+    lived, immutable cache header; a changed chart simply gets a new name. The
+    oldest files are removed once there are more than CHART_MAX_FILES.
+    """
+
+    def __init__(self, max_files: int = 2000) -> None:
+        self.directory: Optional[str] = None
+        self.max_files = max_files
+        self._lock = threading.Lock()
+
+    def init_app(self, app: Flask) -> None:
+        self.directory = app.config.get('CHART_DIR') or os.path.join(app.instance_path, 'charts')
+        self.max_files = app.config.get('CHART_MAX_FILES', self.max_files)
+        app.extensions['charts'] = self
+
+    def put(self, data: bytes, extension: str) -> str:
+        """Store ``data`` unless it is already there, returns its digest"""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path(digest, extension)
+        if not os.path.exists(path):
+            with self._lock:
+                os.makedirs(self.directory, exist_ok=True)
+                with open(path + '.part', 'wb') as file:
+                    file.write(data)
+                os.replace(path + '.part', path)
+                self._prune()
+        return digest
+
+    def path(self, digest: str, extension: str) -> str:
+        return os.path.join(self.directory, f'{digest}.{extension}')
+
+    def render(self, teams: ChartTeams, bars: Callable[[], Sequence[ChartBar]], extension: str) -> dict:
+        """Render and store a chart, returns its digest and number of bars"""
+        rows = bars()
+        return {'digest': self.put(RENDERERS[extension](teams, rows), extension), 'bars': len(rows)}
+
+    def _prune(self) -> None:
+        files = [entry for entry in os.scandir(self.directory) if entry.is_file() and not entry.name.endswith('.part')]
+        if len(files) <= self.max_files:
+            return
+        files.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in files[:len(files) - self.max_files]:
+            os.remove(entry.path)
+
+
+chart_store = ChartStore()
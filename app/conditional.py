@@ -0,0 +1,56 @@
+"""
+Conditional GET (ETag / Last-Modified) for JSON endpoints derived from one game
+"""
+
+import hashlib
+from datetime import UTC
+from typing import Any, Callable, Hashable
+
+from flask import Response, jsonify, request
+
+from app.extensions import db
+from app.models.game import GameModel
+from app.models.game_change import GameChangeModel
+
+# bumped when the shape of the JSON responses changes, so old ETags stop matching
+API_VERSION = 'v1'
+
+
+def game_etag(game_id: int, version: int, resource: Hashable) -> str:
+    digest = hashlib.sha1(repr(resource).encode()).hexdigest()[:12]
+    return f'{API_VERSION}-{game_id}-{version}-{digest}'
+
+
+def conditional_game_json(game_id: int, resource: Hashable, build: Callable[[int], Any]) -> Response:
+    """JSON response for ``build()`` unless the client already holds the current version.
+
+    The freshness check costs one primary key lookup of the game's change stamp; ``build``
+    only runs when the client's ETag (or Last-Modified date) is out of date. Games
+    without a stamp are looked up, so unknown ones answer 404 instead of an empty result.
+
+    ``build`` gets the stamp version the ETag is made of and has to key any cached body
+    with it: writers commit before they invalidate the result cache, and a body cached
+    without the version could otherwise be sent under the newer ETag.
+    """
+    stamp = GameChangeModel.stamp(game_id)
+    if stamp is None and db.session.get(GameModel, game_id) is None:
+        response = jsonify(error=f'Game {game_id} not found')
+        response.status_code = 404
+        return response
+    version, changed_at = stamp if stamp else (0, None)
+    etag = game_etag(game_id, version, resource)
+    last_modified = changed_at.replace(tzinfo=UTC, microsecond=0) if changed_at else None
+
+    # If-None-Match wins over If-Modified-Since, Last-Modified only has second precision
+    if request.if_none_match:
+        not_modified = request.if_none_match.contains_weak(etag)
+    else:
+        since = request.if_modified_since
+        not_modified = bool(since and last_modified and last_modified <= since)
+
+    response = Response(status=304) if not_modified else jsonify(build(version))
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
+    response.cache_control.no_cache = True
+    return response
@@ -1,7 +1,29 @@
+import os
+
+
 class ServerConfig:
     SECRET_KEY = 'your_secret_key_here'
     SQLALCHEMY_DATABASE_URI = 'sqlite:///football.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLITE_PROFILE = os.environ.get('SQLITE_PROFILE', 'default')  # 'tuned' for WAL and a larger pool, see app/storage.py
+    RESULT_CACHE_MAX_ENTRIES = 256
+    RESULT_CACHE_TTL = 300  # seconds, upper bound even without writes
+    IDENTITY_CACHE_MAX_ENTRIES = 512
+    IDENTITY_CACHE_TTL = 60  # seconds, bounds how long a change made elsewhere stays unseen
+    PROFILING_ENABLED = False  # per request timings and SQL, see /settings/profiling
+    PROFILING_WINDOW = 500  # requests kept per endpoint
+    PROFILING_SLOW_MS = 250  # requests at least this slow are logged with their SQL
+    PROFILING_SLOW_REQUESTS = 50
+    JOBS_MAX_WORKERS = 2  # background exports running at once, the rest wait
+    JOBS_RETENTION_HOURS = 24  # finished jobs and their files are removed after this
+    JOBS_RESULT_DIR = None  # defaults to <instance>/jobs
+    CHART_DIR = None  # rendered drive/play charts, defaults to <instance>/charts
+    CHART_MAX_FILES = 2000  # oldest chart images are removed beyond this
+    PALETTE_CACHE_MAX_ENTRIES = 512  # icon palettes, keyed by the image's content hash
+    PALETTE_CACHE_TTL = 7 * 24 * 3600
+    ICON_DIR = None  # content-addressed team icons and thumbnails, defaults to <instance>/icons
+    ICON_THUMBNAIL_SIZES = (32, 64, 128, 256)  # PNG thumbnails of raster based icons, in pixels
+    ICON_MAX_RASTER = 512  # images embedded in an icon are scaled down to this longest side
 
 
 class ApplicationData:
@@ -1,9 +1,22 @@
+from typing import Optional
+
 from flask import Flask, render_template, request
-from statistics import stdev,median
-from flask_login import login_required
-from app.models.drive import DriveModel
-from app.models.play import PlayModel
+from flask_login import current_user, login_required
+from sqlalchemy import or_
+from werkzeug.utils import secure_filename
+from app import exports
+from app.cache import result_cache, game_tag, team_tag, ALL_PLAYS
+from app.conditional import conditional_game_json
+from app.jobs import JobContext, JobResult, job_runner, submitted_response
+from app.models.callsheet_stat import CallSheetStatModel
 from app.models.game import GameModel
+from app.models.team import TeamModel
+
+# which side of a game the selected opponent played on
+CALLSHEET_SIDES = ('away', 'home', 'either')
+
+CALLSHEET_EXPORT_HEADER = ['Offense Play', 'Offense Formation', 'Formation Adjustment', 'Count', 'Percent', 'Total',
+                           'Average', 'Std Dev', 'Median']
 
 
 class CallSheetController:
@@ -14,66 +27,102 @@ class CallSheetController:
     def register_routes(self) -> None:
         self.app.add_url_rule(rule='/callsheet', view_func=self.callsheet)
         self.app.add_url_rule(rule='/game/<int:game_id>/game_callsheet', view_func=self.game_callsheet)
+        self.app.add_url_rule(rule='/api/v1/games/<int:game_id>/callsheet', view_func=self.api_game_callsheet)
+        self.app.add_url_rule(rule='/callsheet/export/background', view_func=self.callsheet_job, methods=['POST'])
+        job_runner.register('team_callsheet', self._callsheet_job)
 
     @login_required
     def callsheet(self) -> str:
-        #filter away team
-        selected_team = request.args.get("Team")
-        plays = []
-        if selected_team:
-            games = GameModel.query.filter(GameModel.away_team.has(name=selected_team))
-            for game in games:
-                for drive in game.drives:
-                    for play in drive.plays:
-                        plays.append(play)
-                    
-        else:
-            plays = PlayModel.query.filter(PlayModel.odk == 'O').all()
-
-        callsheet_entries = self._process_plays(plays)
+        selected_team, side = self._selection(request.args)
+        callsheet_entries = result_cache.get_or_compute(
+            ('callsheet', selected_team, side if selected_team else None),
+            lambda: self._build_entries(self._merged_stats(selected_team, side)),
+            tags=[team_tag(selected_team)] if selected_team else [ALL_PLAYS]
+        )
         return render_template(template_name_or_list='play/callsheet.html',
-                               callsheet_entries=callsheet_entries)
+                               callsheet_entries=callsheet_entries,
+                               selected_team=selected_team,
+                               side=side,
+                               sides=CALLSHEET_SIDES)
+
+    @login_required
+    def callsheet_job(self):
+        selected_team, side = self._selection(request.form)
+        params = {'team': selected_team, 'side': side if selected_team else None}
+        return submitted_response(*job_runner.submit('team_callsheet', params, current_user.id))
+
+    def _callsheet_job(self, job: JobContext) -> JobResult:
+        selected_team, side = job.params['team'], job.params['side'] or 'away'
+        entries = self._build_entries(self._merged_stats(selected_team, side))
+        rows = ([entry['off_play'], entry['off_form'], entry['form_adj'], entry['count'], round(entry['percent'], 2),
+                 entry['total'], round(entry['average'], 2), round(entry['std_dev'], 2), entry['median']]
+                for entry in job.track(entries, len(entries)))
+        name = f"{secure_filename(selected_team) or 'team'}_{side}" if selected_team else 'all_teams'
+        return JobResult(f'callsheet_{name}.csv', 'text/csv', exports.stream_csv(CALLSHEET_EXPORT_HEADER, rows))
+
+    @staticmethod
+    def _selection(values) -> tuple:
+        """(opponent team name or None, side) of a call sheet request"""
+        #filter opponent team, by default as the away team
+        selected_team = values.get("Team") or None
+        side = values.get("Side", 'away')
+        if side not in CALLSHEET_SIDES:
+            side = 'away'
+        return selected_team, side
+
+    @staticmethod
+    def _merged_stats(selected_team, side: str = 'away') -> list:
+        """Offensive stat rows merged per key, optionally only games against ``selected_team``"""
+        if not selected_team:
+            return CallSheetStatModel.merged(CallSheetStatModel.odk == 'O')
+
+        # one joined query: callsheet_stat -> game -> teams, all on indexed columns
+        if side == 'home':
+            team_join = TeamModel.id == GameModel.home_team_id
+        elif side == 'either':
+            team_join = or_(TeamModel.id == GameModel.home_team_id, TeamModel.id == GameModel.away_team_id)
+        else:
+            team_join = TeamModel.id == GameModel.away_team_id
+        return CallSheetStatModel.merged(
+            TeamModel.name == selected_team,
+            CallSheetStatModel.odk == 'O',
+            joins=((GameModel, GameModel.id == CallSheetStatModel.game_id), (TeamModel, team_join))
+        )
 
     @login_required
     def game_callsheet(self, game_id: int) -> str:
-        plays = PlayModel.query.join(DriveModel).filter(
-            DriveModel.game_id == game_id,
-            PlayModel.odk == 'O'
-        ).all()
-        callsheet_entries = self._process_plays(plays)
         return render_template(
             template_name_or_list='game/game_callsheet.html',
-            callsheet_entries=callsheet_entries,
+            callsheet_entries=self._game_entries(game_id),
             game_id=game_id
         )
 
-    @staticmethod
-    def _process_plays(plays: list) -> list:
-        callsheet_data = {}
-
-        for play in plays:
-            key = (play.off_play, play.off_form, play.form_adj)
-
-            if key not in callsheet_data:
-                callsheet_data[key] = {'count': 0, 'total_gain_loss': 0, 'gains':[]}
-
-            callsheet_data[key]['count'] += 1
-            callsheet_data[key]['total_gain_loss'] += play.gain_loss
-            callsheet_data[key]['gains'].append(play.gain_loss)
+    @login_required
+    def api_game_callsheet(self, game_id: int):
+        return conditional_game_json(
+            game_id, ('callsheet',),
+            lambda version: {'game_id': game_id, 'entries': self._game_entries(game_id, version)}
+        )
 
+    def _game_entries(self, game_id: int, version: Optional[int] = None) -> list:
+        """Call sheet entries of a game, cached per change stamp ``version`` when given"""
+        return result_cache.get_or_compute(
+            ('game_callsheet', game_id, version),
+            lambda: self._build_entries(CallSheetStatModel.merged(
+                CallSheetStatModel.game_id == game_id,
+                CallSheetStatModel.odk == 'O'
+            )),
+            tags=[game_tag(game_id)]
+        )
 
-        total_plays = sum(data['count'] for data in callsheet_data.values())
+    @staticmethod
+    def _build_entries(merged: list) -> list:
+        total_plays = sum(stats.count for _, stats in merged)
         entries = []
 
-        for key, data in callsheet_data.items():
-            off_play, off_form, form_adj = key
-            count = data['count']
-            total = data['total_gain_loss']
+        for (off_play, off_form, form_adj), stats in merged:
+            count = stats.count
             percent = (count / total_plays) * 100 if total_plays > 0 else 0
-            average = total / count if count > 0 else 0
-            gains = data['gains']
-            std_dev = stdev(gains) if len(gains) > 1 else 0
-            med = median(gains) if gains else 0
 
             entries.append({
                 'off_play': off_play if off_play is not None else '-',
@@ -81,10 +130,10 @@ class CallSheetController:
                 'form_adj': form_adj if form_adj  is not None else '-',
                 'count': count,
                 'percent': percent,
-                'total': total,
-                'average': average,
-                'std_dev':std_dev,
-                'median':med,
+                'total': stats.total,
+                'average': stats.total / count if count > 0 else 0,
+                'std_dev': stats.std_dev,
+                'median': stats.median,
             })
 
         return sorted(entries, key=lambda x: x['count'], reverse=True)
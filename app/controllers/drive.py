@@ -1,14 +1,20 @@
-import csv
-import io
+from types import SimpleNamespace
 
-from flask import Flask, render_template, request, redirect, url_for, flash, make_response, session
+from flask import Flask, render_template, request, redirect, url_for, flash, session, Response, stream_with_context, jsonify
 from flask_login import login_required
+from sqlalchemy import insert
+from app import exports
+from app.cache import invalidate_game_results
 from app.extensions import db
+from app.live_feed import drive_payload, play_payload, publish_drive, publish_plays
+from app.models.callsheet_stat import CallSheetStatModel
 from app.models.drive import DriveModel
+from app.models.game_change import GameChangeModel
+from app.models.team_tendency import TeamTendencyModel
 from app.models.play import PlayModel
-from app.models.play_call import PlayCallModel
 from app.models.play_option import PlayOptionModel
-from app.penalty_catalogue import PENALTY_RULES
+from app.option_catalogue import play_option_catalogue
+from app.penalty_catalogue import penalty_catalogue
 from app.config import ApplicationData
 
 
@@ -23,6 +29,7 @@ class DriveController:
         self.app.add_url_rule(rule='/drive/<int:drive_id>', view_func=self.drive_detail)
         self.app.add_url_rule(rule='/drive/<int:drive_id>/delete', view_func=self.delete_drive, methods=['POST'])
         self.app.add_url_rule(rule='/drive/<int:drive_id>/export', view_func=self.export_drive, methods=['GET'])
+        self.app.add_url_rule(rule='/drives/plays/batch', view_func=self.add_plays_batch, methods=['POST'])
 
     @login_required
     def add_play(self, drive_id):
@@ -36,10 +43,16 @@ class DriveController:
             play = self._create_play_from_form(drive_id)
 
             db.session.add(play)
+            db.session.flush()
+            CallSheetStatModel.add_play(CallSheetStatModel.snapshot(play, drive.game_id))
+            TeamTendencyModel.add_play(TeamTendencyModel.snapshot(play, drive.game_id))
+
+            drive.refresh_status()
+            added, state = play_payload(play), drive_payload(drive)
             db.session.commit()
+            invalidate_game_results(drive.game_id)
+            publish_plays(drive.game_id, 'play-added', [(added, None)], state)
 
-            drive.update_status()
-            
             flash('Play added successfully!', 'success')
         except Exception as e:
             db.session.rollback()
@@ -47,37 +60,138 @@ class DriveController:
         
         return redirect(url_for('drive_detail', drive_id=drive_id))
 
+    @login_required
+    def add_plays_batch(self):
+        """Insert an ordered JSON list of plays for one or more drives in one transaction.
+
+        Body: {"plays": [{"drive_id": 3, "odk": "O", "yard_line": -25, ...}, ...]} with the
+        add play form fields per play. Either every play is stored or none is.
+        """
+        payload = request.get_json(silent=True)
+        entries = payload.get('plays') if isinstance(payload, dict) else None
+        if not isinstance(entries, list) or not entries:
+            return jsonify(error='Expected a non-empty "plays" list'), 400
+
+        # bool is an int subclass, but `true` is not a drive id
+        drive_ids = [entry.get('drive_id') if isinstance(entry, dict) else None for entry in entries]
+        drive_ids = [i if isinstance(i, int) and not isinstance(i, bool) else None for i in drive_ids]
+        found = DriveModel.query.filter(DriveModel.id.in_({i for i in drive_ids if i is not None})).all()
+        # in order of first appearance in the batch
+        drives = {drive.id: drive for drive in sorted(found, key=lambda drive: drive_ids.index(drive.id))}
+
+        rows, play_types = [], {}
+        for index, (entry, drive_id) in enumerate(zip(entries, drive_ids)):
+            drive = drives.get(drive_id)
+            if drive is None:
+                return jsonify(error=f'Play {index + 1}: unknown drive', index=index), 400
+            try:
+                rows.append(self._play_fields_from_form(drive.id, entry, play_types, enforce=False))
+            except KeyError as e:
+                return jsonify(error=f'Play {index + 1}: {e.args[0]} is required', index=index), 400
+            except (TypeError, ValueError) as e:
+                return jsonify(error=f'Play {index + 1}: {e}', index=index), 400
+
+        # penalty yardage of the whole batch in one vectorized pass
+        penalties = [index for index, row in enumerate(rows) if row['penalty_type'] in penalty_catalogue]
+        if penalties:
+            gains = penalty_catalogue.enforce_many([rows[i]['penalty_type'] for i in penalties],
+                                                   [rows[i]['foul_team'] for i in penalties],
+                                                   [rows[i]['yard_line'] for i in penalties],
+                                                   [rows[i]['penalty_spot_yard'] for i in penalties], raw=False)
+            for index, gain in zip(penalties, gains.tolist()):
+                if gain != gain:  # NaN: no fouling team to enforce against
+                    return jsonify(error=f'Play {index + 1}: foul team is required to enforce '
+                                         f'"{rows[index]["penalty_type"]}"', index=index), 400
+                rows[index]['gain_loss'] = int(gain)
+
+        ended = {drive.id: bool(drive.ended) for drive in drives.values()}
+        for index, row in enumerate(rows):
+            if ended[row['drive_id']]:
+                return jsonify(error=f'Play {index + 1}: drive {row["drive_id"]} has ended', index=index), 400
+            # a play earlier in the batch may end the drive for the plays after it
+            ended[row['drive_id']] = DriveModel.ends_drive(SimpleNamespace(**row))
+
+        try:
+            ids = db.session.scalars(insert(PlayModel).returning(PlayModel.id, sort_by_parameter_order=True),
+                                     rows).all()
+            CallSheetStatModel.add_plays(
+                CallSheetStatModel.snapshot(SimpleNamespace(**row), drives[row['drive_id']].game_id) for row in rows
+            )
+            TeamTendencyModel.add_plays(
+                TeamTendencyModel.snapshot(SimpleNamespace(**row), drives[row['drive_id']].game_id) for row in rows
+            )
+            added = {drive_id: [] for drive_id in drives}
+            for play_id, row in zip(ids, rows):
+                added[row['drive_id']].append((play_payload(dict(row, id=play_id)), None))
+            states = {}
+            for drive in drives.values():
+                drive.refresh_status()
+                states[drive.id] = drive_payload(drive)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            return jsonify(error=f'Error adding plays: {str(e)}'), 500
+
+        for game_id in {drive.game_id for drive in drives.values()}:
+            invalidate_game_results(game_id)
+        for drive in drives.values():
+            publish_plays(drive.game_id, 'play-added', added[drive.id], states[drive.id])
+
+        results = []
+        for drive in drives.values():
+            down, distance, yard_line = self._get_default_play_fields(drive.id)
+            results.append({
+                'drive_id': drive.id,
+                'result': drive.result,
+                'ended': bool(drive.ended),
+                'next_play': {'down': down, 'distance': distance, 'yard_line': yard_line},
+            })
+        return jsonify(inserted=len(rows), drives=results), 201
+
     def _create_play_from_form(self, drive_id):
-        form = request.form
-        off_play_value = form.get('off_play')
-        play_option = PlayOptionModel.query.filter_by(value=off_play_value).first()
-        play_type = play_option.play_call.name if play_option and play_option.play_call else None
+        return PlayModel(**self._play_fields_from_form(drive_id, request.form))
 
-        rule = next((r for r in PENALTY_RULES if r["type"] == form.get("penalty_type")), None)
-        yard_line = self.convert(int(form.get('yard_line')))
-        raw_penalty_spot = self.convert(int(form.get("penalty_spot_yard") or 0))
+    def _play_fields_from_form(self, drive_id, form, play_types=None, enforce=True):
+        """Column values of a new play from add play form fields (a form or a JSON object).
+
+        With ``enforce`` off the gain_loss of a penalty is left as None for the caller
+        to enforce, e.g. a whole batch at once with ``penalty_catalogue.enforce_many``.
+        """
+        for name, value in form.items():
+            # JSON objects may carry lists, objects or booleans, none of which fit a play column
+            if value is not None and (isinstance(value, bool) or not isinstance(value, (str, int, float))):
+                raise TypeError(f'{name}: expected a string or a number')
+
+        off_play_value = form.get('off_play')
+        if play_types is not None and off_play_value in play_types:
+            play_type = play_types[off_play_value]
+        else:
+            play_option = PlayOptionModel.query.filter_by(value=off_play_value).first()
+            play_type = play_option.play_call.name if play_option and play_option.play_call else None
+            if play_types is not None:
+                play_types[off_play_value] = play_type
+
+        rule = penalty_catalogue.get(form.get("penalty_type"))
+        yard_line = self.convert(self.to_int('yard_line', form.get('yard_line')))
+        penalty_spot = self.to_int('penalty_spot_yard', form.get("penalty_spot_yard") or 0)
         foul_team = form.get("foul_team") or None
 
-        if rule:
-            if rule.get('spot_foul') and raw_penalty_spot is not None:
-                if foul_team == "H":
-                    gain_loss = raw_penalty_spot - abs(rule["yards"]) - yard_line
-                elif foul_team == "O":
-                    gain_loss = raw_penalty_spot + abs(rule["yards"]) - yard_line
-            elif rule.get("yards"):
-                if foul_team == "H":
-                    gain_loss = -abs(rule["yards"])
-                elif foul_team == "O":
-                    gain_loss = abs(rule["yards"])
+        if rule and not enforce:
+            gain_loss = None
+        elif rule:
+            gain_loss = penalty_catalogue.enforce(rule.type, foul_team, yard_line,
+                                                  self.convert(penalty_spot) if penalty_spot else None)
+            if gain_loss is None:
+                raise ValueError(f'Foul team is required to enforce "{rule.type}"')
         else:
-            gain_loss = int(form.get('gain_loss') or 0)
+            gain_loss = self.to_int('gain_loss', form.get('gain_loss') or 0)
 
-        return PlayModel(
+        return dict(
             drive_id=drive_id,
             odk=form['odk'],
-            down=int(form.get('down', 1)),
-            distance=int(form.get('distance', 10)),
-            yard_line=int(form.get('yard_line', 25)),
+            down=self.to_int('down', form.get('down', 1)),
+            distance=self.to_int('distance', form.get('distance', 10)),
+            yard_line=self.to_int('yard_line', form.get('yard_line', 25)),
             hash=form.get('hash', 'M'),
             personnel=form.get('personnel'),
             off_form=form.get('off_form'),
@@ -92,21 +206,21 @@ class DriveController:
             result=form.get('result'),
             gain_loss=gain_loss,
             penalty_type=form.get("penalty_type", None),
-            penalty_spot_yard=form.get("penalty_spot_yard", None),
+            penalty_spot_yard=penalty_spot or None,
             foul_team=foul_team,
-            play_type1=request.form.get('play_type1'),
-            defense_front=request.form.get('defense_front'),
-            defense_strongside=request.form.get('defense_strongside'),
-            blitz=request.form.get('blitz'),
-            slants=request.form.get('slants'),
-            coverage=request.form.get('coverage'),
-            tackler1=request.form.get('tackler1'),
-            tackler2=request.form.get('tackler2'),
-            interceptor=request.form.get('interceptor'),
-            returner=request.form.get('returner'),
-            returner_yard=request.form.get('returner_yard'),
-            kicker=request.form.get('kicker'),
-            kicker_yard=request.form.get('kicker_yard')
+            play_type1=form.get('play_type1'),
+            defense_front=form.get('defense_front'),
+            defense_strongside=form.get('defense_strongside'),
+            blitz=form.get('blitz'),
+            slants=form.get('slants'),
+            coverage=form.get('coverage'),
+            tackler1=form.get('tackler1'),
+            tackler2=form.get('tackler2'),
+            interceptor=form.get('interceptor'),
+            returner=form.get('returner'),
+            returner_yard=form.get('returner_yard'),
+            kicker=form.get('kicker'),
+            kicker_yard=form.get('kicker_yard')
         )
 
     @staticmethod
@@ -149,42 +263,8 @@ class DriveController:
         return {'id': play_call.id, 'name': play_call.name} if play_call else {}
 
     def _get_add_play_form_options(self):
-        options = {}
-        defense_parameters = [
-            'play_type1','defense_front', 'defense_strongside',
-            'blitz', 'slants', 'coverage'
-        ]
-        for param in self.play_parameters:
-            entries = PlayOptionModel.query.filter_by(parameter_name=param, enabled=True).all()
-
-            if param == 'off_play':
-                enriched = []
-                for entry in entries:
-                    play_call = PlayCallModel.query.get(entry.play_call_id)
-                    label = f"{entry.value} ({play_call.name})" if play_call else entry.value
-                    enriched.append({
-                        'id': entry.id,
-                        'value': entry.value,
-                        'label': label,
-                        'play_call_id': entry.play_call_id
-                    })
-
-                options[param] = enriched
-            else:
-                options[param] = [
-                    {'id': entry.id, 'value': entry.value, 'label': entry.value}
-                    for entry in entries
-                ]
-        options['penalty_type'] = [{'value': r['type'], 'label': r['type']}
-                                   for r in PENALTY_RULES
-                                   ]
-        # Add defense parameters
-        for param in defense_parameters:
-            entries = PlayOptionModel.query.filter_by(parameter_name=param, enabled=True).all()
-            options[param] = [
-                {'id': entry.id, 'value': entry.value, 'label': entry.value}
-                for entry in entries
-            ]
+        options = play_option_catalogue.form_options(self.play_parameters)
+        options['penalty_type'] = penalty_catalogue.select_options()
         return options
 
     def _get_default_play_fields(self, drive_id):
@@ -221,8 +301,14 @@ class DriveController:
         try:
             drive = DriveModel.query.get_or_404(drive_id)
             game_id = drive.game_id
+            TeamTendencyModel.remove_drive(drive.id)
             db.session.delete(drive)
+            db.session.flush()
+            CallSheetStatModel.rebuild_game(game_id)
+            GameChangeModel.touch(game_id)
             db.session.commit()
+            invalidate_game_results(game_id)
+            publish_drive(game_id, deleted_id=drive_id)
             flash('Drive deleted successfully', 'success')
         except Exception as e:
             db.session.rollback()
@@ -232,30 +318,21 @@ class DriveController:
     @login_required
     def export_drive(self, drive_id):
         drive = DriveModel.query.get_or_404(drive_id)
-        plays = PlayModel.query.filter_by(drive_id=drive.id).order_by(PlayModel.id).all()
-
-        csv_data = io.StringIO()
-        writer = csv.writer(csv_data)
-        writer.writerow([
-            'Play #', 'ODK', 'Quarter', 'Down', 'Distance', 'Yard Line', 'Play Type', 'Result',
-            'Gain/Loss', 'Personnel', 'Formation', 'Strength', 'Adjustment', 'Motion', 'Protection',
-            'Play Call', 'Direction', 'Tag', 'Hash'
-        ])
-
-        for index_, play in enumerate(plays, start=1):
-            writer.writerow([
-                index_, play.odk, play.quarter, play.down, play.distance, play.yard_line,
-                play.play_type, play.result, play.gain_loss, play.personnel, play.off_form,
-                play.form_str, play.form_adj, play.motion, play.protection, play.off_play,
-                play.dir_call, play.tag, play.hash
-            ])
-
-        response = make_response(csv_data.getvalue())
+        lines = exports.stream_csv(['Play #', *exports.PLAY_HEADER], exports.drive_rows(drive.id))
+
+        response = Response(stream_with_context(lines), mimetype='text/csv')
         response.headers['Content-Disposition'] = f'attachment; filename=drive_{drive.id}.csv'
-        response.headers['Content-type'] = 'text/csv'
 
         return response
 
+    # Integer value of a play field, the error names the field instead of int()'s message
+    @staticmethod
+    def to_int(name: str, value) -> int:
+        try:
+            return int(value)
+        except (TypeError, ValueError, OverflowError):
+            raise ValueError(f'{name} must be an integer, got {value!r}') from None
+
     # Function for converting yard-field values to format 0-100
     @staticmethod
     def convert(yard_line: int) -> int:
@@ -303,13 +380,13 @@ class DriveController:
             next_down = 1
             next_distance = 10
         elif result == "Penalty" and penalty_type:
-            rule = next((r for r in PENALTY_RULES if r["type"] == penalty_type), None)
+            rule = penalty_catalogue.get(penalty_type)
             if rule:
-                if rule.get("automatic_first_down"):  # Wenn die Regel automatic first down beinhaltet
+                if rule.automatic_first_down:  # Wenn die Regel automatic first down beinhaltet
                     next_down = 1
                     next_distance = 10
 
-                elif rule.get("loss_of_down"):  # Wenn die Regel loss of down beinhaltet
+                elif rule.loss_of_down:  # Wenn die Regel loss of down beinhaltet
                     next_down = down + 1
                     next_distance = 10
         else:
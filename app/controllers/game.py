@@ -1,15 +1,28 @@
 import csv
+import os
 from datetime import datetime
-import io
-
-from flask import Flask, render_template, request, redirect, url_for, flash, make_response, Response
-from flask_login import login_required
+from types import SimpleNamespace
+
+from flask import (Flask, render_template, request, redirect, url_for, flash, Response, abort, send_file,
+                   stream_with_context)
+from flask_login import current_user, login_required
+from app import exports
+from app.analytics.play_frame import PlayFrame
+from app.charts import CHART_FORMATS, ChartBar, ChartTeams, chart_store
+from app.cache import result_cache, game_tag, game_result_tags, invalidate_game_results
+from app.conditional import conditional_game_json
 from app.extensions import db
+from app.jobs import JobContext, JobResult, job_runner, submitted_response
+from app.live_feed import drive_payload, live_feed, publish_drive, stream
+from app.models.callsheet_stat import CallSheetStatModel
 from app.models.drive import DriveModel
+from app.models.drive_summary import DriveSummaryModel
 from app.models.game import GameModel
+from app.models.game_change import GameChangeModel
 from app.models.play import PlayModel
 from app.models.team import TeamModel
-from collections import Counter
+from app.models.team_tendency import TeamTendencyModel
+from app.repositories.game import GameRepository
 
 
 class GameController:
@@ -23,41 +36,81 @@ class GameController:
         self.app.add_url_rule(rule='/games/add', view_func=self.add_game, methods=['GET', 'POST'])
         self.app.add_url_rule(rule='/games/<int:game_id>/delete', view_func=self.delete_game, methods=['POST'])
         self.app.add_url_rule(rule='/games/<int:game_id>/add-drive', view_func=self.add_drive, methods=['POST'])
+        self.app.add_url_rule(rule='/games/<int:game_id>/events', view_func=self.live_events)
         self.app.add_url_rule(rule='/games/<int:game_id>/drive-chart', view_func=self.drive_chart)
         self.app.add_url_rule(rule='/games/<int:game_id>/export', view_func=self.export_game)
+        self.app.add_url_rule(rule='/games/export', view_func=self.export_season)
+        self.app.add_url_rule(rule='/games/<int:game_id>/export/background', view_func=self.export_game_job,
+                              methods=['POST'])
+        self.app.add_url_rule(rule='/games/export/background', view_func=self.export_season_job, methods=['POST'])
         self.app.add_url_rule(rule='/games/<int:game_id>/drive/<int:drive_id>/play-chart',
                               view_func=self.drive_play_chart)
+        self.app.add_url_rule(rule='/games/<int:game_id>/drive-chart.<any(svg, png):extension>',
+                              view_func=self.drive_chart_image)
+        self.app.add_url_rule(rule='/games/<int:game_id>/drive/<int:drive_id>/play-chart.<any(svg, png):extension>',
+                              view_func=self.play_chart_image)
+        self.app.add_url_rule(rule='/charts/<digest>.<any(svg, png):extension>', view_func=self.chart_file)
         self.app.add_url_rule(rule='/filter_drives', view_func=self.filter_drives)
         self.app.add_url_rule(rule='/game/<int:game_id>/dashboard', view_func=self.dashboard)
         self.app.add_url_rule(rule='/game/<int:game_id>/dashboard-data', view_func=self.dashboard_data)
+        self.app.add_url_rule(rule='/api/v1/games/<int:game_id>/dashboard', view_func=self.dashboard_data)
+        self.app.add_url_rule(rule='/api/v1/games/<int:game_id>/drives', view_func=self.api_drives)
+        job_runner.register('game_export', self._game_export_job)
+        job_runner.register('season_export', self._season_export_job)
 
     @login_required
     def dashboard_data(self, game_id):
         odk_filter = request.args.get("odk", "")
+        return conditional_game_json(
+            game_id, ('dashboard', odk_filter),
+            lambda version: result_cache.get_or_compute(
+                ('dashboard_data', game_id, odk_filter or None, version),
+                lambda: self._dashboard_data(game_id, odk_filter),
+                tags=[game_tag(game_id)]
+            )
+        )
 
-        game = GameModel.get_by_id(game_id)
-        all_drives = [d for d in game.drives if d.plays]
+    @login_required
+    def api_drives(self, game_id):
+        odk_filter = request.args.get("odk", "")
+        return conditional_game_json(
+            game_id, ('drives', odk_filter),
+            lambda version: result_cache.get_or_compute(
+                ('api_drives', game_id, odk_filter or None, version),
+                lambda: self._drive_list(game_id, odk_filter),
+                tags=[game_tag(game_id)]
+            )
+        )
 
-        if odk_filter:
-            drives = [d for d in all_drives if d.plays[0].odk == odk_filter]
-        else:
-            drives = all_drives
+    def _drive_list(self, game_id, odk_filter) -> dict:
+        GameRepository.get_game(game_id)
+        drives = self._drive_summaries(game_id, odk_filter, played_only=bool(odk_filter))
+        return {"game_id": game_id, "drives": [drive.to_dict() for drive in drives]}
 
-        offense_drives = [d for d in drives if d.plays[0].odk == "O"]
-        defense_drives = [d for d in drives if d.plays[0].odk == "D"]
-        special_drives = [d for d in drives if d.plays[0].odk == "K"]
-        total_plays = sum(len(d.plays) for d in drives)
+    def _dashboard_data(self, game_id, odk_filter) -> dict:
+        GameRepository.get_game(game_id)
+        drives = self._drive_summaries(game_id, odk_filter)
 
         return {
             "total_drives": len(drives),
-            "offense_drives": len(offense_drives),
-            "defense_drives": len(defense_drives),
-            "special_drives": len(special_drives),
-            "total_plays": total_plays
+            "offense_drives": sum(1 for d in drives if d.odk == "O"),
+            "defense_drives": sum(1 for d in drives if d.odk == "D"),
+            "special_drives": sum(1 for d in drives if d.odk == "K"),
+            "total_plays": sum(d.play_count for d in drives)
         }
 
     @login_required
     def dashboard(self, game_id):
+        odk_filter = request.args.get("odk")
+        context = result_cache.get_or_compute(
+            ('dashboard', game_id, odk_filter or None),
+            lambda: self._dashboard_context(game_id, odk_filter),
+            tags=[game_tag(game_id)]
+        )
+        return render_template("game/dashboard.html", odk_filter=odk_filter, **context)
+
+    def _dashboard_context(self, game_id, odk_filter) -> dict:
+        """Everything the dashboard renders, as plain values so it can outlive the session"""
         play_mapping = {
             # PASS-Plays
             'Breakfast': 'PASS',
@@ -75,28 +128,31 @@ class GameController:
             'Power': 'SCREEN',
         }
 
-        game = GameModel.get_by_id(game_id)
-        odk_filter = request.args.get("odk")
+        game = GameRepository.get_game(game_id)
 
-        if odk_filter:
-            filtered_drives = [d for d in game.drives if d.plays and d.plays[0].odk == odk_filter]
-        else:
-            filtered_drives = game.drives
+        # unfiltered, drives without plays still count towards the total
+        all_drives = self._drive_summaries(game_id, played_only=False)
+        filtered_drives = [d for d in all_drives if not odk_filter or (d.odk == odk_filter and d.play_count > 0)]
 
-        offense_drives = [d for d in filtered_drives if d.plays and d.plays[0].odk == 'O']
-        defense_drives = [d for d in filtered_drives if d.plays and d.plays[0].odk == 'D']
-        special_drives = [d for d in filtered_drives if d.plays and d.plays[0].odk == 'K']
-        total_plays = sum(len(d.plays) for d in filtered_drives)
-        filtered_plays = [play for drive in filtered_drives for play in drive.plays]
+        offense_drives = [d.drive_id for d in filtered_drives if d.odk == 'O']
+        defense_drives = [d.drive_id for d in filtered_drives if d.odk == 'D']
+        special_drives = [d.drive_id for d in filtered_drives if d.odk == 'K']
+        total_plays = sum(d.play_count for d in filtered_drives)
 
-        mapped_play_categories = []
-        for p in filtered_plays:
-            if p.off_play and p.off_play.strip():
-                general_category = play_mapping.get(p.off_play.strip())
-                if general_category:
-                    mapped_play_categories.append(general_category)
+        criteria = [DriveSummaryModel.game_id == game_id]
+        if odk_filter:
+            criteria.append(DriveSummaryModel.odk == odk_filter)
+        frame = PlayFrame.load(
+            ('off_play', 'result', 'penalty_type'), *criteria,
+            joins=((DriveSummaryModel, DriveSummaryModel.drive_id == PlayModel.drive_id),)
+        )
 
-        play_type_counts = Counter(mapped_play_categories)
+        # categories come in order of first appearance, so the chart order matches a Counter over the plays
+        play_type_counts = {}
+        for off_play, count in frame.value_counts('off_play').items():
+            general_category = play_mapping.get(off_play.strip()) if off_play else None
+            if general_category:
+                play_type_counts[general_category] = play_type_counts.get(general_category, 0) + count
 
         play_type_labels = list(play_type_counts.keys())
         play_type_values = list(play_type_counts.values())
@@ -107,27 +163,40 @@ class GameController:
         result_type_labels = ['PASS', 'RUN']
         result_type_values = [pass_count, run_count]
 
-        penalty_plays = [p for p in filtered_plays if p.result == 'Penalty']
-        penalty_counter = Counter(p.penalty_type for p in penalty_plays if p.penalty_type)
+        penalty_counter = frame.filter(frame.equals('result', 'Penalty')).value_counts('penalty_type')
+        penalty_counter.pop(None, None)
+        penalty_counter.pop('', None)
         penalty_labels = list(penalty_counter.keys())
         penalty_values = list(penalty_counter.values())
 
-        return render_template("game/dashboard.html", game=game, odk_filter=odk_filter,
-                               filtered_drives=filtered_drives,
-                               offense_drives=offense_drives, defense_drives=defense_drives,
-                               special_drives=special_drives, total_plays=total_plays,
-                               play_type_labels=play_type_labels,
-                               play_type_values=play_type_values,
-                               result_type_labels=result_type_labels,
-                               result_type_values=result_type_values,
-                               penalty_labels=penalty_labels,
-                               penalty_values=penalty_values)
+        return dict(game=SimpleNamespace(id=game.id, name=game.name, date=game.date),
+                    filtered_drives=[d.drive_id for d in filtered_drives],
+                    offense_drives=offense_drives, defense_drives=defense_drives,
+                    special_drives=special_drives, total_plays=total_plays,
+                    play_type_labels=play_type_labels,
+                    play_type_values=play_type_values,
+                    result_type_labels=result_type_labels,
+                    result_type_values=result_type_values,
+                    penalty_labels=penalty_labels,
+                    penalty_values=penalty_values,
+                    play_mapping=play_mapping,
+                    drive_states={d.drive_id: {'odk': d.odk, 'play_count': d.play_count} for d in all_drives})
+
+    @staticmethod
+    def _drive_summaries(game_id, odk_filter=None, played_only=True) -> list:
+        """Summaries of the drives of a game, optionally only those with plays and by odk"""
+        query = DriveSummaryModel.query.filter(DriveSummaryModel.game_id == game_id)
+        if played_only:
+            query = query.filter(DriveSummaryModel.play_count > 0)
+        if odk_filter:
+            query = query.filter(DriveSummaryModel.odk == odk_filter)
+        return query.order_by(DriveSummaryModel.drive_id).all()
 
     @login_required
     def game_options(self) -> str:
         # filter away team
         teams = TeamModel.query.all()
-        games = GameModel.query.all()
+        games = GameRepository.list_games()
         return render_template(
             template_name_or_list='game/game_options.html',
             games=games,
@@ -138,18 +207,15 @@ class GameController:
     def filter_drives(self):
         selected_odk = request.args.get('Odk')
         game_id = request.args.get('Id')
-        game = GameModel.get_by_id(game_id)
-        if selected_odk:
-            game.drives = [drive for drive in game.drives
-                           if drive.plays and drive.plays[0].odk == selected_odk]
-            return render_template("game/partials/_drive_rows.html", game=game)
-        else:
-            return render_template("game/partials/_drive_rows.html", game=game)
+        game = GameRepository.get_game(game_id)
+        drives = GameRepository.load_drives(game.id, odk=selected_odk)
+        return render_template("game/partials/_drive_rows.html", game=game, drives=drives)
 
     @login_required
     def game_detail(self, game_id: int) -> str:
-        game = GameModel.get_by_id(game_id)
-        return render_template(template_name_or_list='game/game_detail.html', game=game)
+        game = GameRepository.get_game(game_id)
+        drives = GameRepository.load_drives(game_id)
+        return render_template(template_name_or_list='game/game_detail.html', game=game, drives=drives)
 
     @login_required
     def add_game(self) -> str | Response:
@@ -190,6 +256,8 @@ class GameController:
                 )
 
                 db.session.add(game)
+                db.session.flush()
+                GameChangeModel.touch(game.id)
                 db.session.commit()
                 flash(message='Game added successfully!', category='success')
                 return redirect(url_for('game_options'))
@@ -205,9 +273,14 @@ class GameController:
     @login_required
     def delete_game(self, game_id: int) -> Response:
         try:
-            game = GameModel.get_by_id(game_id)
+            game = GameRepository.load_for_delete(game_id)
+            stale_tags = game_result_tags(game)
+            CallSheetStatModel.query.filter_by(game_id=game.id).delete()
+            TeamTendencyModel.remove_game(game.id)
+            GameChangeModel.query.filter_by(game_id=game.id).delete()
             db.session.delete(game)
             db.session.commit()
+            result_cache.invalidate(*stale_tags)
             flash(message='Game deleted successfully', category='success')
         except Exception as e:
             db.session.rollback()
@@ -220,7 +293,13 @@ class GameController:
         try:
             drive = DriveModel(game_id=game_id)
             db.session.add(drive)
+            db.session.flush()
+            DriveSummaryModel.refresh(drive)
+            GameChangeModel.touch(game_id)
+            state = drive_payload(drive)
             db.session.commit()
+            invalidate_game_results(game_id)
+            publish_drive(game_id, state)
             flash(message='Drive added successfully!', category='success')
         except Exception as e:
             db.session.rollback()
@@ -228,6 +307,19 @@ class GameController:
             print(f"[{type(e).__name__}] Failed to add drive: {e}")
         return redirect(url_for(endpoint='game_detail', game_id=game_id))
 
+    @login_required
+    def live_events(self, game_id):
+        """Server-Sent Events stream of the plays and drive changes of a game"""
+        GameRepository.get_game(game_id)
+        last_event_id = request.headers.get('Last-Event-ID') or request.args.get('lastEventId')
+        subscription = live_feed.subscribe(
+            game_id, int(last_event_id) if last_event_id and last_event_id.isdigit() else None
+        )
+        response = Response(stream(subscription), mimetype='text/event-stream',
+                            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+        response.call_on_close(subscription.close)
+        return response
+
     @staticmethod
     def convert(yard_line: int) -> int:
         """converts yard-field values to format 0-100"""
@@ -239,82 +331,99 @@ class GameController:
 
     @login_required
     def drive_play_chart(self, game_id, drive_id):
-        game = GameModel.get_by_id(game_id)
-        drive = DriveModel.query.filter_by(game_id=game_id, id=drive_id).first_or_404()
-        plays = PlayModel.query.filter_by(drive_id=drive.id).order_by(PlayModel.id).all()
-
-        plays_data = []
-
-        home_team = game.home_team
-        away_team = game.away_team
-        home_team_color = home_team.primary_color if home_team else "#010748"
-        away_team_color = away_team.primary_color if home_team else "#010748"
-        home_team_text_color = get_readable_text_color(home_team_color) if home_team else "#FFFFFF"
-        away_team_text_color = get_readable_text_color(away_team_color) if home_team else "#FFFFFF"
-
-        for play in plays:
-
-            raw_start = play.yard_line
-            raw_end = play.yard_line
-            start_yard = self.convert(raw_start)
-            end_yard = self.convert(raw_end) + play.gain_loss
-
-            start_yard = max(0, min(100, start_yard))
-            end_yard = max(0, min(100, end_yard))
-
-            loss_detected = (play.gain_loss or 0) < 0
-            if loss_detected:
-                temp = start_yard
-                start_yard = end_yard
-                end_yard = temp
-
-            plays_data.append({
-                'id': play.id,
-                'start': start_yard,
-                'end': end_yard,
-                'yards': play.gain_loss or 0,
-                'result': play.result or 'Unknown',
-                'play_count': len(plays),
-                'loss': loss_detected
-            })
-
+        game = GameRepository.get_game(game_id)
+        drive = DriveModel.query.filter(DriveModel.game_id == game_id, DriveModel.id == drive_id).first_or_404()
         return render_template(
             template_name_or_list='drive/drive_play_chart.html',
             game=game,
             drive=drive,
-            plays=plays_data,
-            max=max,
-            home=home_team_color,
-            away=away_team_color,
-            home_text=home_team_text_color,
-            away_text=away_team_text_color
+            chart=self._chart(game, 'svg', drive.id)
         )
 
     @login_required
     def drive_chart(self, game_id):
-        game = GameModel.get_by_id(game_id)
-        drives = DriveModel.query.filter_by(game_id=game_id).all()
+        game = GameRepository.get_game(game_id)
+        return render_template(
+            template_name_or_list='drive/drive_chart.html',
+            game=game,
+            chart=self._chart(game, 'svg')
+        )
 
-        drives_data = []
+    @login_required
+    def drive_chart_image(self, game_id, extension):
+        return self._chart_response(self._chart(GameRepository.get_game(game_id), extension))
+
+    @login_required
+    def play_chart_image(self, game_id, drive_id, extension):
+        game = GameRepository.get_game(game_id)
+        drive = DriveModel.query.filter(DriveModel.game_id == game_id, DriveModel.id == drive_id).first_or_404()
+        return self._chart_response(self._chart(game, extension, drive.id))
 
-        home_team = game.home_team
-        away_team = game.away_team
-        home_team_color = home_team.primary_color if home_team else "#010748"
-        away_team_color = away_team.primary_color if home_team else "#010748"
-        home_team_text_color = get_readable_text_color(home_team_color) if home_team else "#FFFFFF"
-        away_team_text_color = get_readable_text_color(away_team_color) if home_team else "#FFFFFF"
+    @login_required
+    def chart_file(self, digest, extension):
+        """A rendered chart by content digest, never changes so browsers keep it for a year"""
+        path = chart_store.path(digest, extension)
+        if len(digest) != 64 or not all(c in '0123456789abcdef' for c in digest) or not os.path.exists(path):
+            abort(404)
+        response = send_file(path, mimetype=CHART_FORMATS[extension], etag=digest, conditional=True,
+                             max_age=365 * 24 * 3600)
+        response.cache_control.public = False
+        response.cache_control.private = True
+        response.cache_control.immutable = True
+        return response
 
-        for drive in drives:
-            plays = PlayModel.query.filter_by(drive_id=drive.id).order_by(PlayModel.id).all()
-            number_plays = len(plays)
+    @staticmethod
+    def _chart_response(chart: dict) -> Response:
+        """The current chart under its stable URL, revalidated with the content digest as ETag"""
+        response = send_file(chart_store.path(chart['digest'], chart['extension']),
+                             mimetype=CHART_FORMATS[chart['extension']], etag=chart['digest'], conditional=True)
+        response.cache_control.no_cache = True
+        return response
 
-            if number_plays == 0 or not plays:
-                continue  # if no play in a drive, continue with the next
+    def _chart(self, game, extension: str, drive_id=None) -> dict:
+        """Digest and bar count of the drive chart of a game, or of the play chart of one drive.
 
-            raw_start = plays[0].yard_line
-            raw_end = plays[-1].yard_line
-            start_yard = self.convert(raw_start)
-            end_yard = self.convert(raw_end) + plays[-1].gain_loss
+        Rendered once per game change stamp and team colors; the image itself is stored
+        by content digest in the chart store.
+        """
+        stamp = GameChangeModel.stamp(game.id)
+        teams = ChartTeams.of(game)
+        if drive_id is None:
+            bars = lambda: self._drive_bars(game.id)
+        else:
+            bars = lambda: self._play_bars(drive_id)
+        key = ('chart', game.id, drive_id, stamp[0] if stamp else 0, teams, extension)
+        chart = result_cache.get_or_compute(key, lambda: chart_store.render(teams, bars, extension),
+                                            tags=[game_tag(game.id)])
+        if not os.path.exists(chart_store.path(chart['digest'], extension)):
+            chart = chart_store.render(teams, bars, extension)  # pruned from the store meanwhile
+        return dict(chart, extension=extension)
+
+    def _play_bars(self, drive_id) -> list:
+        bars = []
+        for play in PlayModel.query.filter(PlayModel.drive_id == drive_id).order_by(PlayModel.id):
+            start_yard = self.convert(play.yard_line)
+            end_yard = self.convert(play.yard_line) + (play.gain_loss or 0)
+
+            start_yard = max(0, min(100, start_yard))
+            end_yard = max(0, min(100, end_yard))
+
+            loss_detected = (play.gain_loss or 0) < 0
+            if loss_detected:
+                start_yard, end_yard = end_yard, start_yard
+
+            label = play.play_type or play.result or 'Unknown'
+            if (play.result or '').lower() == 'penalty':
+                label += ' Home' if play.foul_team == 'H' else ' Opponent'
+            bars.append(ChartBar(start_yard, end_yard, f'{label} ({play.gain_loss or 0} yds)',
+                                 play.result or 'Unknown', loss_detected))
+        return bars
+
+    def _drive_bars(self, game_id) -> list:
+        bars = []
+        for drive in self._drive_summaries(game_id):
+            start_yard = self.convert(drive.start_yard_line)
+            end_yard = self.convert(drive.end_yard_line) + drive.last_gain_loss
 
             if drive.result and drive.result.lower() == 'touchdown': end_yard = 100
 
@@ -323,62 +432,83 @@ class GameController:
 
             loss_detected = end_yard < start_yard
             if loss_detected:
-                temp = start_yard
-                start_yard = end_yard
-                end_yard = temp
-
-            drives_data.append({
-                'id': drive.id,
-                'team': game.name.split(' vs ')[0],
-                'start': start_yard,
-                'end': end_yard,
-                'result': drive.result or 'Unknown',
-                'play_count': len(plays),
-                'loss': loss_detected
-            })
-        return render_template(
-            template_name_or_list='drive/drive_chart.html',
-            game=game,
-            drives=drives_data,
-            max=max,
-            home=home_team_color,
-            away=away_team_color,
-            home_text=home_team_text_color,
-            away_text=away_team_text_color
-        )
+                start_yard, end_yard = end_yard, start_yard
+
+            bars.append(ChartBar(start_yard, end_yard, f'{drive.result or "Unknown"} ({drive.play_count} plays)',
+                                 drive.result or 'Unknown', loss_detected))
+        return bars
 
     @login_required
     def export_game(self, game_id):
-        game = GameModel.get_by_id(game_id)
-        drives = DriveModel.query.filter_by(game_id=game.id).order_by(DriveModel.id).all()
-
-        csv_data = io.StringIO()
-        writer = csv.writer(csv_data, quoting=csv.QUOTE_NONNUMERIC)
-        writer.writerow([
-            'Drive #', 'Play #', 'ODK', 'Quarter', 'Down', 'Distance', 'Yard Line', 'Play Type', 'Result',
-            'Gain/Loss', 'Personnel', 'Formation', 'Strength', 'Adjustment', 'Motion', 'Protection',
-            'Play Call', 'Direction', 'Tag', 'Hash'
-        ])
-
-        for drive_index, drive in enumerate(drives, start=1):
-            plays = PlayModel.query.filter_by(drive_id=drive.id).order_by(PlayModel.id).all()
-            for play_index, play in enumerate(plays, start=1):
-                writer.writerow([
-                    drive_index, play_index, play.odk, play.quarter, play.down, play.distance, play.yard_line,
-                    play.play_type, play.result, play.gain_loss, play.personnel, play.off_form,
-                    play.form_str, play.form_adj, play.motion, play.protection, play.off_play,
-                    play.dir_call, play.tag, play.hash
-                ])
-
-        response = make_response(csv_data.getvalue())
-        response.headers['Content-Disposition'] = f'attachment; filename=game_{game.id}_drives.csv'
-        response.headers['Content-type'] = 'text/csv'
+        game = GameRepository.get_game(game_id)
+        lines, filename = self._game_export(game)
+        return self._csv_response(lines, filename=filename)
 
-        return response
+    @login_required
+    def export_season(self):
+        date_range = self._export_range(request.args)
+        if date_range is None:
+            flash(message='Please enter a valid start and end date.', category='warning')
+            return redirect(url_for('game_options'))
+        lines, filename = self._season_export(*date_range)
+        return self._csv_response(lines, filename=filename)
+
+    @login_required
+    def export_game_job(self, game_id):
+        game = GameRepository.get_game(game_id)
+        return submitted_response(*job_runner.submit('game_export', {'game_id': game.id}, current_user.id))
+
+    @login_required
+    def export_season_job(self):
+        date_range = self._export_range(request.form)
+        if date_range is None:
+            flash(message='Please enter a valid start and end date.', category='warning')
+            return redirect(url_for('game_options'))
+        start_date, end_date = date_range
+        params = {'start': f'{start_date:%Y-%m-%d}', 'end': f'{end_date:%Y-%m-%d}'}
+        return submitted_response(*job_runner.submit('season_export', params, current_user.id))
+
+    def _game_export_job(self, job: JobContext) -> JobResult:
+        game = GameRepository.get_game(job.params['game_id'])
+        lines, filename = self._game_export(game, track=self._job_tracker(job))
+        return JobResult(filename, 'text/csv', lines)
+
+    def _season_export_job(self, job: JobContext) -> JobResult:
+        lines, filename = self._season_export(*self._export_range(job.params), track=self._job_tracker(job))
+        return JobResult(filename, 'text/csv', lines)
+
+    @staticmethod
+    def _job_tracker(job: JobContext):
+        """Export row wrapper reporting progress against the play count of the exported games"""
+        return lambda rows, game_ids: job.track(rows, exports.play_count(game_ids))
 
+    @staticmethod
+    def _export_range(values):
+        """(start, end of day) from 'start' and 'end' dates, None when either is invalid"""
+        try:
+            start_date = datetime.strptime(values.get('start', ''), "%Y-%m-%d")
+            end_date = datetime.strptime(values.get('end', ''), "%Y-%m-%d").replace(hour=23, minute=59, second=59)
+        except ValueError:
+            return None
+        return start_date, end_date
+
+    @staticmethod
+    def _game_export(game, track=lambda rows, game_ids: rows):
+        rows = track(exports.game_rows(game.id), [game.id])
+        lines = exports.stream_csv(['Drive #', 'Play #', *exports.PLAY_HEADER], rows, quoting=csv.QUOTE_NONNUMERIC)
+        return lines, f'game_{game.id}_drives.csv'
 
-def get_readable_text_color(hex_color):
-    hex_color = hex_color.lstrip('#')
-    r, g, b = [int(hex_color[i:i + 2], 16) for i in (0, 2, 4)]
-    brightness = 0.299 * r + 0.587 * g + 0.114 * b
-    return "#000000" if brightness > 186 else "#ffffff"
+    @staticmethod
+    def _season_export(start_date, end_date, track=lambda rows, game_ids: rows):
+        games = GameModel.get_by_date_range(start_date, end_date)
+        rows = track(exports.season_rows(games), [game.id for game in games])
+        lines = exports.stream_csv(['Game ID', 'Game', 'Date', 'Drive #', 'Play #', *exports.PLAY_HEADER], rows,
+                                   quoting=csv.QUOTE_NONNUMERIC)
+        return lines, f'games_{start_date:%Y%m%d}_{end_date:%Y%m%d}.csv'
+
+    @staticmethod
+    def _csv_response(lines, filename: str) -> Response:
+        """Send CSV lines as they are produced instead of building the file in memory"""
+        response = Response(stream_with_context(lines), mimetype='text/csv')
+        response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+        return response
@@ -0,0 +1,58 @@
+import os
+
+from flask import Flask, render_template, jsonify, abort, send_file, url_for
+from flask_login import login_required
+
+from app.extensions import db
+from app.jobs import job_runner
+from app.models.job import JobModel
+from app.models.user import UserModel
+
+# jobs shown on the job list
+JOB_LIST_LIMIT = 50
+
+
+class JobController:
+    def __init__(self, app: Flask) -> None:
+        self.app = app
+        self.register_routes()
+
+    def register_routes(self) -> None:
+        self.app.add_url_rule(rule='/jobs', view_func=self.job_list)
+        self.app.add_url_rule(rule='/jobs/<int:job_id>', view_func=self.job_detail)
+        self.app.add_url_rule(rule='/jobs/<int:job_id>/download', view_func=self.download_job)
+        self.app.add_url_rule(rule='/api/v1/jobs/<int:job_id>', view_func=self.api_job)
+
+    @login_required
+    def job_list(self) -> str:
+        jobs = (db.session.query(JobModel, UserModel.username)
+                .outerjoin(UserModel, UserModel.id == JobModel.user_id)
+                .order_by(JobModel.id.desc())
+                .limit(JOB_LIST_LIMIT)
+                .all())
+        return render_template(template_name_or_list='job/job_list.html',
+                               jobs=[(self._status(job), username) for job, username in jobs],
+                               stats=job_runner.stats())
+
+    @login_required
+    def job_detail(self, job_id: int) -> str:
+        job = db.get_or_404(JobModel, job_id)
+        return render_template(template_name_or_list='job/job_detail.html', job=self._status(job))
+
+    @login_required
+    def api_job(self, job_id: int):
+        job = db.get_or_404(JobModel, job_id)
+        return jsonify(self._status(job))
+
+    @login_required
+    def download_job(self, job_id: int):
+        job = db.get_or_404(JobModel, job_id)
+        if job.status != 'done' or not job.result_path or not os.path.exists(job.result_path):
+            abort(404)
+        return send_file(job.result_path, mimetype=job.mimetype, as_attachment=True, download_name=job.filename)
+
+    @staticmethod
+    def _status(job: JobModel) -> dict:
+        status = job_runner.status(job)
+        status['download_url'] = url_for('download_job', job_id=job.id) if job.status == 'done' else None
+        return status
@@ -1,12 +1,15 @@
 from flask import Flask, render_template, request, redirect, url_for, flash
 from flask_login import login_required
+from app.cache import invalidate_game_results
 from app.extensions import db
+from app.live_feed import drive_payload, play_payload, publish_plays
+from app.models.callsheet_stat import CallSheetStatModel
 from app.models.drive import DriveModel
 from app.models.play import PlayModel
-from app.models.play_call import PlayCallModel
+from app.models.team_tendency import TeamTendencyModel
 from app.models.play_option import PlayOptionModel
-from app.penalty_catalogue import PENALTY_RULES
-from app.penalty_catalogue import SPOT_FOULS
+from app.option_catalogue import play_option_catalogue
+from app.penalty_catalogue import penalty_catalogue
 from app.config import ApplicationData
 
 
@@ -28,14 +31,14 @@ class PlayController:
         play_type = play_option.play_call.name if play_option and play_option.play_call else None
 
         options = self._get_add_play_form_options()
-        options['penalty_type'] = [
-            {'value': r['type'], 'label': r['type']}
-            for r in PENALTY_RULES
-        ]
+        options['penalty_type'] = penalty_catalogue.select_options()
         play = PlayModel.query.get_or_404(play_id)
 
         if request.method == 'POST':
             try:
+                before = CallSheetStatModel.snapshot(play, play.drive.game_id)
+                tendency_before = TeamTendencyModel.snapshot(play, play.drive.game_id)
+                previous = play_payload(play)
                 result_form = request.form.get('result')
                 play.odk = request.form.get('odk')
                 play.quarter = request.form.get('quarter', type=int)
@@ -79,8 +82,8 @@ class PlayController:
                 if play.result == "Penalty":
                     play.penalty_type = request.form.get('penalty_type') or None
                     play.foul_team = request.form.get('foul_team') or None
-                    if play.penalty_type in SPOT_FOULS:
-                        play.penalty_spot_yard = int(request.form.get('penalty_spot_yard') or 0)
+                    if penalty_catalogue.is_spot_foul(play.penalty_type):
+                        play.penalty_spot_yard = int(request.form.get('penalty_spot_yard') or 0) or None
                     else:
                         play.penalty_spot_yard = None
                 else:
@@ -88,37 +91,28 @@ class PlayController:
                     play.penalty_type = None
                     play.penalty_spot_yard = None
 
-                rule = None
-                if play.result == "Penalty" and play.penalty_type:
-                    rule = next((r for r in PENALTY_RULES if r["type"] == play.penalty_type), None)
-                    if rule:
-                        if play.penalty_spot_yard not in [None, 0]:
-                            yard_line = convert(play.yard_line)
-                            raw_penalty_spot = convert(play.penalty_spot_yard)
-                            if rule.get('spot_foul') and raw_penalty_spot is not None:
-                                if play.foul_team == "H":
-                                    play.gain_loss = raw_penalty_spot - abs(rule["yards"]) - yard_line
-                                elif play.foul_team == "O":
-                                    play.gain_loss = raw_penalty_spot + abs(rule["yards"]) - yard_line
-
-                        elif rule.get("yards") and play.foul_team == "H":
-                            play.gain_loss = -abs(rule["yards"])
-                            play.penalty_spot_yard = None
-
-                        else:
-                            play.gain_loss = abs(rule["yards"])
-                            play.penalty_spot_yard = None
-
+                if play.result == "Penalty" and play.penalty_type in penalty_catalogue:
+                    # enforced the same way as on the add play form
+                    play.gain_loss = penalty_catalogue.enforce(
+                        play.penalty_type, play.foul_team, convert(play.yard_line),
+                        convert(play.penalty_spot_yard) if play.penalty_spot_yard else None)
+                    if play.gain_loss is None:
+                        raise ValueError(f'Foul team is required to enforce "{play.penalty_type}"')
                 else:  # Wenn kein Penalty, nimm Wert aus dem Formular
-                    play.gain_loss = request.form.get('gain_loss') or 0
+                    play.gain_loss = request.form.get('gain_loss', type=int) or 0
 
                 drive = DriveModel.query.get_or_404(play.drive_id)
                 drive.result = result_form if result_form else "In Progress"
 
+                db.session.flush()
+                if not CallSheetStatModel.remove_play(before):  # a rebuild already counts the edited play
+                    CallSheetStatModel.add_play(CallSheetStatModel.snapshot(play, drive.game_id))
+                TeamTendencyModel.edit_play(tendency_before, TeamTendencyModel.snapshot(play, drive.game_id))
+                drive.refresh_status()
+                edited, state = play_payload(play), drive_payload(drive)
                 db.session.commit()
-
-                drive = DriveModel.query.get_or_404(play.drive_id)
-                drive.update_status()
+                invalidate_game_results(drive.game_id)
+                publish_plays(drive.game_id, 'play-edited', [(edited, previous)], state)
 
                 flash('Play updated successfully!', 'success')
                 return redirect(url_for('drive_detail', drive_id=play.drive_id))
@@ -136,59 +130,30 @@ class PlayController:
         try:
             play = PlayModel.query.get_or_404(play_id)
             drive_id = play.drive_id
+            removed = play_payload(play)
+            stats_before = CallSheetStatModel.snapshot(play, play.drive.game_id)
+            tendency_before = TeamTendencyModel.snapshot(play, play.drive.game_id)
             db.session.delete(play)
-            db.session.commit()
-            flash('Play deleted successfully', 'success')
+            db.session.flush()
+            # after the flush, so a rebuild no longer counts the deleted play
+            CallSheetStatModel.remove_play(stats_before)
+            TeamTendencyModel.remove_play(tendency_before)
 
             drive = DriveModel.query.get_or_404(drive_id)
-            drive.update_status()
+            drive.refresh_status()
+            state = drive_payload(drive)
+            db.session.commit()
+            invalidate_game_results(drive.game_id)
+            publish_plays(drive.game_id, 'play-deleted', [(removed, None)], state)
+            flash('Play deleted successfully', 'success')
 
         except Exception as e:
             db.session.rollback()
             flash(f'Error deleting play: {str(e)}', 'error')
         return redirect(url_for('drive_detail', drive_id=drive_id))
 
-    # redundant : same as in controllers/drive.py
-    # refactoring -> later
     def _get_add_play_form_options(self):
-        options = {}
-
-        for param in self.play_parameters:
-            entries = PlayOptionModel.query.filter_by(parameter_name=param, enabled=True).all()
-
-            if param == 'off_play':
-                enriched = []
-                for entry in entries:
-                    play_call = PlayCallModel.query.get(entry.play_call_id)
-                    label = f"{entry.value} ({play_call.name})" if play_call else entry.value
-                    enriched.append({
-                        'id': entry.id,
-                        'value': entry.value,
-                        'label': label
-                    })
-                options[param] = enriched
-            else:
-                options[param] = [
-                    {'id': entry.id, 'value': entry.value, 'label': entry.value}
-                    for entry in entries
-                ]
-        defense_params = [
-            'play_type1', 'defense_front', 'defense_strongside',
-            'blitz', 'slants', 'coverage'
-        ]
-
-        for param in defense_params:
-            if param not in options:
-                entries = PlayOptionModel.query.filter_by(
-                    parameter_name=param,
-                    enabled=True
-                ).all()
-                options[param] = [
-                    {'id': entry.id, 'value': entry.value, 'label': entry.value}
-                    for entry in entries
-                ]
-
-        return options
+        return play_option_catalogue.form_options(self.play_parameters)
 
 
 def convert(yl: int) -> int:
@@ -2,7 +2,12 @@ from flask import Flask, render_template, abort, request, redirect, flash, url_f
 from flask_login import login_required, current_user
 
 from app.controllers.user_management import admin_required
+from app.cache import result_cache
 from app.extensions import db
+from app.identity import evict_identity, identity_cache
+from app.option_catalogue import play_option_catalogue
+from app.profiling import HISTOGRAM_BOUNDS_MS, request_profiler
+from app.team_registry import team_registry
 from app.models.play_option import PlayOptionModel
 from app.models.play_call import PlayCallModel
 from app.models.user import UserModel
@@ -78,6 +83,22 @@ class SettingsController:
             methods=['POST']
         )
 
+        self.app.add_url_rule(
+            rule='/settings/cache-stats',
+            view_func=self.cache_stats
+        )
+
+        self.app.add_url_rule(
+            rule='/settings/profiling',
+            view_func=self.profiling
+        )
+
+        self.app.add_url_rule(
+            rule='/settings/profiling/reset',
+            view_func=self.reset_profiling,
+            methods=['POST']
+        )
+
         self.app.add_url_rule(
             rule='/settings/team/set-default',
             view_func=self.set_team,
@@ -126,6 +147,7 @@ class SettingsController:
 
         db.session.add(option)
         db.session.commit()
+        play_option_catalogue.invalidate()
         flash(f'Added option "{value}" to {self.play_parameters[param]}')
         return redirect(url_for('settings'))
 
@@ -142,6 +164,7 @@ class SettingsController:
 
         db.session.add(option)
         db.session.commit()
+        play_option_catalogue.invalidate()
         flash(f'Added defense option "{value}" to {self.defense_parameters[param]}')
         return redirect(url_for('settings'))
 
@@ -150,6 +173,7 @@ class SettingsController:
         option = PlayOptionModel.query.get_or_404(option_id)
         option.enabled = not option.enabled
         db.session.commit()
+        play_option_catalogue.invalidate()
         return redirect(url_for('settings'))
 
     @login_required
@@ -157,6 +181,7 @@ class SettingsController:
         option = PlayOptionModel.query.get_or_404(option_id)
         option.enabled = not option.enabled
         db.session.commit()
+        play_option_catalogue.invalidate()
 
         state = "enabled" if option.enabled else "disabled"
         flash(f'Defense option "{option.value}" has been {state}', 'success')
@@ -167,6 +192,7 @@ class SettingsController:
         option = PlayOptionModel.query.get_or_404(option_id)
         db.session.delete(option)
         db.session.commit()
+        play_option_catalogue.invalidate()
         return redirect(url_for('settings'))
 
     @login_required
@@ -174,6 +200,7 @@ class SettingsController:
         option = PlayOptionModel.query.get_or_404(option_id)
         db.session.delete(option)
         db.session.commit()
+        play_option_catalogue.invalidate()
         flash(f'Defense option "{option.value}" has been deleted', 'success')
         return redirect(url_for('settings'))
 
@@ -193,6 +220,7 @@ class SettingsController:
         new_call = PlayCallModel(name=name.strip(), status=True)
         db.session.add(new_call)
         db.session.commit()
+        play_option_catalogue.invalidate()
 
         flash(f'Play Call "{name}" added successfully.', 'success')
         return redirect(url_for('settings'))
@@ -202,6 +230,7 @@ class SettingsController:
         call = PlayCallModel.query.get_or_404(call_id)
         db.session.delete(call)
         db.session.commit()
+        play_option_catalogue.invalidate()
         flash(f'Play Call "{call.name}" deleted successfully.', 'success')
         return redirect(url_for('settings'))
 
@@ -210,6 +239,7 @@ class SettingsController:
         call = PlayCallModel.query.get_or_404(call_id)
         call.status = not call.status
         db.session.commit()
+        play_option_catalogue.invalidate()
 
         state = "enabled" if call.status else "disabled"
         flash(f'Play Call "{call.name}" {state}.', 'success')
@@ -227,7 +257,8 @@ class SettingsController:
             if user and user.role == 'admin':
                 UserModel.query.update({UserModel.team_id: team_id})
                 db.session.commit()
-                db.session.refresh(current_user)
+                # every user was reassigned
+                evict_identity()
 
                 flash('Team assigned successfully!', 'success')
             else:
@@ -235,6 +266,31 @@ class SettingsController:
 
         return redirect(url_for('settings'))
 
+    @login_required
+    @admin_required
+    def cache_stats(self):
+        return dict(result_cache.stats(), play_options=play_option_catalogue.stats(), teams=team_registry.stats(),
+                    identities=identity_cache.stats())
+
+    @login_required
+    @admin_required
+    def profiling(self):
+        return render_template(
+            template_name_or_list='settings/profiling.html',
+            enabled=request_profiler.enabled,
+            slow_ms=request_profiler.slow_ms,
+            endpoints=request_profiler.endpoint_stats(),
+            slow_requests=request_profiler.slow_requests(),
+            bounds=HISTOGRAM_BOUNDS_MS
+        )
+
+    @login_required
+    @admin_required
+    def reset_profiling(self):
+        request_profiler.reset()
+        flash('Profiling data cleared.', 'success')
+        return redirect(url_for('profiling'))
+
     @staticmethod
     def __load_play_calls():
         return [{'id': call.id, 'name': call.name, 'status': call.status} for call in PlayCallModel.query.all()]
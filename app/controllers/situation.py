@@ -0,0 +1,108 @@
+from datetime import datetime
+from typing import Optional
+
+from flask import Flask, jsonify, render_template, request
+from flask_login import login_required
+from sqlalchemy import or_
+
+from app.analytics.play_frame import PlayFrame
+from app.analytics.situations import SITUATION_COLUMNS, situation_grid, situation_matrix
+from app.cache import result_cache, game_tag, team_tag
+from app.conditional import conditional_game_json
+from app.controllers.call_sheet import CALLSHEET_SIDES
+from app.models.drive import DriveModel
+from app.models.game import GameModel
+from app.models.play import PlayModel
+from app.models.team import TeamModel
+from app.models.team_tendency import TeamTendencyModel
+from app.repositories.game import GameRepository
+
+
+class SituationController:
+    def __init__(self, app: Flask) -> None:
+        self.app = app
+        self.register_routes()
+
+    def register_routes(self) -> None:
+        self.app.add_url_rule(rule='/game/<int:game_id>/situations', view_func=self.game_situations)
+        self.app.add_url_rule(rule='/api/v1/games/<int:game_id>/situations', view_func=self.api_game_situations)
+        self.app.add_url_rule(rule='/situations', view_func=self.team_situations)
+        self.app.add_url_rule(rule='/api/v1/teams/<int:team_id>/situations', view_func=self.api_team_situations)
+
+    @login_required
+    def game_situations(self, game_id: int) -> str:
+        game = GameRepository.get_game(game_id)
+        matrix = self._game_matrix(game.id)
+        return render_template(template_name_or_list='game/game_situations.html',
+                               matrix=matrix, grid=situation_grid(matrix), game=game, selected_team=None)
+
+    @login_required
+    def api_game_situations(self, game_id: int):
+        GameRepository.get_game(game_id)
+        return conditional_game_json(
+            game_id, ('situations',),
+            lambda version: dict(self._game_matrix(game_id, version), game_id=game_id)
+        )
+
+    @login_required
+    def team_situations(self) -> str:
+        team_id = request.args.get('Team', type=int)
+        team = TeamModel.query.get(team_id) if team_id else None
+        side = self._side()
+        seasons = TeamTendencyModel.seasons(team.id) if team else []
+        season = request.args.get('Season', type=int) or (seasons[-1] if seasons else None)
+        matrix = self._team_matrix(team, side, season) if team and season else None
+        return render_template(template_name_or_list='game/game_situations.html',
+                               matrix=matrix, grid=situation_grid(matrix) if matrix else {}, game=None, selected_team=team, side=side, sides=CALLSHEET_SIDES,
+                               seasons=seasons, season=season)
+
+    @login_required
+    def api_team_situations(self, team_id: int):
+        team = TeamModel.query.get_or_404(team_id)
+        side = self._side()
+        season = request.args.get('Season', type=int)
+        if season is None:
+            seasons = TeamTendencyModel.seasons(team.id)
+            season = seasons[-1] if seasons else None
+        if season:
+            matrix = self._team_matrix(team, side, season)
+        else:
+            matrix = situation_matrix(PlayFrame.from_rows(SITUATION_COLUMNS, []))
+        return jsonify(dict(matrix, team_id=team.id, team=team.name, side=side, season=season))
+
+    @staticmethod
+    def _side() -> str:
+        side = request.args.get('Side', 'either')
+        return side if side in CALLSHEET_SIDES else 'either'
+
+    @staticmethod
+    def _game_matrix(game_id: int, version: Optional[int] = None) -> dict:
+        """Offensive plays of one game, cached per change stamp ``version`` when given"""
+        return result_cache.get_or_compute(
+            ('situations', game_id, version),
+            lambda: situation_matrix(PlayFrame.load(
+                SITUATION_COLUMNS, DriveModel.game_id == game_id, PlayModel.odk == 'O',
+                joins=((DriveModel, DriveModel.id == PlayModel.drive_id),)
+            )),
+            tags=[game_tag(game_id)]
+        )
+
+    @staticmethod
+    def _team_matrix(team: TeamModel, side: str, season: int) -> dict:
+        """Offensive plays of the games ``team`` played in a season (calendar year), on the given side"""
+        if side == 'home':
+            played = GameModel.home_team_id == team.id
+        elif side == 'away':
+            played = GameModel.away_team_id == team.id
+        else:
+            played = or_(GameModel.home_team_id == team.id, GameModel.away_team_id == team.id)
+        return result_cache.get_or_compute(
+            ('team_situations', team.id, side, season),
+            lambda: situation_matrix(PlayFrame.load(
+                SITUATION_COLUMNS, played, PlayModel.odk == 'O',
+                GameModel.date >= datetime(season, 1, 1), GameModel.date < datetime(season + 1, 1, 1),
+                joins=((DriveModel, DriveModel.id == PlayModel.drive_id),
+                       (GameModel, GameModel.id == DriveModel.game_id))
+            )),
+            tags=[team_tag(team.name)]
+        )
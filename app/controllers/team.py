@@ -1,11 +1,13 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app
+from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app, jsonify, abort, send_file
 import os
-from werkzeug.utils import secure_filename
+from app.cache import result_cache, team_tag
 from app.extensions import db
+from app.icons import ICON_NAME, icon_store, static_resolver
 from app.models.team import TeamModel
+from app.models.team_tendency import TeamTendencyModel
 from app.models.user import UserModel
-from PIL import Image
-from collections import Counter
+from app.palette import cached_palette, dominant_colors
+from app.team_registry import team_registry
 
 team_bp = Blueprint('team', __name__, url_prefix='/team')
 
@@ -14,8 +16,6 @@ team_bp = Blueprint('team', __name__, url_prefix='/team')
 def create_team():
     base_folder = os.path.join(current_app.static_folder, "team_creation_assets", "base")
     icon_folder = os.path.join(current_app.static_folder, "team_creation_assets", "icons")
-    user_created_folder = os.path.join(current_app.static_folder, "user_created_icons")
-    os.makedirs(user_created_folder, exist_ok=True)
 
     base_files = [f for f in sorted(os.listdir(base_folder)) if f.endswith('.svg')]
     icon_filenames = [f for f in sorted(os.listdir(icon_folder)) if f.endswith(('.svg', '.png'))]
@@ -24,33 +24,20 @@ def create_team():
         name = request.form.get('name')
         primary_color = request.form.get('primary_color')
         secondary_color = request.form.get('secondary_color')
-        icon_file = request.form.get('icon_filename')
         final_svg = request.form.get('final_svg')
-        uploaded_icon = request.files.get('icon-upload')
 
         if not name or not primary_color or not secondary_color or not final_svg:
             flash('All fields are required.', 'danger')
             return redirect(request.url)
 
-        if TeamModel.query.filter(func.lower(TeamModel.name) == name.lower()).first():
+        if TeamModel.query.filter(db.func.lower(TeamModel.name) == name.lower()).first():
             flash(f'Team name "{name}" already exists.', 'danger')
             return redirect(request.url)
 
-        safe_name = secure_filename(name)
-        team_folder = os.path.join(user_created_folder, safe_name)
-        os.makedirs(team_folder, exist_ok=True)
-
-        if uploaded_icon and uploaded_icon.filename != '':
-            uploaded_filename = secure_filename(uploaded_icon.filename)
-            uploaded_path = os.path.join(team_folder, uploaded_filename)
-            uploaded_icon.save(uploaded_path)
-            icon_file = uploaded_filename
-
-        svg_path = os.path.join(team_folder, "team_icon.svg")
-        with open(svg_path, "w", encoding="utf-8") as f:
-            f.write(final_svg)
-
-        icon_path = url_for('static', filename=f'user_created_icons/{safe_name}/team_icon.svg')
+        # an uploaded image is already inlined as a data URI, a chosen asset is embedded from static/
+        icon_path = _store_icon(final_svg, static_resolver(current_app.static_folder))
+        if icon_path is None:
+            return redirect(request.url)
 
         new_team = TeamModel(
             name=name,
@@ -61,6 +48,7 @@ def create_team():
 
         db.session.add(new_team)
         db.session.commit()
+        team_registry.invalidate()
 
         flash(f'Team "{name}" created successfully!', 'success')
         return redirect('/settings#play-defaults')
@@ -113,13 +101,44 @@ def delete_team(team_id):
             flash(f"Error deleting team files: {str(e)}", 'danger')
             return redirect(url_for('team.list_all_teams'))
 
+    TeamTendencyModel.query.filter_by(team_id=team.id).delete()
     db.session.delete(team)
     db.session.commit()
+    # icons are shared by content, keep it while another team shows the same one
+    if not TeamModel.query.filter_by(icon=team.icon).first():
+        icon_store.discard(team.icon)
+    result_cache.invalidate(team_tag(team.name))
+    team_registry.invalidate()
 
     flash(f"Team '{team.name}' has been deleted successfully.", 'success')
     return redirect(url_for('team.list_all_teams'))
 
 
+@team_bp.route('/icons/<name>')
+def icon_file(name):
+    """A stored icon or thumbnail by content digest, never changes so browsers keep it for a year"""
+    match = ICON_NAME.fullmatch(name)
+    if not match or not os.path.exists(icon_store.path(name)):
+        abort(404)
+    response = send_file(icon_store.path(name), mimetype='image/png' if match.group('size') else 'image/svg+xml',
+                         etag=name.split('.')[0], conditional=True, max_age=365 * 24 * 3600)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    # opened directly, an SVG may not run anything or load from elsewhere
+    response.headers['Content-Security-Policy'] = "default-src 'none'; img-src data:; style-src 'unsafe-inline'"
+    return response
+
+
+def _store_icon(final_svg, resolve=None):
+    """URL of the team icon in the icon store, None (with a message flashed) if the SVG is unusable"""
+    try:
+        return icon_store.put(final_svg, resolve)
+    except Exception as e:
+        print(f"[!] Storing team icon failed: {str(e)} ({type(e).__name__})")
+        flash('The team icon could not be read.', 'danger')
+        return None
+
+
 @team_bp.route('/choice')
 def choose_creation_method():
     return render_template('team/user_choice.html')
@@ -127,29 +146,35 @@ def choose_creation_method():
 
 def extract_dominant_colors(file_storage):
     try:
-        img = Image.open(file_storage.stream).convert("RGBA")
-        img = img.resize((64, 64))
-        pixels = [pixel for pixel in img.getdata() if pixel[3] > 0]
-        rgb_pixels = [(r, g, b) for r, g, b, _ in pixels]
-
-        most_common = Counter(rgb_pixels).most_common(2)
-        hex_colors = [f"#{r:02x}{g:02x}{b:02x}" for r, g, b in [c[0] for c in most_common]]
-
-        if len(hex_colors) == 1:
-            hex_colors.append("#ffffff")
-        elif len(hex_colors) == 0:
-            hex_colors = ["#000000", "#ffffff"]
-
-        return hex_colors[0], hex_colors[1]
+        file_storage.stream.seek(0)
+        return dominant_colors(cached_palette(file_storage.stream.read()))
     except Exception as e:
         print("Color extraction failed:", e)
         return "#000000", "#ffffff"
+    finally:
+        file_storage.stream.seek(0)
+
+
+@team_bp.route('/palette', methods=['POST'])
+def icon_palette():
+    """Ranked palette and suggested team colors of an uploaded raster icon"""
+    uploaded_icon = request.files.get('icon')
+    if not uploaded_icon or uploaded_icon.filename == '':
+        return jsonify({'error': 'No image uploaded.'}), 400
+    try:
+        palette = cached_palette(uploaded_icon.stream.read())
+    except Exception as e:
+        print(f"[!] Palette extraction failed: {str(e)} ({type(e).__name__})")
+        return jsonify({'error': 'The file could not be read as an image.'}), 400
+    primary_color, secondary_color = dominant_colors(palette)
+    return jsonify({
+        'palette': [color._asdict() for color in palette],
+        'primary': primary_color,
+        'secondary': secondary_color,
+    })
 
 @team_bp.route('/upload_icon', methods=['GET', 'POST'])
 def upload_team_icon_page():
-    user_created_folder = os.path.join(current_app.static_folder, "user_created_icons")
-    os.makedirs(user_created_folder, exist_ok=True)
-
     if request.method == 'POST':
         name = request.form.get('name')
         final_svg = request.form.get('final_svg')
@@ -167,20 +192,10 @@ def upload_team_icon_page():
             flash(f'Team name "{name}" already exists.', 'danger')
             return redirect(request.url)
 
-        safe_name = secure_filename(name)
-        team_folder = os.path.join(user_created_folder, safe_name)
-        os.makedirs(team_folder, exist_ok=True)
-
-        uploaded_filename = secure_filename(uploaded_icon.filename)
-        uploaded_path = os.path.join(team_folder, uploaded_filename)
-        uploaded_icon.stream.seek(0)
-        uploaded_icon.save(uploaded_path)
-
-        svg_path = os.path.join(team_folder, "team_icon.svg")
-        with open(svg_path, "w", encoding="utf-8") as f:
-            f.write(final_svg)
-
-        icon_path = url_for('static', filename=f'user_created_icons/{safe_name}/team_icon.svg')
+        # the SVG carries the upload as a data URI
+        icon_path = _store_icon(final_svg)
+        if icon_path is None:
+            return redirect(request.url)
 
         new_team = TeamModel(
             name=name,
@@ -191,6 +206,7 @@ def upload_team_icon_page():
 
         db.session.add(new_team)
         db.session.commit()
+        team_registry.invalidate()
 
         flash(f'Team "{name}" uploaded and saved successfully!', 'success')
         return redirect('/settings#play-defaults')
@@ -0,0 +1,105 @@
+import math
+
+from flask import Flask, render_template, request, jsonify
+from flask_login import login_required
+
+from app.controllers.call_sheet import CALLSHEET_SIDES
+from app.models.team import TeamModel
+from app.models.team_tendency import TENDENCY_DIMENSIONS, TENDENCY_KEYS, TeamTendencyModel
+
+TENDENCY_LABELS = {
+    'off_form': 'Formation',
+    'form_str': 'Strength',
+    'form_adj': 'Adjustment',
+    'personnel': 'Personnel',
+    'motion': 'Motion',
+    'off_play': 'Play Call',
+}
+# formation plus play call, the lines of a scouting report
+TENDENCY_COMBINATION = 'formation_play'
+BREAKDOWN_LIMIT = 15
+COMBINATION_LIMIT = 25
+
+
+class TendencyController:
+    def __init__(self, app: Flask) -> None:
+        self.app = app
+        self.register_routes()
+
+    def register_routes(self) -> None:
+        self.app.add_url_rule(rule='/tendencies', view_func=self.opponent_tendencies)
+        self.app.add_url_rule(rule='/api/v1/teams/<int:team_id>/tendencies', view_func=self.api_tendencies)
+
+    @login_required
+    def opponent_tendencies(self) -> str:
+        team_id = request.args.get('Team', type=int)
+        side, odk = self._filters()
+        team = TeamModel.query.get(team_id) if team_id else None
+        seasons = TeamTendencyModel.seasons(team.id) if team else []
+        first = request.args.get('From', type=int) or (seasons[0] if seasons else None)
+        last = request.args.get('To', type=int) or (seasons[-1] if seasons else None)
+        report = self._report(team.id, side, odk, first, last) if team else None
+        return render_template(template_name_or_list='play/tendencies.html',
+                               selected_team=team, seasons=seasons, first=first, last=last,
+                               side=side, odk=odk, sides=CALLSHEET_SIDES, report=report,
+                               labels=TENDENCY_LABELS)
+
+    @login_required
+    def api_tendencies(self, team_id: int):
+        team = TeamModel.query.get_or_404(team_id)
+        side, odk = self._filters()
+        report = self._report(team.id, side, odk, request.args.get('From', type=int),
+                              request.args.get('To', type=int))
+        return jsonify(dict(report, team_id=team.id, team=team.name, side=side, odk=odk))
+
+    @staticmethod
+    def _filters() -> tuple:
+        """(side the team played on, odk or '' for all) of the request, defaulting like the call sheet"""
+        side = request.args.get('Side', 'either')
+        if side not in CALLSHEET_SIDES:
+            side = 'either'
+        odk = request.args.get('Odk', 'O')
+        if odk not in ('O', 'D', 'K', ''):
+            odk = 'O'
+        return side, odk
+
+    @classmethod
+    def _report(cls, team_id: int, side: str, odk: str, first=None, last=None) -> dict:
+        """Tendencies of a team over a range of seasons, summed from the rollup rows"""
+        criteria = [TeamTendencyModel.team_id == team_id]
+        if first is not None:
+            criteria.append(TeamTendencyModel.season >= first)
+        if last is not None:
+            criteria.append(TeamTendencyModel.season <= last)
+        if side != 'either':
+            criteria.append(TeamTendencyModel.side == side)
+        if odk:
+            criteria.append(TeamTendencyModel.odk == odk)
+
+        totals = TeamTendencyModel.totals(*criteria)
+        plays = totals['count']
+        return {
+            'seasons': [first, last],
+            'summary': cls._entry(totals, (), plays),
+            'breakdowns': {name: [cls._entry(row, name, plays)
+                                  for row in TeamTendencyModel.breakdown(name, *criteria, limit=BREAKDOWN_LIMIT)]
+                           for name in TENDENCY_KEYS},
+            'combinations': [cls._entry(row, TENDENCY_DIMENSIONS[TENDENCY_COMBINATION], plays)
+                             for row in TeamTendencyModel.breakdown(TENDENCY_COMBINATION, *criteria,
+                                                                    limit=COMBINATION_LIMIT)],
+        }
+
+    @staticmethod
+    def _entry(row: dict, columns, plays: int) -> dict:
+        count, total = row['count'], row['total']
+        if isinstance(columns, str):
+            values = {'value': row[columns] if row[columns] not in (None, '') else '-'}
+        else:
+            values = {name: row[name] if row[name] not in (None, '') else '-' for name in columns}
+        variance = (row['total_sq'] - total * total / count) / (count - 1) if count > 1 else 0
+        return dict(values,
+                    count=count,
+                    percent=count * 100 / plays if plays else 0,
+                    average=total / count if count else 0,
+                    std_dev=math.sqrt(max(variance, 0)),
+                    positive_percent=row['positive'] * 100 / count if count else 0)
@@ -2,6 +2,7 @@ from flask import Flask, render_template, request, redirect, url_for, flash, ses
 from flask_login import LoginManager, login_user, login_required, logout_user, current_user
 from werkzeug.security import check_password_hash
 
+from app.identity import load_identity
 from app.models.user import UserModel
 
 
@@ -19,7 +20,7 @@ class UserController:
 
     @staticmethod
     def load_user(user_id):
-        return UserModel.query.get(int(user_id))
+        return load_identity(int(user_id))
 
     @staticmethod
     def index():
@@ -2,6 +2,7 @@ from flask import Flask, render_template, request, redirect, url_for, flash, abo
 from flask_login import login_required, current_user
 from werkzeug.security import generate_password_hash
 from app.extensions import db
+from app.identity import evict_identity
 from app.models.user import UserModel
 from functools import wraps
 
@@ -50,6 +51,8 @@ class UserManagementController:
             user = UserModel(username=username, password=hashed_password, role=role)
             db.session.add(user)
             db.session.commit()
+            # the id may belong to a deleted user whose absence is still cached
+            evict_identity(user.id)
             flash('User added successfully', 'success')
             return redirect(url_for('user_list'))
 
@@ -73,6 +76,7 @@ class UserManagementController:
             user.username = new_username
             user.role = new_role
             db.session.commit()
+            evict_identity(user.id)
             flash('User updated successfully', 'success')
             return redirect(url_for('user_list'))
 
@@ -89,6 +93,7 @@ class UserManagementController:
         user = UserModel.query.get_or_404(user_id)
         db.session.delete(user)
         db.session.commit()
+        evict_identity(user_id)
         flash('User deleted successfully', 'success')
         return redirect(url_for('user_list'))
 
@@ -103,6 +108,7 @@ class UserManagementController:
             new_password = request.form['new_password']
             user.password = generate_password_hash(new_password, method='scrypt')
             db.session.commit()
+            evict_identity(user.id)
             flash('Password reset successfully', 'success')
             return redirect(url_for('user_list'))
 
@@ -0,0 +1,120 @@
+"""
+Streaming CSV exports of plays for drives, games and date ranges
+"""
+
+import csv
+import io
+from typing import Iterable, Iterator, List, Sequence
+
+from app.extensions import db
+from app.models.drive import DriveModel
+from app.models.game import GameModel
+from app.models.play import PlayModel
+
+# rows fetched per round trip from the server-side cursor
+YIELD_PER = 1000
+
+PLAY_COLUMNS = [
+    ('ODK', PlayModel.odk),
+    ('Quarter', PlayModel.quarter),
+    ('Down', PlayModel.down),
+    ('Distance', PlayModel.distance),
+    ('Yard Line', PlayModel.yard_line),
+    ('Play Type', PlayModel.play_type),
+    ('Result', PlayModel.result),
+    ('Gain/Loss', PlayModel.gain_loss),
+    ('Personnel', PlayModel.personnel),
+    ('Formation', PlayModel.off_form),
+    ('Strength', PlayModel.form_str),
+    ('Adjustment', PlayModel.form_adj),
+    ('Motion', PlayModel.motion),
+    ('Protection', PlayModel.protection),
+    ('Play Call', PlayModel.off_play),
+    ('Direction', PlayModel.dir_call),
+    ('Tag', PlayModel.tag),
+    ('Hash', PlayModel.hash),
+]
+PLAY_HEADER = [header for header, _ in PLAY_COLUMNS]
+
+
+def stream_csv(header: Sequence, rows: Iterable[Sequence], quoting: int = csv.QUOTE_MINIMAL) -> Iterator[str]:
+    """Yield a CSV document line by line, never holding more than one row in memory"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, quoting=quoting)
+
+    def flush() -> str:
+        line = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+        return line
+
+    writer.writerow(header)
+    yield flush()
+    for row in rows:
+        writer.writerow(row)
+        yield flush()
+
+
+def _play_rows(game_ids: List[int]):
+    """Plain column tuples (game id, drive id, play columns...) ordered by game, drive and play"""
+    return (db.session.query(DriveModel.game_id, PlayModel.drive_id, *[col for _, col in PLAY_COLUMNS])
+            .join(DriveModel, DriveModel.id == PlayModel.drive_id)
+            .filter(DriveModel.game_id.in_(game_ids))
+            .order_by(DriveModel.game_id, PlayModel.drive_id, PlayModel.id)
+            .yield_per(YIELD_PER))
+
+
+def play_count(game_ids: List[int]) -> int:
+    """Number of rows a game or season export will have, for progress reporting"""
+    return (db.session.query(db.func.count(PlayModel.id))
+            .join(DriveModel, DriveModel.id == PlayModel.drive_id)
+            .filter(DriveModel.game_id.in_(game_ids))
+            .scalar())
+
+
+def drive_rows(drive_id: int) -> Iterator[list]:
+    """Rows for a single drive export: play number followed by the play columns"""
+    query = (db.session.query(*[col for _, col in PLAY_COLUMNS])
+             .filter(PlayModel.drive_id == drive_id)
+             .order_by(PlayModel.id)
+             .yield_per(YIELD_PER))
+    for play_index, row in enumerate(query, start=1):
+        yield [play_index, *row]
+
+
+def game_rows(game_id: int) -> Iterator[list]:
+    """Rows for a game export: drive number, play number, then the play columns"""
+    for _, drive_index, play_index, row in _numbered_rows([game_id]):
+        yield [drive_index, play_index, *row]
+
+
+def season_rows(games: List[GameModel]) -> Iterator[list]:
+    """Rows for a multi game export: game, date, drive number, play number, then the play columns"""
+    by_id = {game.id: (game.name, game.date.strftime('%Y-%m-%d')) for game in games}
+    for game_id, drive_index, play_index, row in _numbered_rows(list(by_id)):
+        name, date = by_id[game_id]
+        yield [game_id, name, date, drive_index, play_index, *row]
+
+
+def _numbered_rows(game_ids: List[int]) -> Iterator[tuple]:
+    """Number drives per game and plays per drive (both starting at 1) while streaming.
+
+    Drive numbers are looked up once per export (one small row per drive), so a drive
+    keeps its number even when earlier drives have no plays.
+    """
+    drive_numbers = {}
+    counters = {}
+    for drive_id, game_id in (db.session.query(DriveModel.id, DriveModel.game_id)
+                              .filter(DriveModel.game_id.in_(game_ids))
+                              .order_by(DriveModel.id)):
+        counters[game_id] = counters.get(game_id, 0) + 1
+        drive_numbers[drive_id] = counters[game_id]
+
+    current_drive = None
+    play_index = 0
+    for game_id, drive_id, *row in _play_rows(game_ids):
+        if drive_id != current_drive:
+            current_drive = drive_id
+            play_index = 0
+        play_index += 1
+        yield game_id, drive_numbers[drive_id], play_index, row
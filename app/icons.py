@@ -0,0 +1,333 @@
+"""
+Content-addressed team icons: minified SVGs plus pre-rendered PNG thumbnails
+"""
+
+import base64
+import hashlib
+import io
+import mimetypes
+import os
+import re
+import threading
+import xml.etree.ElementTree as ET
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import unquote_to_bytes
+
+from flask import Flask
+from PIL import Image
+
+from app.extensions import db
+from app.models.team import TeamModel
+
+SVG_NS = 'http://www.w3.org/2000/svg'
+XLINK_NS = 'http://www.w3.org/1999/xlink'
+ET.register_namespace('', SVG_NS)
+ET.register_namespace('xlink', XLINK_NS)
+
+# TeamModel.icon of a stored icon, served by team.icon_file
+ICON_URL_PREFIX = '/team/icons/'
+THUMBNAIL_SIZES = (32, 64, 128, 256)
+# embedded rasters are scaled down to this longest side, icons are never shown larger
+MAX_RASTER = 512
+
+ICON_NAME = re.compile(r'(?P<digest>[0-9a-f]{64})(?:-(?P<size>\d+)\.png|\.svg)')
+DATA_URI = re.compile(r'data:(?P<mime>[\w.+-]+/[\w.+-]+)?(?P<base64>;base64)?,(?P<data>.*)', re.DOTALL)
+LONG_DECIMAL = re.compile(r'(\d+\.\d{3})\d+')
+# SVG images inside SVG images are embedded up to this depth, deeper ones are removed
+MAX_NESTING = 3
+HREFS = ('href', f'{{{XLINK_NS}}}href')
+# attributes of the editor preview that mean nothing outside the page
+PREVIEW_ATTRIBUTES = ('id', 'class', 'style')
+
+Resolver = Callable[[str], Optional[Tuple[bytes, str]]]
+
+
+def static_resolver(static_folder: str) -> Resolver:
+    """Resolves ``/static/...`` image links to the file's bytes and MIME type"""
+    prefix = '/static/'
+    root = os.path.realpath(static_folder)
+
+    def resolve(href: str) -> Optional[Tuple[bytes, str]]:
+        if not href.startswith(prefix):
+            return None
+        path = os.path.realpath(os.path.join(root, *href[len(prefix):].split('?')[0].split('/')))
+        if not path.startswith(root + os.sep) or not os.path.isfile(path):
+            return None
+        with open(path, 'rb') as file:
+            return file.read(), mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    return resolve
+
+
+def _href(element: ET.Element) -> Tuple[str, Optional[str]]:
+    for key in HREFS:
+        if key in element.attrib:
+            return key, element.attrib[key]
+    return 'href', None
+
+
+def _decode(href: str) -> Optional[Tuple[bytes, str]]:
+    match = DATA_URI.fullmatch(href.strip())
+    if not match:
+        return None
+    data = match.group('data')
+    if match.group('base64'):
+        return base64.b64decode(re.sub(r'\s+', '', data)), match.group('mime') or 'text/plain'
+    return unquote_to_bytes(data), match.group('mime') or 'text/plain'
+
+
+def _shrink_raster(data: bytes, max_side: int) -> Tuple[bytes, str]:
+    """A raster scaled down to a PNG of at most ``max_side``, small enough ones are kept as they are"""
+    with Image.open(io.BytesIO(data)) as image:
+        mime = Image.MIME.get(image.format, 'image/png')
+        if max(image.size) <= max_side:
+            return data, mime
+        scale = max_side / max(image.size)
+        image = _resize(image.convert('RGBA'), (image.width * scale, image.height * scale))
+        output = io.BytesIO()
+        image.save(output, format='PNG', optimize=True)
+    shrunk = output.getvalue()
+    return (shrunk, 'image/png') if len(shrunk) < len(data) else (data, mime)
+
+
+def _resize(image: Image.Image, size: Tuple[float, float]) -> Image.Image:
+    size = (max(1, round(size[0])), max(1, round(size[1])))
+    # premultiplied, so transparent pixels do not bleed their color into the edges
+    return image.convert('RGBa').resize(size, Image.Resampling.LANCZOS).convert('RGBA')
+
+
+def minify_svg(svg: str, resolve: Optional[Resolver] = None, max_raster: int = MAX_RASTER,
+               depth: int = 0) -> ET.Element:
+    """Parsed, self-contained, sanitized and trimmed copy of an icon SVG.
+
+    Linked images are embedded (through ``resolve``), embedded rasters scaled
+    down to ``max_raster`` and recompressed, embedded SVGs minified the same
+    way; images that cannot be embedded are removed. Scripts, foreign objects,
+    event handlers, links other than ``#fragment`` ones, preview attributes,
+    comments, whitespace and excess decimals are dropped.
+    """
+    root = ET.fromstring(svg.strip())
+    if root.tag != f'{{{SVG_NS}}}svg':
+        raise ValueError('Not an SVG document.')
+    for name in PREVIEW_ATTRIBUTES:
+        root.attrib.pop(name, None)
+
+    for parent in list(root.iter()):
+        for child in list(parent):
+            if child.tag in (f'{{{SVG_NS}}}script', f'{{{SVG_NS}}}foreignObject'):
+                parent.remove(child)
+            elif child.tag == f'{{{SVG_NS}}}image' and not _embed(child, resolve, max_raster, depth):
+                print(f"[!] Icon image {(_href(child)[1] or '')[:80]!r} could not be embedded and was removed")
+                parent.remove(child)
+
+    for element in root.iter():
+        if element.text and not element.text.strip():
+            element.text = None
+        if element.tail and not element.tail.strip():
+            element.tail = None
+        for name, value in list(element.attrib.items()):
+            if name.startswith('on'):
+                del element.attrib[name]
+            elif name in HREFS and element.tag != f'{{{SVG_NS}}}image' and not value.strip().startswith('#'):
+                # javascript:, data: and external links, only references inside the icon stay
+                del element.attrib[name]
+            elif not value.startswith('data:'):
+                element.attrib[name] = LONG_DECIMAL.sub(r'\1', ' '.join(value.split()))
+    return root
+
+
+def _embed(element: ET.Element, resolve: Optional[Resolver], max_raster: int, depth: int) -> bool:
+    """Replace the link of an image element by a minified data URI, False if that is not possible"""
+    href = (_href(element)[1] or '').strip()
+    try:
+        embedded = _decode(href) if href.startswith('data:') else (resolve(href) if resolve and href else None)
+        if embedded is None:
+            return False
+        data, mime = embedded
+        if mime == 'image/svg+xml':
+            if depth >= MAX_NESTING:
+                return False
+            nested = minify_svg(data.decode('utf-8'), resolve, max_raster, depth + 1)
+            data = ET.tostring(nested, encoding='unicode').encode('utf-8')
+        elif mime.startswith('image/'):
+            data, mime = _shrink_raster(data, max_raster)
+        else:
+            return False
+    except (ET.ParseError, OSError, ValueError):  # undecodable data URIs, SVGs or rasters
+        return False
+    for key in HREFS:
+        element.attrib.pop(key, None)
+    element.set('href', f"data:{mime};base64,{base64.b64encode(data).decode('ascii')}")
+    return True
+
+
+def _view_box(root: ET.Element) -> Tuple[float, float, float, float]:
+    if root.get('viewBox'):
+        x, y, width, height = (float(value) for value in root.get('viewBox').replace(',', ' ').split())
+        return x, y, width, height
+    return 0.0, 0.0, float(root.get('width', '300').rstrip('px')), float(root.get('height', '300').rstrip('px'))
+
+
+Layer = Tuple[Image.Image, Tuple[float, float, float, float], str]
+
+
+def raster_layers(root: ET.Element) -> Optional[List[Layer]]:
+    """The images of an SVG made of nothing but untransformed rasters, None for anything vector"""
+    layers = []
+    for element in root:
+        if element.tag in (f'{{{SVG_NS}}}title', f'{{{SVG_NS}}}desc'):
+            continue
+        if element.tag != f'{{{SVG_NS}}}image' or set(element.attrib) - {'href', 'x', 'y', 'width', 'height',
+                                                                          'preserveAspectRatio'}:
+            return None
+        embedded = _decode(_href(element)[1] or '')
+        if embedded is None or embedded[1] == 'image/svg+xml':
+            return None
+        box = tuple(float(element.get(name, '0').rstrip('px')) for name in ('x', 'y', 'width', 'height'))
+        layers.append((Image.open(io.BytesIO(embedded[0])).convert('RGBA'), box,
+                       element.get('preserveAspectRatio', 'xMidYMid meet')))
+    return layers or None
+
+
+def render_thumbnail(root: ET.Element, layers: List[Layer], size: int) -> bytes:
+    """PNG of a raster-only icon (its ``raster_layers``) fitting ``size`` x ``size``"""
+    left, top, width, height = _view_box(root)
+    scale = size / max(width, height)
+    canvas = Image.new('RGBA', (max(1, round(width * scale)), max(1, round(height * scale))), (0, 0, 0, 0))
+    for image, (x, y, box_width, box_height), aspect in layers:
+        if aspect.startswith('none'):
+            target = (box_width, box_height)
+        else:
+            fit = min(box_width / image.width, box_height / image.height)
+            target = (image.width * fit, image.height * fit)
+        # centered in its box, the default xMidYMid alignment
+        x += (box_width - target[0]) / 2
+        y += (box_height - target[1]) / 2
+        layer = _resize(image, (target[0] * scale, target[1] * scale))
+        canvas.alpha_composite(layer, (round((x - left) * scale), round((y - top) * scale)))
+    output = io.BytesIO()
+    canvas.save(output, format='PNG', optimize=True)
+    return output.getvalue()
+
+
+class IconStore:
+    """Team icons on disk, named by the SHA-256 of their minified SVG.
+
+    Uploading the same icon twice stores it once. Next to each SVG the store
+    keeps ``<digest>-<size>.png`` thumbnails, for icons built from raster images
+    only; vector icons are served as SVG at every size. Names never change their
+    content, so all files are served with a long lived, immutable cache header.
+    """
+
+    def __init__(self, thumbnail_sizes: Tuple[int, ...] = THUMBNAIL_SIZES, max_raster: int = MAX_RASTER) -> None:
+        self.directory: Optional[str] = None
+        self.thumbnail_sizes = thumbnail_sizes
+        self.max_raster = max_raster
+        self._thumbnails: Dict[str, Tuple[int, ...]] = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app: Flask) -> None:
+        self.directory = app.config.get('ICON_DIR') or os.path.join(app.instance_path, 'icons')
+        self.thumbnail_sizes = tuple(sorted(app.config.get('ICON_THUMBNAIL_SIZES', self.thumbnail_sizes)))
+        self.max_raster = app.config.get('ICON_MAX_RASTER', self.max_raster)
+        app.extensions['icons'] = self
+        app.add_template_global(self.thumbnail, 'icon_thumbnail')
+
+    def put(self, svg: str, resolve: Optional[Resolver] = None) -> str:
+        """Store an icon SVG with its thumbnails unless already there, returns its URL"""
+        root = minify_svg(svg, resolve, self.max_raster)
+        data = ET.tostring(root, encoding='unicode').encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            missing = [size for size in self.thumbnail_sizes if not os.path.exists(self.path(f'{digest}-{size}.png'))]
+            layers = raster_layers(root) if missing else None
+            for size in missing if layers else ():
+                self._write(self.path(f'{digest}-{size}.png'), render_thumbnail(root, layers, size))
+            self._write(self.path(f'{digest}.svg'), data)
+            self._thumbnails.pop(digest, None)
+        return f'{ICON_URL_PREFIX}{digest}.svg'
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    @staticmethod
+    def digest(icon: Optional[str]) -> Optional[str]:
+        """Digest of a stored icon's URL, None for any other icon"""
+        if not icon or not icon.startswith(ICON_URL_PREFIX):
+            return None
+        match = ICON_NAME.fullmatch(icon[len(ICON_URL_PREFIX):])
+        return match.group('digest') if match and not match.group('size') else None
+
+    def sizes(self, digest: str) -> Tuple[int, ...]:
+        """Thumbnail sizes stored for an icon"""
+        if digest not in self._thumbnails:
+            self._thumbnails[digest] = tuple(size for size in self.thumbnail_sizes
+                                             if os.path.exists(self.path(f'{digest}-{size}.png')))
+        return self._thumbnails[digest]
+
+    def thumbnail(self, icon: Optional[str], size: int) -> Optional[str]:
+        """URL of the smallest thumbnail at least ``size`` pixels, the icon itself if there is none"""
+        digest = self.digest(icon)
+        if digest is None:
+            return icon
+        fitting = [stored for stored in self.sizes(digest) if stored >= size]
+        return f'{ICON_URL_PREFIX}{digest}-{fitting[0]}.png' if fitting else icon
+
+    def raster_path(self, icon: Optional[str]) -> Optional[str]:
+        """Largest thumbnail file of a stored icon"""
+        digest = self.digest(icon)
+        sizes = self.sizes(digest) if digest else ()
+        return self.path(f'{digest}-{sizes[-1]}.png') if sizes else None
+
+    def discard(self, icon: Optional[str]) -> None:
+        """Remove a stored icon and its thumbnails, the caller makes sure no team uses it anymore"""
+        digest = self.digest(icon)
+        if digest is None:
+            return
+        with self._lock:
+            for name in [f'{digest}.svg'] + [f'{digest}-{size}.png' for size in self.thumbnail_sizes]:
+                if os.path.exists(self.path(name)):
+                    os.remove(self.path(name))
+            self._thumbnails.pop(digest, None)
+
+    @staticmethod
+    def _write(path: str, data: bytes) -> None:
+        if os.path.exists(path):
+            return
+        with open(path + '.part', 'wb') as file:
+            file.write(data)
+        os.replace(path + '.part', path)
+
+
+def migrate_team_icons(static_folder: str) -> int:
+    """Move teams still pointing into ``static/`` to the icon store, returns the number moved.
+
+    The SVG (or raster icon, wrapped in an SVG) and every image it links to are
+    stored by content; the old folders are left in place.
+    """
+    resolve = static_resolver(static_folder)
+    moved = 0
+    for team in TeamModel.query.filter(TeamModel.icon.like('/static/%')):
+        source = resolve(team.icon)
+        if source is None:
+            print(f"[!] Icon of team '{team.name}' not found: {team.icon}")
+            continue
+        data, mime = source
+        try:
+            if mime == 'image/svg+xml':
+                svg = data.decode('utf-8')
+            else:
+                with Image.open(io.BytesIO(data)) as image:
+                    width, height = image.size
+                svg = (f'<svg xmlns="{SVG_NS}" viewBox="0 0 {width} {height}"><image href="{team.icon}" '
+                       f'width="{width}" height="{height}"/></svg>')
+            team.icon = icon_store.put(svg, resolve)
+            moved += 1
+        except Exception as e:
+            print(f"[!] Icon of team '{team.name}' could not be stored: {str(e)} ({type(e).__name__})")
+    if moved:
+        db.session.commit()
+    return moved
+
+
+icon_store = IconStore()
@@ -0,0 +1,62 @@
+"""
+Cached login identities for Flask-Login, so authenticated requests need no user query
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+
+from flask_login import UserMixin
+
+from app.cache import ResultCache
+from app.extensions import db
+from app.models.team import TeamModel
+from app.models.user import UserModel
+from app.team_registry import TeamRecord
+
+
+@dataclass(frozen=True, eq=False)
+class UserIdentity(UserMixin):
+    """What requests read from ``current_user``: the user row without its password, plus its team.
+
+    Detached and read-only; handlers that change a user load the ``UserModel`` row.
+    """
+
+    id: int
+    username: str
+    role: str
+    team_id: Optional[int]
+    team: Optional[TeamRecord]
+
+
+def user_tag(user_id: int) -> tuple:
+    return 'user', user_id
+
+
+# one entry per user id, evicted by the user and team assignment handlers
+identity_cache = ResultCache(max_entries=512, ttl=60.0, config_prefix='IDENTITY_CACHE')
+
+
+def load_identity(user_id: int) -> Optional[UserIdentity]:
+    """Identity of a user, from the cache or with one joined query"""
+    return identity_cache.get_or_compute(user_id, lambda: _query_identity(user_id), tags=[user_tag(user_id)])
+
+
+def evict_identity(user_id: Optional[int] = None) -> None:
+    """Forget one cached identity, or all of them when no id is given"""
+    if user_id is None:
+        identity_cache.clear()
+    else:
+        identity_cache.invalidate(user_tag(user_id))
+
+
+def _query_identity(user_id: int) -> Optional[UserIdentity]:
+    row = (db.session.query(UserModel.id, UserModel.username, UserModel.role, UserModel.team_id,
+                            TeamModel.name, TeamModel.icon, TeamModel.primary_color, TeamModel.secondary_color)
+           .outerjoin(TeamModel, TeamModel.id == UserModel.team_id)
+           .filter(UserModel.id == user_id)
+           .first())
+    if row is None:
+        return None
+    user_id, username, role, team_id, name, icon, primary_color, secondary_color = row
+    team = TeamRecord(team_id, name, icon, primary_color, secondary_color) if name is not None else None
+    return UserIdentity(user_id, username, role, team_id, team)
@@ -0,0 +1,216 @@
+"""
+In-process background jobs for exports and reports too heavy for the request thread
+"""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Callable, Dict, Iterable, Iterator, NamedTuple, Optional, Tuple
+
+from flask import Flask, Response, flash, jsonify, redirect, request, url_for
+
+from app.extensions import db
+from app.models.job import JOB_STATUSES, JobModel
+
+# rows between two progress updates
+PROGRESS_EVERY = 500
+
+
+class JobResult(NamedTuple):
+    """What a job handler produces: the download name, its type and the lines of the file"""
+    filename: str
+    mimetype: str
+    lines: Iterable[str]
+
+
+class JobContext:
+    """Handed to a job handler: its parameters and a way to report progress"""
+
+    def __init__(self, runner: 'JobRunner', job_id: int, params: dict) -> None:
+        self.runner = runner
+        self.job_id = job_id
+        self.params = params
+
+    def progress(self, done: int, total: Optional[int] = None) -> None:
+        self.runner._set_progress(self.job_id, done, total)
+
+    def track(self, rows: Iterable, total: Optional[int] = None) -> Iterator:
+        """Pass ``rows`` through, reporting how many went by"""
+        self.progress(0, total)
+        done = 0
+        for row in rows:
+            yield row
+            done += 1
+            if done % PROGRESS_EVERY == 0:
+                self.progress(done, total)
+        self.progress(done, total if total is not None else done)
+
+
+class JobRunner:
+    """Runs registered job kinds on a bounded thread pool, backed by the job table.
+
+    Controllers register a handler per kind; ``submit`` records a pending job (or
+    returns the pending/running one with the same kind and parameters) and queues
+    it. At most JOBS_MAX_WORKERS jobs run at once, the rest wait in the pool queue.
+    Handlers run in their own app context and return a JobResult whose lines are
+    written to JOBS_RESULT_DIR; results are removed after JOBS_RETENTION_HOURS.
+    Jobs cut off by a restart are marked failed by ``recover``, pending ones are
+    queued again.
+    """
+
+    def __init__(self, max_workers: int = 2, retention_hours: float = 24) -> None:
+        self.app: Optional[Flask] = None
+        self.max_workers = max_workers
+        self.retention = timedelta(hours=retention_hours)
+        self.result_dir: Optional[str] = None
+        self._handlers: Dict[str, Callable[[JobContext], JobResult]] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._progress: Dict[int, Tuple[int, Optional[int]]] = {}
+
+    def init_app(self, app: Flask) -> None:
+        self.app = app
+        self.max_workers = app.config.get('JOBS_MAX_WORKERS', self.max_workers)
+        if 'JOBS_RETENTION_HOURS' in app.config:
+            self.retention = timedelta(hours=app.config['JOBS_RETENTION_HOURS'])
+        self.result_dir = app.config.get('JOBS_RESULT_DIR') or os.path.join(app.instance_path, 'jobs')
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='job')
+        app.extensions['jobs'] = self
+
+    def register(self, kind: str, handler: Callable[[JobContext], JobResult]) -> None:
+        self._handlers[kind] = handler
+
+    # ---- submitting ----
+
+    def submit(self, kind: str, params: dict, user_id: Optional[int] = None) -> Tuple[JobModel, bool]:
+        """Queue a job, or return the pending/running one with the same kind and parameters.
+
+        The flag is False when an existing job was returned.
+        """
+        if kind not in self._handlers:
+            raise ValueError(f'Unknown job kind: {kind}')
+        key = JobModel.make_key(kind, params)
+        with self._lock:
+            existing = (JobModel.query
+                        .filter(JobModel.key == key, JobModel.status.in_(('pending', 'running')))
+                        .order_by(JobModel.id)
+                        .first())
+            if existing is not None:
+                return existing, False
+            job = JobModel(kind=kind, params=json.dumps(params, sort_keys=True), key=key, status='pending',
+                           user_id=user_id, created_at=JobModel.now())
+            db.session.add(job)
+            db.session.commit()
+        self._executor.submit(self._run, job.id)
+        self.purge()
+        return job, True
+
+    def recover(self) -> int:
+        """After a restart: fail jobs that were running, queue the pending ones again"""
+        interrupted = (JobModel.query.filter(JobModel.status == 'running')
+                       .update({JobModel.status: 'failed', JobModel.message: 'Interrupted by a restart',
+                                JobModel.finished_at: JobModel.now()}, synchronize_session=False))
+        db.session.commit()
+        pending = [job_id for (job_id,) in db.session.query(JobModel.id).filter(JobModel.status == 'pending')]
+        for job_id in pending:
+            self._executor.submit(self._run, job_id)
+        return interrupted + len(pending)
+
+    def purge(self) -> int:
+        """Delete finished jobs and their files once they are older than the retention"""
+        cutoff = JobModel.now() - self.retention
+        expired = JobModel.query.filter(JobModel.status.in_(('done', 'failed')), JobModel.finished_at < cutoff).all()
+        for job in expired:
+            if job.result_path and os.path.exists(job.result_path):
+                os.remove(job.result_path)
+            db.session.delete(job)
+        if expired:
+            db.session.commit()
+        return len(expired)
+
+    # ---- reading ----
+
+    def status(self, job: JobModel) -> dict:
+        """Row state merged with the live progress of a running job"""
+        data = job.to_dict()
+        with self._lock:
+            live = self._progress.get(job.id)
+        if live is not None and job.status == 'running':
+            data['progress'], data['total'] = live
+        if data['status'] == 'done':
+            data['percent'] = 100
+        elif data['total']:
+            data['percent'] = min(99, int(data['progress'] * 100 / data['total']))
+        else:
+            data['percent'] = 0
+        return data
+
+    def stats(self) -> Dict[str, int]:
+        counts = dict(db.session.query(JobModel.status, db.func.count(JobModel.id)).group_by(JobModel.status).all())
+        return dict({status: counts.get(status, 0) for status in JOB_STATUSES}, workers=self.max_workers)
+
+    # ---- running ----
+
+    def _set_progress(self, job_id: int, done: int, total: Optional[int]) -> None:
+        with self._lock:
+            self._progress[job_id] = (done, total)
+
+    def _run(self, job_id: int) -> None:
+        with self.app.app_context():
+            job = db.session.get(JobModel, job_id)
+            if job is None or job.status != 'pending':
+                return
+            handler = self._handlers.get(job.kind)
+            job.status, job.started_at = 'running', JobModel.now()
+            db.session.commit()
+            self._set_progress(job_id, 0, None)
+            path = os.path.join(self.result_dir, f'job_{job_id}')
+            started = time.perf_counter()
+            try:
+                if handler is None:
+                    raise ValueError(f'Unknown job kind: {job.kind}')
+                result = handler(JobContext(self, job_id, job.parameters))
+                os.makedirs(self.result_dir, exist_ok=True)
+                with open(path + '.part', 'w', encoding='utf-8', newline='') as file:
+                    for line in result.lines:
+                        file.write(line)
+                os.replace(path + '.part', path)
+                db.session.rollback()  # the handler's reads, nothing to keep
+                job = db.session.get(JobModel, job_id)
+                with self._lock:
+                    progress, total = self._progress.get(job_id, (0, None))
+                job.status, job.progress, job.total = 'done', progress, total if total is not None else progress
+                job.result_path, job.filename, job.mimetype = path, result.filename, result.mimetype
+                job.message = f'Finished in {time.perf_counter() - started:.1f} s'
+            except Exception as e:
+                db.session.rollback()
+                if os.path.exists(path + '.part'):
+                    os.remove(path + '.part')
+                print(f"[!] Job {job_id} ({job.kind}) failed: {str(e)} ({type(e).__name__})")
+                job = db.session.get(JobModel, job_id)
+                job.status, job.message = 'failed', f'{type(e).__name__}: {e}'[:500]
+            finally:
+                job.finished_at = JobModel.now()
+                db.session.commit()
+                with self._lock:
+                    self._progress.pop(job_id, None)
+
+
+def submitted_response(job: JobModel, created: bool) -> Response:
+    """202 with the job status for JSON clients, otherwise a redirect to the job page"""
+    if request.accept_mimetypes.best == 'application/json':
+        response = jsonify(job_runner.status(job))
+        response.status_code = 202
+        response.headers['Location'] = url_for('api_job', job_id=job.id)
+        return response
+    if created:
+        flash(message='Export queued, it is prepared in the background.', category='success')
+    else:
+        flash(message='The same export is already in progress.', category='info')
+    return redirect(url_for('job_detail', job_id=job.id))
+
+
+job_runner = JobRunner()
@@ -0,0 +1,155 @@
+"""
+Live game events (plays and drive status) pushed to browsers as Server-Sent Events
+"""
+
+import json
+import queue
+import threading
+from collections import deque
+from typing import Deque, Dict, Iterator, List, Optional, Set, Tuple
+
+# seconds between keep-alive comments on an idle stream
+HEARTBEAT_SECONDS = 15
+# milliseconds an EventSource waits before reconnecting
+RETRY_MS = 3000
+
+
+class Subscription:
+    """The event queue of one open stream"""
+
+    def __init__(self, feed: 'LiveFeed', game_id: int, max_size: int) -> None:
+        self.feed = feed
+        self.game_id = game_id
+        self.queue: 'queue.Queue[Optional[tuple]]' = queue.Queue(maxsize=max_size)
+        self.closed = False
+
+    def get(self, timeout: float) -> Optional[tuple]:
+        """Next (id, event, data) or None after ``timeout`` seconds without one"""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self) -> None:
+        self.feed.unsubscribe(self)
+
+
+class LiveFeed:
+    """In-process publish/subscribe of game events.
+
+    Write handlers publish after their commit, so a subscriber never sees a change it
+    could not read back. Every game keeps its last ``backlog`` events; a reconnecting
+    EventSource sends Last-Event-ID and gets what it missed replayed. A subscriber whose
+    queue is full is dropped, its stream ends and the browser reconnects and catches up
+    from the backlog. Like the result cache this is per process.
+    """
+
+    def __init__(self, backlog: int = 100, queue_size: int = 256) -> None:
+        self.backlog = backlog
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._next_id = 1
+        self._subscribers: Dict[int, Set[Subscription]] = {}
+        self._history: Dict[int, Deque[tuple]] = {}
+        self._counters = {'published': 0, 'delivered': 0, 'dropped_subscribers': 0}
+
+    def publish(self, game_id: int, event: str, data: dict) -> int:
+        """Send an event to every stream of a game, returns its id"""
+        with self._lock:
+            event_id = self._next_id
+            self._next_id += 1
+            message = (event_id, event, json.dumps(dict(data, game_id=game_id)))
+            self._history.setdefault(game_id, deque(maxlen=self.backlog)).append(message)
+            self._counters['published'] += 1
+            for subscription in list(self._subscribers.get(game_id, ())):
+                try:
+                    subscription.queue.put_nowait(message)
+                    self._counters['delivered'] += 1
+                except queue.Full:
+                    self._drop(subscription)
+                    self._counters['dropped_subscribers'] += 1
+        return event_id
+
+    def subscribe(self, game_id: int, last_event_id: Optional[int] = None) -> Subscription:
+        """Open a stream, queueing the backlog after ``last_event_id`` first"""
+        subscription = Subscription(self, game_id, self.queue_size)
+        with self._lock:
+            if last_event_id is not None:
+                for message in self._history.get(game_id, ()):
+                    if message[0] > last_event_id:
+                        subscription.queue.put_nowait(message)
+            self._subscribers.setdefault(game_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._drop(subscription)
+
+    def _drop(self, subscription: Subscription) -> None:
+        subscription.closed = True
+        subscribers = self._subscribers.get(subscription.game_id)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.game_id]
+        try:
+            subscription.queue.put_nowait(None)  # wakes the stream so it ends
+        except queue.Full:
+            pass
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counters, streams=sum(len(subs) for subs in self._subscribers.values()),
+                        games=len(self._subscribers))
+
+
+def stream(subscription: Subscription, heartbeat: float = HEARTBEAT_SECONDS) -> Iterator[str]:
+    """text/event-stream body of a subscription, ends when the subscription is dropped"""
+    yield f'retry: {RETRY_MS}\n\n'
+    while not subscription.closed:
+        message = subscription.get(timeout=heartbeat)
+        if message is None:
+            if not subscription.closed:
+                yield ': keep-alive\n\n'
+            continue
+        event_id, event, data = message
+        yield f'id: {event_id}\nevent: {event}\ndata: {data}\n\n'
+
+
+# ---- payloads ----
+
+PLAY_FIELDS = ('id', 'drive_id', 'odk', 'quarter', 'down', 'distance', 'yard_line', 'off_play', 'play_type',
+               'result', 'gain_loss', 'penalty_type')
+
+
+def play_payload(play) -> dict:
+    """What the live pages need of a play (a model or a dict of its columns)"""
+    get = play.get if isinstance(play, dict) else lambda name: getattr(play, name, None)
+    return {name: get(name) for name in PLAY_FIELDS}
+
+
+def drive_payload(drive) -> dict:
+    """Drive status and summary, taken before the commit that expires them"""
+    summary = drive.summary.to_dict() if drive.summary else {'play_count': 0}
+    return dict(summary, drive_id=drive.id, result=drive.result, ended=bool(drive.ended))
+
+
+def publish_plays(game_id: int, event: str, plays: List[Tuple[dict, Optional[dict]]], drive: dict) -> None:
+    """One event per (play, previous) payload pair, then the status of their drive"""
+    for play, previous in plays:
+        data = {'play': play, 'drive': drive}
+        if previous is not None:
+            data['previous'] = previous
+        live_feed.publish(game_id, event, data)
+    live_feed.publish(game_id, 'drive-status', {'drive': drive})
+
+
+def publish_drive(game_id: int, drive: Optional[dict] = None, deleted_id: Optional[int] = None) -> None:
+    """Status of a created drive, or the removal of one"""
+    if deleted_id is not None:
+        live_feed.publish(game_id, 'drive-status', {'drive': {'drive_id': deleted_id}, 'deleted': True})
+    else:
+        live_feed.publish(game_id, 'drive-status', {'drive': drive})
+
+
+live_feed = LiveFeed()
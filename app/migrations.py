@@ -0,0 +1,41 @@
+"""
+Schema upgrades for existing databases that ``db.create_all()`` does not perform
+"""
+
+from typing import List
+
+from sqlalchemy import inspect, text
+
+from app.extensions import db
+
+
+def ensure_indexes() -> List[str]:
+    """Create every index declared on the models that the database is missing.
+
+    ``create_all`` only creates indexes together with a new table, so databases from
+    before an index was declared never get it. Before a unique index is added, the
+    model's ``deduplicate()`` (if it has one) merges rows repeating its key. Returns
+    the names of the created indexes.
+    """
+    inspector = inspect(db.engine)
+    models = {mapper.local_table: mapper.class_ for mapper in db.Model.registry.mappers}
+    created = []
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        # read from sqlite_master, the inspector leaves out indexes over expressions
+        with db.engine.connect() as connection:
+            existing = set(connection.execute(text("SELECT name FROM sqlite_master WHERE type = 'index' "
+                                                   "AND tbl_name = :table"), {'table': table.name}).scalars())
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            if index.name not in existing:
+                # rows written before a unique index existed may repeat a key, the model merges them first
+                if index.unique and hasattr(models.get(table), 'deduplicate'):
+                    models[table].deduplicate()
+                index.create(db.engine)
+                created.append(index.name)
+    if created:
+        # refresh the planner statistics so the new indexes are picked up
+        with db.engine.begin() as connection:
+            connection.execute(text('ANALYZE'))
+    return created
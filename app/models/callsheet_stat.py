@@ -0,0 +1,220 @@
+"""
+Persisted running call sheet aggregates per game, odk and play/formation/adjustment
+"""
+
+import json
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.dialects.sqlite import insert
+
+from app.analytics.running_stats import RunningStats
+from app.extensions import db
+from app.models.drive import DriveModel
+from app.models.play import PlayModel
+from app.upsert import null_safe
+
+CALLSHEET_KEYS = ('off_play', 'off_form', 'form_adj')
+
+# what identifies a row
+KEY_COLUMNS = ('game_id', 'odk', *CALLSHEET_KEYS)
+
+# rows fetched per round trip while merging
+MERGE_BATCH_SIZE = 500
+
+
+class CallSheetStatModel(db.Model):
+    """Running gain/loss statistics of one call sheet key within one game.
+
+    Rows are updated in the same transaction as the play write that changes them,
+    so call sheets merge a handful of rows per game instead of reading plays. A
+    unique index over the key makes concurrent writers meet on one row.
+    """
+
+    __tablename__ = 'callsheet_stat'
+
+    id: int = db.Column(db.Integer, primary_key=True)
+    game_id: int = db.Column(db.Integer, db.ForeignKey('game.id'), nullable=False)
+    odk: Optional[str] = db.Column(db.String(1))
+    off_play: Optional[str] = db.Column(db.String(50))
+    off_form: Optional[str] = db.Column(db.String(50))
+    form_adj: Optional[str] = db.Column(db.String(50))
+
+    count: int = db.Column(db.Integer, nullable=False, default=0)
+    total: int = db.Column(db.Integer, nullable=False, default=0)
+    mean: float = db.Column(db.Float, nullable=False, default=0.0)
+    m2: float = db.Column(db.Float, nullable=False, default=0.0)
+    histogram: str = db.Column(db.Text, nullable=False, default='{}')  # JSON {gain: count}
+
+    __table_args__ = (
+        db.Index('ix_callsheet_stat_game_odk', 'game_id', 'odk'),
+    )
+
+    def __repr__(self) -> str:
+        return f'<CallSheetStat game={self.game_id} {self.off_play}/{self.off_form}/{self.form_adj} n={self.count}>'
+
+    @classmethod
+    def unique_key(cls) -> list:
+        """Expressions of the unique index, and the conflict target of its upserts"""
+        return [cls.game_id, null_safe(cls.odk), *[null_safe(getattr(cls, name)) for name in CALLSHEET_KEYS]]
+
+    @property
+    def key(self) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+        return self.off_play, self.off_form, self.form_adj
+
+    def to_stats(self) -> RunningStats:
+        histogram = {int(value): hits for value, hits in json.loads(self.histogram or '{}').items()}
+        return RunningStats(self.count, self.total, self.mean, self.m2, histogram)
+
+    def store(self, stats: RunningStats) -> None:
+        self.count = stats.count
+        self.total = stats.total
+        self.mean = stats.mean
+        self.m2 = stats.m2
+        self.histogram = json.dumps(stats.histogram)
+
+    # ---- maintenance, called by the play write handlers (no commit) ----
+
+    @staticmethod
+    def snapshot(play: PlayModel, game_id: int) -> dict:
+        """The fields of a play that decide its contribution, taken before an edit"""
+        return {
+            'game_id': game_id,
+            'odk': play.odk,
+            'off_play': play.off_play,
+            'off_form': play.off_form,
+            'form_adj': play.form_adj,
+            'gain_loss': int(play.gain_loss or 0),
+        }
+
+    @classmethod
+    def add_play(cls, snapshot: dict) -> None:
+        cls.add_plays([snapshot])
+
+    @classmethod
+    def add_plays(cls, snapshots: Iterable[dict]) -> None:
+        """Add a batch of plays, touching each affected row once"""
+        grouped: Dict[tuple, RunningStats] = {}
+        for snapshot in snapshots:
+            key = tuple(snapshot[name] for name in KEY_COLUMNS)
+            grouped.setdefault(key, RunningStats()).add(snapshot['gain_loss'])
+        if not grouped:
+            return
+        rows = cls._upsert_rows(grouped)
+        for key, added in grouped.items():
+            row = rows[key]
+            row.store(row.to_stats().merge(added))
+
+    @classmethod
+    def remove_play(cls, snapshot: dict) -> bool:
+        """Take a play out of its row, True when the game had to be rebuilt instead.
+
+        The rebuild reads the plays as they are in the session, so callers flush the
+        deletion or edit of the play first; after a rebuild the edited play is already
+        counted and must not be added again.
+        """
+        row = cls.query.filter_by(**{name: snapshot[name] for name in KEY_COLUMNS}).first()
+        if row is None:
+            return False
+        stats = row.to_stats()
+        try:
+            stats.remove(snapshot['gain_loss'])
+        except ValueError:
+            # the row no longer matches the plays, rebuild the whole game instead
+            cls.rebuild_game(snapshot['game_id'])
+            return True
+        if stats.count:
+            row.store(stats)
+        else:
+            db.session.delete(row)
+        return False
+
+    @classmethod
+    def _upsert_rows(cls, keys: Iterable[tuple]) -> Dict[tuple, 'CallSheetStatModel']:
+        """The rows of the keys, inserting empty ones where missing, in one statement.
+
+        The no-op DO UPDATE (rather than DO NOTHING) makes RETURNING include the rows
+        that already existed.
+        """
+        statement = (insert(cls)
+                     .on_conflict_do_update(index_elements=cls.unique_key(), set_={'count': cls.count})
+                     .returning(cls))
+        rows = db.session.scalars(
+            statement,
+            [dict(zip(KEY_COLUMNS, key), count=0, total=0, mean=0.0, m2=0.0, histogram='{}') for key in keys],
+            execution_options={'populate_existing': True}
+        )
+        return {(row.game_id, row.odk, *row.key): row for row in rows}
+
+    @classmethod
+    def rebuild_game(cls, game_id: int) -> None:
+        """Recompute every row of a game from its plays"""
+        cls.query.filter_by(game_id=game_id).delete()
+        grouped: Dict[tuple, RunningStats] = {}
+        plays = (db.session.query(PlayModel.odk, *[getattr(PlayModel, name) for name in CALLSHEET_KEYS],
+                                  PlayModel.gain_loss)
+                 .join(DriveModel, DriveModel.id == PlayModel.drive_id)
+                 .filter(DriveModel.game_id == game_id)
+                 .order_by(PlayModel.id))
+        for odk, off_play, off_form, form_adj, gain_loss in plays:
+            grouped.setdefault((odk, off_play, off_form, form_adj), RunningStats()).add(int(gain_loss or 0))
+        for (odk, off_play, off_form, form_adj), stats in grouped.items():
+            row = cls(game_id=game_id, odk=odk, off_play=off_play, off_form=off_form, form_adj=form_adj)
+            row.store(stats)
+            db.session.add(row)
+
+    @classmethod
+    def deduplicate(cls) -> int:
+        """Rebuild the games holding several rows of one key, returns their number.
+
+        Run before the unique index is created on a database from before it existed.
+        """
+        games = [game_id for (game_id,) in (db.session.query(cls.game_id)
+                                            .group_by(*cls.unique_key())
+                                            .having(db.func.count(cls.id) > 1)
+                                            .distinct())]
+        for game_id in games:
+            cls.rebuild_game(game_id)
+        db.session.commit()
+        return len(games)
+
+    @classmethod
+    def backfill(cls) -> int:
+        """Build rows for games that have plays but no rows yet, returns the number of games"""
+        missing = (db.session.query(DriveModel.game_id)
+                   .join(PlayModel, PlayModel.drive_id == DriveModel.id)
+                   .filter(~db.exists().where(cls.game_id == DriveModel.game_id))
+                   .distinct()
+                   .all())
+        for (game_id,) in missing:
+            cls.rebuild_game(game_id)
+        if missing:
+            db.session.commit()
+        return len(missing)
+
+    # ---- reading ----
+
+    @classmethod
+    def merged(cls, *criteria, joins: Iterable = ()) -> List[Tuple[tuple, RunningStats]]:
+        """Rows matching the criteria merged per call sheet key.
+
+        Only the stat columns are selected and they are streamed in batches into the
+        aggregator, no model instances are built.
+        """
+        query = db.session.query(cls.off_play, cls.off_form, cls.form_adj,
+                                 cls.count, cls.total, cls.mean, cls.m2, cls.histogram)
+        for target in joins:
+            query = query.join(*target) if isinstance(target, tuple) else query.join(target)
+        merged: Dict[tuple, RunningStats] = {}
+        rows = query.filter(*criteria).order_by(cls.id).execution_options(yield_per=MERGE_BATCH_SIZE)
+        for off_play, off_form, form_adj, count, total, mean, m2, histogram in rows:
+            stats = RunningStats(count, total, mean, m2,
+                                 {int(value): hits for value, hits in json.loads(histogram or '{}').items()})
+            key = (off_play, off_form, form_adj)
+            if key in merged:
+                merged[key].merge(stats)
+            else:
+                merged[key] = stats
+        return list(merged.items())
+
+
+db.Index('ux_callsheet_stat_key', *CallSheetStatModel.unique_key(), unique=True)
@@ -1,5 +1,7 @@
 from app.extensions import db
 from app.models.play import PlayModel
+from app.models.drive_summary import DriveSummaryModel
+from app.models.game_change import GameChangeModel
 from app.config import ApplicationData
 
 class DriveModel(db.Model):
@@ -8,30 +10,44 @@ class DriveModel(db.Model):
     game_id = db.Column(db.Integer, db.ForeignKey('game.id'), nullable=False)
     result = db.Column(db.String(50))
     ended = db.Column(db.Boolean, default=False)
-    plays = db.relationship('PlayModel', backref='drive', lazy=True, cascade='all, delete-orphan')
+    plays = db.relationship('PlayModel', backref='drive', lazy=True, cascade='all, delete-orphan',
+                            order_by='PlayModel.id')
+    summary = db.relationship('DriveSummaryModel', uselist=False, lazy='joined', cascade='all, delete-orphan')
+
+    __table_args__ = (
+        db.Index('ix_drive_game_id_id', 'game_id', 'id'),  # drives of a game in order
+    )
 
     def update_status(self):
+        # callers flush their play changes first, so status and summary commit together with them
+        self.refresh_status()
+        db.session.commit()
+
+    def refresh_status(self):
+        """Recompute result, ended flag and summary from the last play, without committing"""
+        GameChangeModel.touch(self.game_id)
         last_play = PlayModel.query.filter_by(drive_id=self.id).order_by(PlayModel.id.desc()).first()
 
         if not last_play:
             self.ended = False
             self.result = "In Progress"
-            db.session.commit()
+            DriveSummaryModel.refresh(self)
             return
 
         self.result = last_play.result
+        self.ended = self.ends_drive(last_play)
+
+        DriveSummaryModel.refresh(self)
 
+    @staticmethod
+    def ends_drive(play) -> bool:
+        """Whether a play (a model or any object with its columns) ends its drive"""
         is_turnover_on_downs = (
-            last_play.down == 4 and
-            last_play.gain_loss is not None and
-            last_play.distance is not None and
-            last_play.gain_loss < last_play.distance
+            play.down == 4 and
+            play.gain_loss is not None and
+            play.distance is not None and
+            play.gain_loss < play.distance
         )
-        is_drive_ending_result = last_play.result in ApplicationData.DRIVE_ENDING_RESULTS
-
-        if is_drive_ending_result or is_turnover_on_downs:
-            self.ended = True
-        else:
-            self.ended = False
+        is_drive_ending_result = play.result in ApplicationData.DRIVE_ENDING_RESULTS
 
-        db.session.commit()
\ No newline at end of file
+        return is_drive_ending_result or is_turnover_on_downs
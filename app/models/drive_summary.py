@@ -0,0 +1,78 @@
+"""
+Materialized per-drive facts, kept in sync with the plays of a drive
+"""
+
+from typing import Optional
+from app.extensions import db
+from app.models.play import PlayModel
+
+
+class DriveSummaryModel(db.Model):
+    """One row per drive holding what list/chart pages need without touching plays"""
+
+    __tablename__ = 'drive_summary'
+
+    drive_id: int = db.Column(db.Integer, db.ForeignKey('drive.id'), primary_key=True)
+    game_id: int = db.Column(db.Integer, db.ForeignKey('game.id'), nullable=False, index=True)
+
+    odk: Optional[str] = db.Column(db.String(1))  # odk of the first play
+    play_count: int = db.Column(db.Integer, nullable=False, default=0)
+    start_yard_line: Optional[int] = db.Column(db.Integer)  # yard line of the first play
+    end_yard_line: Optional[int] = db.Column(db.Integer)  # yard line of the last play
+    last_gain_loss: Optional[int] = db.Column(db.Integer)
+    result: Optional[str] = db.Column(db.String(50))
+
+    def __repr__(self) -> str:
+        return f'<DriveSummary drive={self.drive_id} plays={self.play_count}>'
+
+    def to_dict(self) -> dict:
+        return {
+            'drive_id': self.drive_id,
+            'odk': self.odk,
+            'play_count': self.play_count,
+            'start_yard_line': self.start_yard_line,
+            'end_yard_line': self.end_yard_line,
+            'last_gain_loss': self.last_gain_loss,
+            'result': self.result,
+        }
+
+    @classmethod
+    def refresh(cls, drive) -> 'DriveSummaryModel':
+        """Recompute the summary of a drive inside the current transaction (no commit)"""
+        summary = drive.summary
+        if summary is None:
+            summary = cls(drive_id=drive.id, game_id=drive.game_id)
+            drive.summary = summary
+
+        base = PlayModel.query.filter_by(drive_id=drive.id)
+        first_play = base.order_by(PlayModel.id).first()
+        last_play = base.order_by(PlayModel.id.desc()).first()
+
+        summary.game_id = drive.game_id
+        summary.result = drive.result
+        if first_play is None:
+            summary.odk = None
+            summary.play_count = 0
+            summary.start_yard_line = None
+            summary.end_yard_line = None
+            summary.last_gain_loss = None
+            return summary
+
+        summary.odk = first_play.odk
+        summary.play_count = base.count()
+        summary.start_yard_line = first_play.yard_line
+        summary.end_yard_line = last_play.yard_line
+        summary.last_gain_loss = last_play.gain_loss
+        return summary
+
+    @classmethod
+    def backfill(cls) -> int:
+        """Create summaries for drives that predate the table, returns the number created"""
+        from app.models.drive import DriveModel
+
+        missing = DriveModel.query.filter(~DriveModel.summary.has()).all()
+        for drive in missing:
+            cls.refresh(drive)
+        if missing:
+            db.session.commit()
+        return len(missing)
@@ -23,7 +23,12 @@ class GameModel(db.Model):
     # Relationships
     home_team = db.relationship('TeamModel', foreign_keys=[home_team_id], lazy=True)
     away_team = db.relationship('TeamModel', foreign_keys=[away_team_id], lazy=True)
-    drives = db.relationship('DriveModel', backref='game', lazy=True, cascade='all, delete-orphan')
+    drives = db.relationship('DriveModel', backref='game', lazy=True, cascade='all, delete-orphan',
+                             order_by='DriveModel.id')
+
+    # filled by list queries from the drive_summary table (with_expression), None otherwise
+    drive_count = db.query_expression()
+    play_count = db.query_expression()
 
     def __init__(
             self,
@@ -58,12 +63,16 @@ class GameModel(db.Model):
     @property
     def total_drives(self) -> int:
         """Get total number of drives in this game"""
+        if self.drive_count is not None:
+            return self.drive_count
         return len(self.drives)
 
     @property
     def total_plays(self) -> int:
         """Get total number of plays in this game"""
-        return sum(len(drive.plays) for drive in self.drives)
+        if self.play_count is not None:
+            return self.play_count
+        return sum(drive.summary.play_count for drive in self.drives if drive.summary)
 
     @property
     def home_team_name(self) -> Optional[str]:
@@ -0,0 +1,56 @@
+"""
+Per-game change stamp used for conditional GETs of game JSON endpoints
+"""
+
+from datetime import datetime, UTC
+from typing import Optional, Tuple
+
+from app.extensions import db
+
+
+class GameChangeModel(db.Model):
+    """Version counter and time of the last write to the drives or plays of one game.
+
+    Write handlers touch the stamp in the same transaction as their change, so a
+    poller only needs this one primary key lookup to know whether anything moved.
+    """
+
+    __tablename__ = 'game_change'
+
+    game_id: int = db.Column(db.Integer, db.ForeignKey('game.id'), primary_key=True)
+    version: int = db.Column(db.Integer, nullable=False, default=0)
+    changed_at: datetime = db.Column(db.DateTime, nullable=False)  # naive UTC
+
+    def __repr__(self) -> str:
+        return f'<GameChange game={self.game_id} v{self.version}>'
+
+    @staticmethod
+    def _now() -> datetime:
+        return datetime.now(UTC).replace(tzinfo=None)
+
+    @classmethod
+    def touch(cls, game_id: int) -> None:
+        """Bump the version of a game inside the current transaction (no commit)"""
+        updated = (cls.query.filter_by(game_id=game_id)
+                   .update({cls.version: cls.version + 1, cls.changed_at: cls._now()}, synchronize_session=False))
+        if not updated:
+            db.session.add(cls(game_id=game_id, version=1, changed_at=cls._now()))
+
+    @classmethod
+    def stamp(cls, game_id: int) -> Optional[Tuple[int, datetime]]:
+        """(version, changed_at) of a game, None when it has no stamp"""
+        return db.session.query(cls.version, cls.changed_at).filter(cls.game_id == game_id).first()
+
+    @classmethod
+    def backfill(cls) -> int:
+        """Create stamps for games that predate the table, returns the number created"""
+        from app.models.game import GameModel
+
+        missing = (db.session.query(GameModel.id)
+                   .filter(~db.exists().where(cls.game_id == GameModel.id))
+                   .all())
+        now = cls._now()
+        db.session.add_all([cls(game_id=game_id, version=0, changed_at=now) for (game_id,) in missing])
+        if missing:
+            db.session.commit()
+        return len(missing)
@@ -0,0 +1,79 @@
+"""
+Background job records: heavy exports and reports run outside the request thread
+"""
+
+import json
+from datetime import datetime, UTC
+from typing import Optional
+
+from app.extensions import db
+from app.models.user import UserModel  # registers the 'user' table of the user_id foreign key
+
+JOB_STATUSES = ('pending', 'running', 'done', 'failed')
+
+
+class JobModel(db.Model):
+    """One submitted job, its state and where its result file lives.
+
+    ``key`` is the kind plus the canonical JSON of the parameters; a submission
+    whose key matches a pending or running job joins that job instead of
+    starting another one. Progress while running is kept in memory by the
+    runner, the row only changes on state transitions.
+    """
+
+    __tablename__ = 'job'
+
+    id: int = db.Column(db.Integer, primary_key=True)
+    kind: str = db.Column(db.String(50), nullable=False)
+    params: str = db.Column(db.Text, nullable=False, default='{}')
+    key: str = db.Column(db.String(500), nullable=False)
+    status: str = db.Column(db.String(20), nullable=False, default='pending')
+    progress: int = db.Column(db.Integer, nullable=False, default=0)
+    total: Optional[int] = db.Column(db.Integer, nullable=True)
+    message: Optional[str] = db.Column(db.String(500), nullable=True)
+    result_path: Optional[str] = db.Column(db.String(500), nullable=True)
+    filename: Optional[str] = db.Column(db.String(200), nullable=True)
+    mimetype: Optional[str] = db.Column(db.String(100), nullable=True)
+    user_id: Optional[int] = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
+    created_at: datetime = db.Column(db.DateTime, nullable=False)  # naive UTC
+    started_at: Optional[datetime] = db.Column(db.DateTime, nullable=True)
+    finished_at: Optional[datetime] = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_job_key_status', 'key', 'status'),
+        db.Index('ix_job_status_finished_at', 'status', 'finished_at'),
+    )
+
+    def __repr__(self) -> str:
+        return f'<Job {self.id} {self.kind} {self.status}>'
+
+    @staticmethod
+    def now() -> datetime:
+        return datetime.now(UTC).replace(tzinfo=None)
+
+    @staticmethod
+    def make_key(kind: str, params: dict) -> str:
+        return f"{kind}:{json.dumps(params, sort_keys=True, separators=(',', ':'))}"
+
+    @property
+    def parameters(self) -> dict:
+        return json.loads(self.params or '{}')
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ('done', 'failed')
+
+    def to_dict(self) -> dict:
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'params': self.parameters,
+            'status': self.status,
+            'progress': self.progress,
+            'total': self.total,
+            'message': self.message,
+            'filename': self.filename,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
@@ -54,3 +54,10 @@ class PlayModel(db.Model):
     returner_yard = db.Column(db.Integer)
     kicker = db.Column(db.Integer)
     kicker_yard = db.Column(db.Integer)
+
+    __table_args__ = (
+        # last/first play of a drive, play counts, plays of a drive in order
+        db.Index('ix_play_drive_id_id', 'drive_id', 'id'),
+        # offensive call sheet keys with the gain, answers call sheet queries from the index alone
+        db.Index('ix_play_odk_callsheet', 'odk', 'off_play', 'off_form', 'form_adj', 'gain_loss'),
+    )
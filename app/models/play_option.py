@@ -13,4 +13,7 @@ class PlayOptionModel(db.Model):
 
     __table_args__ = (
         db.UniqueConstraint('parameter_name', 'value', name='unique_play_option'),
+        db.Index('ix_play_option_value', 'value'),  # play call lookup by the chosen off_play value
+        # enabled options per parameter in display order (option catalogue)
+        db.Index('ix_play_option_enabled_parameter', 'enabled', 'parameter_name', 'value'),
     )
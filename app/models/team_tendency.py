@@ -0,0 +1,289 @@
+"""
+Persisted per team and season play tendency rollups for opponent scouting
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import case, extract, insert, literal
+from sqlalchemy.dialects.sqlite import insert as upsert
+
+from app.extensions import db
+from app.models.drive import DriveModel
+from app.models.game import GameModel
+from app.models.play import PlayModel
+from app.upsert import null_safe
+
+TENDENCY_KEYS = ('personnel', 'off_form', 'form_str', 'form_adj', 'motion', 'off_play')
+
+# what a row sums over: each key on its own, and formation plus play call together
+TENDENCY_DIMENSIONS = dict({name: (name,) for name in TENDENCY_KEYS},
+                           formation_play=('off_form', 'form_str', 'form_adj', 'off_play'))
+
+# summed columns, what a play adds to or removes from a row
+TENDENCY_SUMS = ('count', 'total', 'total_sq', 'positive')
+
+# which column of the game holds the team of each side
+TENDENCY_SIDES = (('home', GameModel.home_team_id), ('away', GameModel.away_team_id))
+
+
+class TeamTendencyModel(db.Model):
+    """Play count and gain sums of one value of a tendency dimension, for one team, season and side.
+
+    ``dimension`` names the key columns the row is about (see TENDENCY_DIMENSIONS),
+    the other key columns stay empty. Every game adds its plays to the rows of both
+    of its teams (``side`` is where the team played), once per dimension. The number
+    of rows follows the playbook, not the number of plays, so a report over any
+    number of seasons is a small GROUP BY per dimension instead of a scan of plays.
+    The play write handlers keep the rows current with additions and subtractions
+    in the same transaction, upserted against a unique index over the whole key.
+    The season is the calendar year of the game date.
+    """
+
+    __tablename__ = 'team_tendency'
+
+    id: int = db.Column(db.Integer, primary_key=True)
+    team_id: int = db.Column(db.Integer, db.ForeignKey('teams.id'), nullable=False)
+    season: int = db.Column(db.Integer, nullable=False)
+    side: str = db.Column(db.String(4), nullable=False)
+    odk: Optional[str] = db.Column(db.String(1))
+    dimension: str = db.Column(db.String(20), nullable=False)
+    personnel: Optional[str] = db.Column(db.String(20))
+    off_form: Optional[str] = db.Column(db.String(50))
+    form_str: Optional[str] = db.Column(db.String(50))
+    form_adj: Optional[str] = db.Column(db.String(50))
+    motion: Optional[str] = db.Column(db.String(50))
+    off_play: Optional[str] = db.Column(db.String(50))
+
+    count: int = db.Column(db.Integer, nullable=False, default=0)
+    total: int = db.Column(db.Integer, nullable=False, default=0)  # sum of gain/loss
+    total_sq: int = db.Column(db.Integer, nullable=False, default=0)  # sum of squared gain/loss
+    positive: int = db.Column(db.Integer, nullable=False, default=0)  # plays that gained yards
+
+    __table_args__ = (
+        db.Index('ix_team_tendency_team_dimension', 'team_id', 'dimension', 'odk', 'season'),
+    )
+
+    @classmethod
+    def unique_key(cls) -> list:
+        """Expressions of the unique index, and the conflict target of its upserts"""
+        return [cls.team_id, cls.season, cls.side, null_safe(cls.odk), cls.dimension,
+                *[null_safe(getattr(cls, name)) for name in TENDENCY_KEYS]]
+
+    def __repr__(self) -> str:
+        return f'<TeamTendency team={self.team_id} {self.season} {self.side} {self.dimension} n={self.count}>'
+
+    # ---- maintenance, called by the play write handlers (no commit) ----
+
+    @staticmethod
+    def snapshot(play: PlayModel, game_id: int) -> dict:
+        """The fields of a play that decide its contribution, taken before an edit"""
+        snapshot = {name: getattr(play, name) for name in ('odk', *TENDENCY_KEYS)}
+        snapshot['game_id'] = game_id
+        snapshot['gain_loss'] = int(play.gain_loss or 0)
+        return snapshot
+
+    @classmethod
+    def add_play(cls, snapshot: dict) -> None:
+        cls.add_plays([snapshot])
+
+    @classmethod
+    def add_plays(cls, snapshots: Iterable[dict]) -> None:
+        """Add a batch of plays, touching each affected row once"""
+        cls._apply((cls._group(snapshots), 1))
+
+    @classmethod
+    def remove_play(cls, snapshot: dict) -> None:
+        cls._apply((cls._group([snapshot]), -1))
+
+    @classmethod
+    def edit_play(cls, before: dict, after: dict) -> None:
+        """Replace the contribution of an edited play, rows it leaves unchanged are not written"""
+        cls._apply((cls._group([before]), -1), (cls._group([after]), 1))
+
+    @classmethod
+    def remove_drive(cls, drive_id: int) -> None:
+        """Take the plays of a drive out, call before deleting it"""
+        cls._apply((cls._grouped_plays(PlayModel.drive_id == drive_id), -1))
+
+    @classmethod
+    def remove_game(cls, game_id: int) -> None:
+        """Take the plays of a game out, call before deleting it"""
+        cls._apply((cls._grouped_plays(DriveModel.game_id == game_id), -1))
+
+    @staticmethod
+    def _group(snapshots: Iterable[dict]) -> Dict[tuple, List[int]]:
+        """(game id, odk, keys...) -> [count, total, total_sq, positive]"""
+        grouped: Dict[tuple, List[int]] = {}
+        for snapshot in snapshots:
+            key = tuple(snapshot[name] for name in ('game_id', 'odk', *TENDENCY_KEYS))
+            gain = snapshot['gain_loss']
+            sums = grouped.setdefault(key, [0, 0, 0, 0])
+            sums[0] += 1
+            sums[1] += gain
+            sums[2] += gain * gain
+            sums[3] += gain > 0
+        return grouped
+
+    @staticmethod
+    def _grouped_plays(*criteria) -> Dict[tuple, List[int]]:
+        """The same grouping as ``_group``, computed by the database from stored plays"""
+        gain = db.func.coalesce(PlayModel.gain_loss, 0)
+        rows = (db.session.query(DriveModel.game_id, PlayModel.odk,
+                                 *[getattr(PlayModel, name) for name in TENDENCY_KEYS],
+                                 db.func.count(PlayModel.id), db.func.sum(gain), db.func.sum(gain * gain),
+                                 db.func.sum(case((gain > 0, 1), else_=0)))
+                .join(DriveModel, DriveModel.id == PlayModel.drive_id)
+                .filter(*criteria)
+                .group_by(DriveModel.game_id, PlayModel.odk, *[getattr(PlayModel, name) for name in TENDENCY_KEYS])
+                .all())
+        return {tuple(row[:-4]): list(row[-4:]) for row in rows}
+
+    @classmethod
+    def _apply(cls, *changes: Tuple[Dict[tuple, List[int]], int]) -> None:
+        """Spread grouped sums, each added (1) or subtracted (-1), over the dimension rows of both teams.
+
+        The net change of every row is upserted by one statement, which returns the new
+        counts, so rows left without plays are deleted only when there are any.
+        """
+        sides: Dict[int, List[Tuple[int, int, str]]] = {}
+        deltas: Dict[tuple, List[int]] = {}
+        for grouped, sign in changes:
+            for (game_id, odk, *keys), sums in grouped.items():
+                if game_id not in sides:
+                    sides[game_id] = cls._game_sides(game_id)
+                values = dict(zip(TENDENCY_KEYS, keys))
+                for team_id, season, side in sides[game_id]:
+                    for dimension, columns in TENDENCY_DIMENSIONS.items():
+                        key = (team_id, season, side, odk, dimension, tuple(values[name] for name in columns))
+                        delta = deltas.setdefault(key, [0, 0, 0, 0])
+                        for index, value in enumerate(sums):
+                            delta[index] += sign * value
+
+        rows = [dict(dict.fromkeys(TENDENCY_KEYS), team_id=team_id, season=season, side=side, odk=odk,
+                     dimension=dimension, **dict(zip(TENDENCY_DIMENSIONS[dimension], values)),
+                     **dict(zip(TENDENCY_SUMS, sums)))
+                for (team_id, season, side, odk, dimension, values), sums in deltas.items() if any(sums)]
+        if not rows:
+            return
+        statement = upsert(cls.__table__)
+        statement = statement.on_conflict_do_update(
+            index_elements=cls.unique_key(),
+            set_={name: getattr(cls.__table__.c, name) + getattr(statement.excluded, name) for name in TENDENCY_SUMS}
+        )
+        result = db.session.execute(statement.returning(cls.__table__.c.id, cls.__table__.c.count), rows)
+        emptied = [row_id for row_id, count in result if count <= 0]
+        if emptied:
+            db.session.execute(db.delete(cls).where(cls.id.in_(emptied)))
+
+    @staticmethod
+    def _game_sides(game_id: int) -> List[Tuple[int, int, str]]:
+        """(team id, season, side) of each team of a game"""
+        game = db.session.get(GameModel, game_id)
+        if game is None:
+            return []
+        return [(team_id, game.date.year, side)
+                for side, team_id in (('home', game.home_team_id), ('away', game.away_team_id))
+                if team_id is not None]
+
+    @classmethod
+    def rebuild(cls, *criteria) -> None:
+        """Recompute the rows of the games matching ``criteria`` (on GameModel) from their plays.
+
+        Deletes the rows of every team and season the games touch, then inserts the sums
+        of all plays of those team-seasons with one INSERT ... SELECT per side and dimension.
+        """
+        targets = set()
+        for side, team_column in TENDENCY_SIDES:
+            targets.update(db.session.query(team_column, extract('year', GameModel.date))
+                           .filter(team_column.isnot(None), *criteria)
+                           .distinct())
+        if not targets:
+            return
+        for team_id, season in targets:
+            cls.query.filter_by(team_id=team_id, season=season).delete()
+
+        gain = db.func.coalesce(PlayModel.gain_loss, 0)
+        season = extract('year', GameModel.date)
+        for side, team_column in TENDENCY_SIDES:
+            for dimension, columns in TENDENCY_DIMENSIONS.items():
+                keys = [getattr(PlayModel, name) for name in columns]
+                select = (db.select(team_column, season, literal(side), PlayModel.odk, literal(dimension), *keys,
+                                    db.func.count(PlayModel.id), db.func.sum(gain), db.func.sum(gain * gain),
+                                    db.func.sum(case((gain > 0, 1), else_=0)))
+                          .join(DriveModel, DriveModel.id == PlayModel.drive_id)
+                          .join(GameModel, GameModel.id == DriveModel.game_id)
+                          .where(team_column.isnot(None),
+                                 db.tuple_(team_column, season).in_([db.tuple_(*target) for target in targets]))
+                          .group_by(team_column, season, PlayModel.odk, *keys))
+                db.session.execute(insert(cls).from_select(
+                    ['team_id', 'season', 'side', 'odk', 'dimension', *columns,
+                     'count', 'total', 'total_sq', 'positive'],
+                    select
+                ))
+
+    @classmethod
+    def deduplicate(cls) -> int:
+        """Rebuild the team-seasons holding several rows of one key, returns their number.
+
+        Run before the unique index is created on a database from before it existed.
+        """
+        targets = (db.session.query(cls.team_id, cls.season)
+                   .group_by(*cls.unique_key())
+                   .having(db.func.count(cls.id) > 1)
+                   .distinct()
+                   .all())
+        if targets:
+            cls.rebuild(db.or_(*[db.and_(db.or_(GameModel.home_team_id == team_id, GameModel.away_team_id == team_id),
+                                         extract('year', GameModel.date) == season)
+                                 for team_id, season in targets]))
+        db.session.commit()
+        return len(targets)
+
+    @classmethod
+    def backfill(cls) -> int:
+        """Build rows for team-seasons with plays but no rows yet, returns the number of games rebuilt"""
+        with_plays = db.exists().where(DriveModel.game_id == GameModel.id, PlayModel.drive_id == DriveModel.id)
+        missing = set()
+        for side, team_column in TENDENCY_SIDES:
+            has_rows = db.exists().where(cls.team_id == team_column,
+                                         cls.season == extract('year', GameModel.date))
+            missing.update(game_id for (game_id,) in (db.session.query(GameModel.id)
+                                                      .filter(team_column.isnot(None), with_plays, ~has_rows)))
+        if missing:
+            cls.rebuild(GameModel.id.in_(missing))
+            db.session.commit()
+        return len(missing)
+
+    # ---- reading ----
+
+    @classmethod
+    def seasons(cls, team_id: int) -> List[int]:
+        return [season for (season,) in (db.session.query(cls.season).filter(cls.team_id == team_id)
+                                         .distinct().order_by(cls.season))]
+
+    @classmethod
+    def breakdown(cls, dimension: str, *criteria, limit: Optional[int] = None) -> List[dict]:
+        """Sums per value of a dimension over the rows matching the criteria, most plays first"""
+        columns = [getattr(cls, name) for name in TENDENCY_DIMENSIONS[dimension]]
+        count = db.func.sum(cls.count)
+        query = (db.session.query(*columns, count, db.func.sum(cls.total), db.func.sum(cls.total_sq),
+                                  db.func.sum(cls.positive))
+                 .filter(cls.dimension == dimension, *criteria)
+                 .group_by(*columns)
+                 .order_by(count.desc(), *columns))
+        if limit:
+            query = query.limit(limit)
+        return [dict(zip(TENDENCY_DIMENSIONS[dimension], row[:-4]),
+                     count=row[-4], total=row[-3], total_sq=row[-2], positive=row[-1]) for row in query]
+
+    @classmethod
+    def totals(cls, *criteria) -> dict:
+        """Overall sums over the rows matching the criteria (every play is in each dimension once)"""
+        count, total, total_sq, positive = (db.session.query(db.func.sum(cls.count), db.func.sum(cls.total),
+                                                             db.func.sum(cls.total_sq), db.func.sum(cls.positive))
+                                            .filter(cls.dimension == TENDENCY_KEYS[0], *criteria)
+                                            .one())
+        return {'count': count or 0, 'total': total or 0, 'total_sq': total_sq or 0, 'positive': positive or 0}
+
+
+db.Index('ux_team_tendency_key', *TeamTendencyModel.unique_key(), unique=True)
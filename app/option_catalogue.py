@@ -0,0 +1,78 @@
+"""
+Process-wide catalogue of the enabled playbook options shown by the add/edit play forms
+"""
+
+import threading
+from typing import Dict, Iterable, List
+
+from app.extensions import db
+from app.models.play_call import PlayCallModel
+from app.models.play_option import PlayOptionModel
+
+DEFENSE_PARAMETERS = ('play_type1', 'defense_front', 'defense_strongside', 'blitz', 'slants', 'coverage')
+
+
+class PlayOptionCatalogue:
+    """Enabled play options per parameter, loaded with one query and kept until invalidated.
+
+    Every settings write bumps the version; the next reader notices the stale build
+    and reloads lazily. The option lists are shared between requests and must be
+    treated as read-only.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._version = 0
+        self._built_version = -1
+        self._options: Dict[str, List[dict]] = {}
+        self._builds = 0
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._version += 1
+
+    def form_options(self, play_parameters: Iterable[str]) -> Dict[str, List[dict]]:
+        """Option entries per play and defense parameter, in the shape the play forms expect"""
+        options = self._current()
+        return {param: options.get(param, []) for param in (*play_parameters, *DEFENSE_PARAMETERS)}
+
+    def stats(self) -> Dict[str, int]:
+        return {'version': self._version, 'builds': self._builds, 'parameters': len(self._options)}
+
+    def _current(self) -> Dict[str, List[dict]]:
+        with self._lock:
+            if self._built_version == self._version:
+                return self._options
+            version = self._version
+        options = self._load()
+        with self._lock:
+            # keep the newest build, an invalidation during the load leaves it stale for the next reader
+            if version >= self._built_version:
+                self._options, self._built_version = options, version
+                self._builds += 1
+        return options
+
+    @staticmethod
+    def _load() -> Dict[str, List[dict]]:
+        rows = (db.session.query(PlayOptionModel.id, PlayOptionModel.parameter_name, PlayOptionModel.value,
+                                 PlayOptionModel.play_call_id, PlayCallModel.name)
+                .outerjoin(PlayCallModel, PlayCallModel.id == PlayOptionModel.play_call_id)
+                .filter(PlayOptionModel.enabled.is_(True))
+                # alphabetical per parameter, like lookups through the unique (parameter, value) index
+                .order_by(PlayOptionModel.parameter_name, PlayOptionModel.value)
+                .all())
+        options: Dict[str, List[dict]] = {}
+        for option_id, param, value, play_call_id, play_call_name in rows:
+            entry = {'id': option_id, 'value': value, 'label': value}
+            if param == 'off_play':
+                entry['label'] = f"{value} ({play_call_name})" if play_call_name else value
+                entry['play_call_id'] = play_call_id
+            options.setdefault(param, []).append(entry)
+        return options
+
+
+play_option_catalogue = PlayOptionCatalogue()
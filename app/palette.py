@@ -0,0 +1,138 @@
+"""
+Ranked color palettes of team icons, extracted with NumPy and cached by image content
+"""
+
+import hashlib
+import io
+import os
+from typing import List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from app.cache import ResultCache
+from app.icons import icon_store
+
+PALETTE_SIZE = 5
+# longest side the icon is sampled at, nearest neighbour so no blended colors appear
+SAMPLE_SIZE = 128
+# pixels at least this opaque take part, drops the soft anti-aliased rim
+ALPHA_THRESHOLD = 128
+# bits kept per channel before clustering, near identical shades share a bin
+QUANTIZE_BITS = 5
+# clusters are seeded at least this far apart (euclidean RGB)
+MIN_DISTANCE = 48.0
+KMEANS_ITERATIONS = 10
+
+RASTER_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp', '.gif', '.bmp')
+
+
+class PaletteColor(NamedTuple):
+    hex: str
+    share: float  # fraction of the opaque pixels
+    text_color: str  # black or white, whichever reads better on ``hex``
+
+
+def readable_text_color(hex_color: str) -> str:
+    hex_color = hex_color.lstrip('#')
+    r, g, b = [int(hex_color[i:i + 2], 16) for i in (0, 2, 4)]
+    brightness = 0.299 * r + 0.587 * g + 0.114 * b
+    return "#000000" if brightness > 186 else "#ffffff"
+
+
+def extract_palette(data: bytes, size: int = PALETTE_SIZE) -> List[PaletteColor]:
+    """Up to ``size`` dominant colors of an image, most covering first.
+
+    Opaque pixels are quantized into bins, the bins clustered with a weighted
+    k-means seeded from the heaviest, well separated bins. Each cluster reports
+    the color of its heaviest bin rather than the mean, so edge pixels between
+    two flat areas cannot shift it.
+    """
+    with Image.open(io.BytesIO(data)) as image:
+        image.draft('RGB', (SAMPLE_SIZE * 2, SAMPLE_SIZE * 2))  # JPEGs decode at a reduced scale
+        image.thumbnail((SAMPLE_SIZE, SAMPLE_SIZE), Image.Resampling.NEAREST)
+        image = image.convert('RGBA')
+        pixels = np.asarray(image).reshape(-1, 4)
+    rgb = pixels[pixels[:, 3] >= ALPHA_THRESHOLD, :3].astype(np.int64)
+    if not len(rgb):
+        return []
+
+    # one bin per quantized color, with the pixel count and mean exact color of each
+    shift = 8 - QUANTIZE_BITS
+    quantized = rgb >> shift
+    codes = (quantized[:, 0] << (2 * QUANTIZE_BITS)) | (quantized[:, 1] << QUANTIZE_BITS) | quantized[:, 2]
+    _, inverse, weights = np.unique(codes, return_inverse=True, return_counts=True)
+    colors = np.stack([np.bincount(inverse, weights=rgb[:, channel]) for channel in range(3)], axis=1)
+    colors /= weights[:, None]
+
+    centers = _seed(colors, weights, size)
+    for _ in range(KMEANS_ITERATIONS):
+        distances = ((colors[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)
+        labels = distances.argmin(axis=1)
+        totals = np.bincount(labels, weights=weights, minlength=len(centers))
+        moved = np.stack([np.bincount(labels, weights=weights * colors[:, channel], minlength=len(centers))
+                          for channel in range(3)], axis=1)
+        updated = np.where(totals[:, None] > 0, moved / np.maximum(totals, 1)[:, None], centers)
+        if np.allclose(updated, centers):
+            break
+        centers = updated
+
+    distances = ((colors[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)
+    labels = distances.argmin(axis=1)
+    totals = np.bincount(labels, weights=weights, minlength=len(centers))
+    palette = []
+    for cluster in np.argsort(-totals, kind='stable'):
+        if not totals[cluster]:
+            continue
+        members = np.flatnonzero(labels == cluster)
+        r, g, b = np.rint(colors[members[np.argmax(weights[members])]]).astype(int)
+        hex_color = f"#{r:02x}{g:02x}{b:02x}"
+        palette.append(PaletteColor(hex_color, float(totals[cluster] / len(rgb)), readable_text_color(hex_color)))
+    return palette
+
+
+def _seed(colors: np.ndarray, weights: np.ndarray, size: int) -> np.ndarray:
+    """Heaviest bins first, skipping any closer than MIN_DISTANCE to one already taken"""
+    chosen = []
+    for index in np.argsort(-weights, kind='stable'):
+        if all(np.linalg.norm(colors[index] - colors[other]) >= MIN_DISTANCE for other in chosen):
+            chosen.append(index)
+            if len(chosen) == size:
+                break
+    return colors[chosen].copy()
+
+
+def dominant_colors(palette: List[PaletteColor]) -> Tuple[str, str]:
+    """(primary, secondary) team colors of a palette, white/black filling in for missing ones"""
+    if not palette:
+        return "#000000", "#ffffff"
+    if len(palette) == 1:
+        return palette[0].hex, "#ffffff"
+    return palette[0].hex, palette[1].hex
+
+
+def cached_palette(data: bytes, size: int = PALETTE_SIZE) -> List[PaletteColor]:
+    """``extract_palette`` keyed by the SHA-256 of the image, the same upload is only analysed once"""
+    digest = hashlib.sha256(data).hexdigest()
+    return palette_cache.get_or_compute(('palette', digest, size), lambda: extract_palette(data, size))
+
+
+def team_icon_source(icon: str, static_folder: str) -> Optional[str]:
+    """Raster file a team's palette comes from: the largest thumbnail of a stored icon, else
+    the icon itself or the upload next to its SVG"""
+    if icon_store.digest(icon):
+        return icon_store.raster_path(icon)
+    prefix = '/static/'
+    if not icon or not icon.startswith(prefix):
+        return None
+    path = os.path.join(static_folder, *icon[len(prefix):].split('/'))
+    if path.lower().endswith(RASTER_EXTENSIONS) and os.path.isfile(path):
+        return path
+    folder = os.path.dirname(path)
+    if not os.path.isdir(folder):
+        return None
+    candidates = sorted(name for name in os.listdir(folder) if name.lower().endswith(RASTER_EXTENSIONS))
+    return os.path.join(folder, candidates[0]) if candidates else None
+
+
+palette_cache = ResultCache(max_entries=512, ttl=7 * 24 * 3600, config_prefix='PALETTE_CACHE')
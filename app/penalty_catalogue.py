@@ -1,3 +1,8 @@
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
 SPOT_FOULS = [
     'Holding (Defense)', 'Illegal Contact', 'Pass Interference (Defense)', 'Targeting',
     'Horse-Collar Tackle', 'Illegal Block in the Back', 'Chop Block', 'Facemask', 'Illegal Forward Pass'
@@ -260,3 +265,113 @@ PENALTY_RULES = [
         'automatic_first_down': False,
     },
 ]
+
+
+@dataclass(frozen=True, slots=True)
+class PenaltyRule:
+    """One read-only entry of PENALTY_RULES"""
+
+    type: str
+    yards: int
+    category: str
+    spot_foul: bool = False
+    loss_of_down: bool = False
+    automatic_first_down: bool = False
+
+
+def to_raw_yard_line(yard_lines: np.ndarray) -> np.ndarray:
+    """Vectorized field position -> 0-100 conversion (own half negative, 50 stays 50)"""
+    return np.where(yard_lines < 0, -yard_lines, np.where(yard_lines == 50, 50, 100 - yard_lines))
+
+
+class PenaltyCatalogue:
+    """Penalty rules indexed by type and category, built once at import.
+
+    Yardage follows the add play form: a spot foul with a spot is enforced from the
+    spot (yard lines in 0-100 form), every other foul moves by its yards, towards the
+    offense when the home team ("H") fouled and away from it when the opponent ("O") did.
+    """
+
+    __slots__ = ('_by_type', '_by_category', '_select_options', '_spot_fouls')
+
+    def __init__(self, rules: Iterable[dict]) -> None:
+        records = [PenaltyRule(**rule) for rule in rules]
+        self._by_type: Dict[str, PenaltyRule] = {rule.type: rule for rule in records}
+        by_category: Dict[str, list] = {}
+        for rule in records:
+            by_category.setdefault(rule.category, []).append(rule)
+        self._by_category: Dict[str, Tuple[PenaltyRule, ...]] = {
+            category: tuple(rules) for category, rules in by_category.items()
+        }
+        self._select_options = tuple({'value': rule.type, 'label': rule.type} for rule in records)
+        self._spot_fouls = frozenset(rule.type for rule in records if rule.spot_foul)
+
+    def __len__(self) -> int:
+        return len(self._by_type)
+
+    def __iter__(self) -> Iterator[PenaltyRule]:
+        return iter(self._by_type.values())
+
+    def __contains__(self, penalty_type: object) -> bool:
+        return penalty_type in self._by_type
+
+    def get(self, penalty_type: Optional[str]) -> Optional[PenaltyRule]:
+        return self._by_type.get(penalty_type)
+
+    @property
+    def categories(self) -> List[str]:
+        return list(self._by_category)
+
+    def by_category(self, category: str) -> Tuple[PenaltyRule, ...]:
+        return self._by_category.get(category, ())
+
+    def is_spot_foul(self, penalty_type: Optional[str]) -> bool:
+        return penalty_type in self._spot_fouls
+
+    def select_options(self) -> List[dict]:
+        """Options of the penalty type select, the entries are shared and read-only"""
+        return list(self._select_options)
+
+    def enforce(self, penalty_type: Optional[str], foul_team: Optional[str],
+                yard_line: int, spot: Optional[int] = None) -> Optional[int]:
+        """Gain/loss of one penalty, None when the type or the fouling team is unknown"""
+        rule = self._by_type.get(penalty_type)
+        if rule is None or foul_team not in ('H', 'O'):
+            return None
+        yards = -abs(rule.yards) if foul_team == 'H' else abs(rule.yards)
+        if rule.spot_foul and spot:
+            return spot + yards - yard_line
+        return yards
+
+    def enforce_many(self, penalty_types: Sequence[Optional[str]], foul_teams: Sequence[Optional[str]],
+                     yard_lines: Sequence[Optional[float]], spots: Sequence[Optional[float]],
+                     raw: bool = True) -> np.ndarray:
+        """Gain/loss of a batch of penalties as float64, NaN where ``enforce`` gives None.
+
+        Types and foul teams are dictionary encoded once, after that every step is an
+        array operation. With ``raw=False`` yard lines and spots are stored field
+        positions (e.g. -25) and are converted first; missing or 0 spots mean no spot.
+        """
+        length = len(penalty_types)
+        distinct = list(dict.fromkeys(penalty_types))
+        lookup = {value: code for code, value in enumerate(distinct)}
+        codes = np.fromiter(map(lookup.__getitem__, penalty_types), dtype=np.int64, count=length)
+        rules = [self._by_type.get(value) for value in distinct]
+        yards = np.array([abs(rule.yards) if rule else np.nan for rule in rules], dtype=np.float64)[codes]
+        spot_foul = np.array([bool(rule and rule.spot_foul) for rule in rules], dtype=bool)[codes]
+
+        teams = np.asarray(foul_teams, dtype=object)
+        sign = np.select([teams == 'H', teams == 'O'], [-1.0, 1.0], default=np.nan)
+
+        lines = np.array(yard_lines, dtype=np.float64).reshape(length)
+        spots = np.array(spots, dtype=np.float64).reshape(length)
+        has_spot = ~np.isnan(spots) & (spots != 0)
+        if not raw:
+            lines = to_raw_yard_line(lines)
+            spots = to_raw_yard_line(spots)
+
+        moved = sign * yards
+        return np.where(spot_foul & has_spot, spots + moved - lines, moved)
+
+
+penalty_catalogue = PenaltyCatalogue(PENALTY_RULES)
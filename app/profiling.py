@@ -0,0 +1,167 @@
+"""
+Opt-in per request profiling: wall time, SQL statements, template rendering and response size
+"""
+
+import threading
+import time
+from collections import deque
+from datetime import datetime, UTC
+from typing import Deque, Dict, List, Optional
+
+import numpy as np
+from flask import Flask, Response, before_render_template, g, has_request_context, request, template_rendered
+from sqlalchemy import event
+
+from app.extensions import db
+
+# upper bounds in ms of the wall time histogram buckets, the last bucket is open ended
+HISTOGRAM_BOUNDS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+# statements kept per request for the slow request log
+MAX_STATEMENTS = 100
+MAX_SQL_LENGTH = 500
+
+
+class RequestProfiler:
+    """Per endpoint rolling windows of request measurements and a log of slow requests.
+
+    Enabled with PROFILING_ENABLED. Every request records wall time, the number and
+    total time of SQL statements (SQLAlchemy cursor events), time spent rendering
+    templates (Flask template signals) and the response size. Each endpoint keeps
+    its last PROFILING_WINDOW requests; requests slower than PROFILING_SLOW_MS go
+    into a ring buffer of PROFILING_SLOW_REQUESTS entries together with their SQL.
+    """
+
+    def __init__(self, window: int = 500, slow_ms: float = 250.0, slow_requests: int = 50) -> None:
+        self.enabled = False
+        self.window = window
+        self.slow_ms = slow_ms
+        self._lock = threading.Lock()
+        self._samples: Dict[str, Deque[tuple]] = {}
+        self._slow: Deque[dict] = deque(maxlen=slow_requests)
+
+    def init_app(self, app: Flask) -> None:
+        """Hook into the app and its engines, call after ``db.init_app``"""
+        self.enabled = app.config.get('PROFILING_ENABLED', False)
+        self.window = app.config.get('PROFILING_WINDOW', self.window)
+        self.slow_ms = app.config.get('PROFILING_SLOW_MS', self.slow_ms)
+        self._slow = deque(maxlen=app.config.get('PROFILING_SLOW_REQUESTS', self._slow.maxlen))
+        app.extensions['profiling'] = self
+        if not self.enabled:
+            return
+
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        before_render_template.connect(self._render_started, app)
+        template_rendered.connect(self._render_finished, app)
+        with app.app_context():
+            for engine in db.engines.values():
+                event.listen(engine, 'before_cursor_execute', self._statement_started)
+                event.listen(engine, 'after_cursor_execute', self._statement_finished)
+
+    # ---- request hooks ----
+
+    @staticmethod
+    def _start() -> None:
+        g.profile = {'started': time.perf_counter(), 'sql_count': 0, 'sql_ms': 0.0, 'statements': [],
+                     'template_ms': 0.0, 'render_started': []}
+
+    def _finish(self, response: Response) -> Response:
+        profile = g.pop('profile', None)
+        if profile is None:
+            return response
+        wall_ms = (time.perf_counter() - profile['started']) * 1000
+        size = response.calculate_content_length()
+        if size is None:
+            size = response.content_length or 0  # streamed, unknown until sent
+        endpoint = request.endpoint or 'unmatched'
+        sample = (wall_ms, profile['sql_count'], profile['sql_ms'], profile['template_ms'], size)
+        with self._lock:
+            self._samples.setdefault(endpoint, deque(maxlen=self.window)).append(sample)
+            if wall_ms >= self.slow_ms:
+                self._slow.append({
+                    'at': datetime.now(UTC).replace(tzinfo=None),
+                    'method': request.method,
+                    'path': request.full_path.rstrip('?'),
+                    'endpoint': endpoint,
+                    'status': response.status_code,
+                    'wall_ms': wall_ms,
+                    'sql_count': profile['sql_count'],
+                    'sql_ms': profile['sql_ms'],
+                    'template_ms': profile['template_ms'],
+                    'size': size,
+                    'statements': profile['statements'],
+                })
+        return response
+
+    @staticmethod
+    def _current() -> Optional[dict]:
+        return g.get('profile') if has_request_context() else None
+
+    def _render_started(self, _sender, **_extra) -> None:
+        profile = self._current()
+        if profile is not None:
+            profile['render_started'].append(time.perf_counter())
+
+    def _render_finished(self, _sender, **_extra) -> None:
+        profile = self._current()
+        if profile is not None and profile['render_started']:
+            started = profile['render_started'].pop()
+            if not profile['render_started']:  # nested renders are part of the outer one
+                profile['template_ms'] += (time.perf_counter() - started) * 1000
+
+    def _statement_started(self, conn, _cursor, _statement, _parameters, _context, _executemany) -> None:
+        if self._current() is not None:
+            conn.info.setdefault('profiling_started', []).append(time.perf_counter())
+
+    def _statement_finished(self, conn, _cursor, statement, _parameters, _context, _executemany) -> None:
+        profile = self._current()
+        started = conn.info.get('profiling_started')
+        if profile is None or not started:
+            return
+        elapsed_ms = (time.perf_counter() - started.pop()) * 1000
+        profile['sql_count'] += 1
+        profile['sql_ms'] += elapsed_ms
+        if len(profile['statements']) < MAX_STATEMENTS:
+            profile['statements'].append((elapsed_ms, statement[:MAX_SQL_LENGTH]))
+
+    # ---- reading ----
+
+    def endpoint_stats(self) -> List[dict]:
+        """Summary per endpoint over its rolling window, slowest p95 first"""
+        with self._lock:
+            windows = {endpoint: list(samples) for endpoint, samples in self._samples.items()}
+        stats = []
+        for endpoint, samples in windows.items():
+            values = np.array(samples, dtype=np.float64)
+            wall = values[:, 0]
+            p50, p95, p99 = np.percentile(wall, [50, 95, 99])
+            buckets = np.bincount(np.searchsorted(HISTOGRAM_BOUNDS_MS, wall, side='left'),
+                                  minlength=len(HISTOGRAM_BOUNDS_MS) + 1)
+            stats.append({
+                'endpoint': endpoint,
+                'requests': len(samples),
+                'p50_ms': float(p50),
+                'p95_ms': float(p95),
+                'p99_ms': float(p99),
+                'max_ms': float(wall.max()),
+                'sql_count': float(values[:, 1].mean()),
+                'sql_ms': float(values[:, 2].mean()),
+                'template_ms': float(values[:, 3].mean()),
+                'size': float(values[:, 4].mean()),
+                'histogram': buckets.tolist(),
+            })
+        return sorted(stats, key=lambda entry: entry['p95_ms'], reverse=True)
+
+    def slow_requests(self) -> List[dict]:
+        """Logged slow requests, newest first"""
+        with self._lock:
+            return list(reversed(self._slow))
+
+    def reset(self) -> None:
+        with self._lock:
+            self._samples.clear()
+            self._slow.clear()
+
+
+request_profiler = RequestProfiler()
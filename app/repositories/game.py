@@ -0,0 +1,65 @@
+"""
+Game repository loading a game graph in a fixed number of queries
+"""
+
+from typing import List, Optional
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload, selectinload, with_expression
+from app.extensions import db
+from app.models.drive import DriveModel
+from app.models.drive_summary import DriveSummaryModel
+from app.models.game import GameModel
+
+
+class GameRepository:
+    """Eager-loading read access for game level pages.
+
+    Every method issues a constant number of statements regardless of how many
+    drives or plays a game has: teams are joined onto the game row, summaries
+    onto the drive rows, and the drives and plays of a game about to be deleted
+    are fetched with one IN query each (selectin).
+    """
+
+    @staticmethod
+    def get_game(game_id: int) -> GameModel:
+        """Game with home/away team in one query, 404 if missing"""
+        return (GameModel.query
+                .options(joinedload(GameModel.home_team), joinedload(GameModel.away_team))
+                .filter(GameModel.id == game_id)
+                .first_or_404())
+
+    @staticmethod
+    def load_drives(game_id: int, odk: Optional[str] = None) -> List[DriveModel]:
+        """Drives of a game with their summaries, optionally filtered by odk"""
+        query = DriveModel.query.filter(DriveModel.game_id == game_id)
+        if odk:
+            query = query.join(DriveModel.summary).filter(DriveSummaryModel.odk == odk)
+        return query.order_by(DriveModel.id).all()
+
+    @staticmethod
+    def list_games() -> List[GameModel]:
+        """All games with teams and their drive/play totals, for the games table.
+
+        The totals are counted per game in the drive_summary table instead of
+        loading every drive of every game.
+        """
+        totals = (db.session.query(DriveSummaryModel.game_id,
+                                   func.count(DriveSummaryModel.drive_id).label('drives'),
+                                   func.sum(DriveSummaryModel.play_count).label('plays'))
+                  .group_by(DriveSummaryModel.game_id)
+                  .subquery())
+        return (GameModel.query
+                .outerjoin(totals, totals.c.game_id == GameModel.id)
+                .options(joinedload(GameModel.home_team),
+                         joinedload(GameModel.away_team),
+                         with_expression(GameModel.drive_count, func.coalesce(totals.c.drives, 0)),
+                         with_expression(GameModel.play_count, func.coalesce(totals.c.plays, 0)))
+                .all())
+
+    @staticmethod
+    def load_for_delete(game_id: int) -> GameModel:
+        """Game with drives and plays loaded so the cascade delete does not lazy-load per drive"""
+        return (GameModel.query
+                .options(selectinload(GameModel.drives).selectinload(DriveModel.plays))
+                .filter(GameModel.id == game_id)
+                .first_or_404())
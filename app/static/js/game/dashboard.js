@@ -0,0 +1,177 @@
+window.addEventListener('DOMContentLoaded', function () {
+    const state = JSON.parse(document.getElementById('dashboard-state').textContent);
+    const odkFilter = state.odk_filter || '';
+    const drives = state.drives;
+    const playTypes = new Map(state.play_type_labels.map((label, i) => [label, state.play_type_values[i]]));
+    const penalties = new Map(state.penalty_labels.map((label, i) => [label, state.penalty_values[i]]));
+    const charts = {};
+    // the play type and penalty analysis only exists for the offense and unfiltered views
+    const withCharts = !odkFilter || odkFilter === 'O';
+
+    const percentage = (value, ctx) => {
+        const total = ctx.chart.data.datasets[0].data.reduce((a, b) => a + b, 0);
+        return total ? (value / total * 100).toFixed(1) + '%' : '';
+    };
+
+    function pieOptions(formatter) {
+        return {
+            responsive: true,
+            plugins: {
+                datalabels: {
+                    color: '#fff',
+                    font: {weight: 'bold', size: 12},
+                    formatter: formatter,
+                    textAlign: 'center',
+                },
+                legend: {position: 'bottom'}
+            }
+        };
+    }
+
+    function drawChart(id, labels, values, colors, formatter, label) {
+        const canvas = document.getElementById(id);
+        if (!canvas) {
+            return;
+        }
+        if (charts[id]) {
+            charts[id].data.labels = labels;
+            charts[id].data.datasets[0].data = values;
+            charts[id].update();
+            return;
+        }
+        const dataset = {data: values, backgroundColor: colors, borderWidth: 1};
+        if (label) {
+            dataset.label = label;
+        }
+        charts[id] = new Chart(canvas.getContext('2d'), {
+            type: 'pie',
+            data: {labels: labels, datasets: [dataset]},
+            plugins: [ChartDataLabels],
+            options: pieOptions(formatter)
+        });
+    }
+
+    function setVisible(chartsId, emptyId, visible) {
+        document.getElementById(chartsId)?.classList.toggle('d-none', !visible);
+        document.getElementById(emptyId)?.classList.toggle('d-none', visible);
+    }
+
+    function renderCharts() {
+        const typeValues = Array.from(playTypes.values());
+        const hasPlayTypes = typeValues.reduce((a, b) => a + b, 0) > 0;
+        setVisible('playtype-charts', 'playtype-empty', hasPlayTypes);
+        if (hasPlayTypes) {
+            drawChart('playTypeChart', Array.from(playTypes.keys()), typeValues,
+                ['#28a745', '#5C1D28', '#FFD200', '#dc3545'], percentage);
+            drawChart('resultTypeChart', ['PASS', 'RUN'], [playTypes.get('PASS') || 0, playTypes.get('RUN') || 0],
+                ['#FFD200', '#5C1D28'], percentage);
+        }
+
+        const penaltyValues = Array.from(penalties.values());
+        const hasPenalties = penaltyValues.reduce((a, b) => a + b, 0) > 0;
+        setVisible('penalty-charts', 'penalty-empty', hasPenalties);
+        if (hasPenalties) {
+            drawChart('penaltyChart', Array.from(penalties.keys()), penaltyValues,
+                ['#FF6384', '#36A2EB', '#FFCE56', '#4BC0C0', '#9966FF', '#FF9F40', '#E7E9ED', '#83D475'],
+                (value, ctx) => {
+                    const share = percentage(value, ctx);
+                    return ctx.chart.width > 350 ? `${ctx.chart.data.labels[ctx.dataIndex]}\n${share}` : share;
+                },
+                'Offensive Penalties');
+        }
+    }
+
+    // ---- counters ----
+
+    function counted(drive) {
+        return !odkFilter || (drive.odk === odkFilter && drive.play_count > 0);
+    }
+
+    function renderCounters() {
+        const shown = Object.values(drives).filter(counted);
+        const set = (id, value) => {
+            const element = document.getElementById(id);
+            if (element) {
+                element.textContent = value;
+            }
+        };
+        set('total-drives', shown.length);
+        set('offense-drives', shown.filter(drive => drive.odk === 'O').length);
+        set('defense-drives', shown.filter(drive => drive.odk === 'D').length);
+        set('special-drives', shown.filter(drive => drive.odk === 'K').length);
+        set('total-plays', shown.reduce((sum, drive) => sum + drive.play_count, 0));
+    }
+
+    // ---- plays ----
+
+    function bump(counts, key, delta) {
+        const value = (counts.get(key) || 0) + delta;
+        if (value > 0) {
+            counts.set(key, value);
+        } else {
+            counts.delete(key);
+        }
+    }
+
+    function countPlay(play, delta) {
+        const category = play.off_play ? state.play_mapping[play.off_play.trim()] : null;
+        if (category) {
+            bump(playTypes, category, delta);
+        }
+        if (play.result === 'Penalty' && play.penalty_type) {
+            bump(penalties, play.penalty_type, delta);
+        }
+    }
+
+    /**
+     * The charts only cover plays of drives matching the filter. When the odk of a drive
+     * that keeps other plays changes, those plays move in or out of the charts, and only
+     * the server knows them.
+     */
+    function needsReload(before, after) {
+        return withCharts && odkFilter && before && before.odk !== after.odk
+            && before.play_count > 0 && after.play_count > 0
+            && (before.odk === odkFilter || after.odk === odkFilter);
+    }
+
+    function applyPlay(data, removed, added) {
+        const before = drives[data.drive.drive_id];
+        const after = {odk: data.drive.odk, play_count: data.drive.play_count};
+        if (needsReload(before, after)) {
+            window.location.reload();
+            return;
+        }
+        if (withCharts && removed && before && counted(before)) {
+            countPlay(removed, -1);
+        }
+        if (withCharts && added && counted(after)) {
+            countPlay(added, 1);
+        }
+        drives[data.drive.drive_id] = after;
+        renderCounters();
+        renderCharts();
+    }
+
+    function applyDriveStatus(data) {
+        const driveId = data.drive.drive_id;
+        if (data.deleted) {
+            // the plays of the drive are gone from the charts too, and only the server knows them
+            if (withCharts && drives[driveId] && drives[driveId].play_count > 0 && counted(drives[driveId])) {
+                window.location.reload();
+                return;
+            }
+            delete drives[driveId];
+        } else {
+            drives[driveId] = {odk: data.drive.odk, play_count: data.drive.play_count};
+        }
+        renderCounters();
+    }
+
+    renderCharts();
+    subscribeToGame(state.events_url, {
+        'play-added': data => applyPlay(data, null, data.play),
+        'play-edited': data => applyPlay(data, data.previous, data.play),
+        'play-deleted': data => applyPlay(data, data.play, null),
+        'drive-status': applyDriveStatus,
+    });
+});
@@ -0,0 +1,64 @@
+window.addEventListener('DOMContentLoaded', function () {
+    const wrapper = document.getElementById('drive-wrapper');
+    const odkSelect = document.getElementById('Odk');
+    const template = document.getElementById('drive-card-template');
+    const odkLabels = {O: 'Offence', D: 'Defence', K: 'Special'};
+
+    odkSelect.value = "";
+    odkSelect.addEventListener('change', (e) => {
+        const selectedOdk = e.target.value;
+        fetch(`/filter_drives?Odk=${encodeURIComponent(selectedOdk)}&Id=${wrapper.dataset.gameId}`)
+            .then(response => response.text())
+            .then(html => {
+                wrapper.innerHTML = html;
+            });
+    });
+
+    function matchesFilter(drive) {
+        return !odkSelect.value || (drive.odk === odkSelect.value && drive.play_count > 0);
+    }
+
+    function createCard(driveId) {
+        const holder = document.createElement('div');
+        holder.innerHTML = template.innerHTML.replaceAll(template.dataset.placeholder, driveId).trim();
+        return holder.firstElementChild;
+    }
+
+    function insertCard(card, driveId) {
+        // newest drive first, like the rendered list
+        const next = Array.from(wrapper.querySelectorAll('.drive-card'))
+            .find(other => Number(other.dataset.driveId) < driveId);
+        wrapper.insertBefore(card, next || wrapper.querySelector('.drive-empty'));
+    }
+
+    function renumber() {
+        const cards = wrapper.querySelectorAll('.drive-card');
+        cards.forEach((card, index) => {
+            card.querySelector('.drive-number').textContent = cards.length - index;
+        });
+        wrapper.querySelector('.drive-empty')?.classList.toggle('d-none', cards.length > 0);
+    }
+
+    function applyDriveStatus(data) {
+        const drive = data.drive;
+        let card = wrapper.querySelector(`.drive-card[data-drive-id="${drive.drive_id}"]`);
+        if (data.deleted || !matchesFilter(drive)) {
+            card?.remove();
+            renumber();
+            return;
+        }
+        if (!card) {
+            card = createCard(drive.drive_id);
+            insertCard(card, drive.drive_id);
+        }
+        const odk = drive.play_count > 0 && drive.odk ? drive.odk : '';
+        card.dataset.odk = odk;
+        card.querySelector('.drive-odk').textContent = odk ? (odkLabels[odk] || `Unknown play type: ${odk}`) : '';
+        card.querySelector('.drive-result').textContent = drive.result || 'In Progress';
+        card.querySelector('.drive-play-count').textContent = drive.play_count;
+        card.querySelector('.drive-add-play').classList.toggle('d-none', drive.ended);
+        renumber();
+    }
+
+    subscribeToGame(wrapper.dataset.eventsUrl, {'drive-status': applyDriveStatus});
+});
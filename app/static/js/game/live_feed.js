@@ -0,0 +1,16 @@
+/**
+ * Opens the Server-Sent Events stream of a game and hands the parsed payload of each
+ * event to its handler. EventSource reconnects on its own and sends Last-Event-ID,
+ * so missed events are replayed by the server.
+ */
+function subscribeToGame(url, handlers) {
+    if (!window.EventSource) {
+        return null;
+    }
+    const source = new EventSource(url);
+    Object.entries(handlers).forEach(([event, handler]) => {
+        source.addEventListener(event, (message) => handler(JSON.parse(message.data)));
+    });
+    window.addEventListener('beforeunload', () => source.close());
+    return source;
+}
@@ -0,0 +1,37 @@
+window.addEventListener('DOMContentLoaded', function () {
+    const card = document.getElementById('job');
+    const pollMs = 1000;
+
+    function render(job) {
+        document.getElementById('job-status').textContent = job.status;
+        document.getElementById('job-message').textContent = job.message || '';
+        const bar = document.getElementById('job-progress');
+        bar.style.width = `${job.percent}%`;
+        bar.textContent = `${job.percent}%`;
+        bar.classList.toggle('bg-danger', job.status === 'failed');
+        document.getElementById('job-rows').textContent = job.total ? `${job.progress} of ${job.total} rows` : '';
+        if (job.download_url) {
+            const link = document.getElementById('job-download');
+            link.href = job.download_url;
+            link.textContent = `Download ${job.filename}`;
+            link.classList.remove('d-none');
+        }
+    }
+
+    function poll() {
+        fetch(card.dataset.statusUrl, {headers: {'Accept': 'application/json'}})
+            .then(response => response.json())
+            .then(job => {
+                render(job);
+                if (job.status === 'pending' || job.status === 'running') {
+                    setTimeout(poll, pollMs);
+                }
+            })
+            .catch(() => setTimeout(poll, pollMs * 5));
+    }
+
+    const status = document.getElementById('job-status').textContent;
+    if (status === 'pending' || status === 'running') {
+        poll();
+    }
+});
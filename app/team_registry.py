@@ -0,0 +1,107 @@
+"""
+In-memory team list for templates, replacing a team query on every render
+"""
+
+import threading
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from flask import g
+
+from app.models.team import TeamModel
+
+
+@dataclass(frozen=True, slots=True)
+class TeamRecord:
+    """Detached, read-only copy of a team row; safe to share between requests"""
+
+    id: int
+    name: str
+    icon: str
+    primary_color: str
+    secondary_color: str
+
+
+class TeamRegistry:
+    """Teams loaded once per change instead of once per ``render_template``.
+
+    The team write handlers call ``invalidate()`` after committing; the next reader
+    reloads. Counters show how many team queries the context processor no longer runs.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._version = 0
+        self._built_version = -1
+        self._teams: Tuple[TeamRecord, ...] = ()
+        self._counters = {'renders': 0, 'requests': 0, 'accessed': 0, 'loads': 0}
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._version += 1
+
+    def teams(self) -> Tuple[TeamRecord, ...]:
+        with self._lock:
+            if self._built_version == self._version:
+                return self._teams
+            version = self._version
+        teams = tuple(
+            TeamRecord(team.id, team.name, team.icon, team.primary_color, team.secondary_color)
+            for team in TeamModel.query.order_by(TeamModel.id).all()
+        )
+        with self._lock:
+            if version >= self._built_version:
+                self._teams, self._built_version = teams, version
+            self._counters['loads'] += 1
+        return teams
+
+    def lazy_teams(self) -> 'LazyTeamList':
+        """Team list for a template context, counted as one render of the current request"""
+        with self._lock:
+            self._counters['renders'] += 1
+            if not g.get('_team_registry_counted'):
+                g._team_registry_counted = True
+                self._counters['requests'] += 1
+        return LazyTeamList(self)
+
+    def _accessed(self) -> None:
+        with self._lock:
+            self._counters['accessed'] += 1
+
+    def stats(self) -> Dict[str, float]:
+        """Counters plus the team queries saved, each render used to run one"""
+        with self._lock:
+            counters = dict(self._counters, size=len(self._teams), version=self._version)
+        saved = counters['renders'] - counters['loads']
+        counters['queries_saved'] = saved
+        counters['queries_saved_per_request'] = round(saved / counters['requests'], 3) if counters['requests'] else 0
+        return counters
+
+
+class LazyTeamList(Sequence):
+    """Sequence that only asks the registry for teams when a template actually reads it"""
+
+    __slots__ = ('_registry', '_teams')
+
+    def __init__(self, registry: TeamRegistry) -> None:
+        self._registry = registry
+        self._teams: Optional[Tuple[TeamRecord, ...]] = None
+
+    def _resolve(self) -> Tuple[TeamRecord, ...]:
+        if self._teams is None:
+            self._registry._accessed()
+            self._teams = self._registry.teams()
+        return self._teams
+
+    def __getitem__(self, index):
+        return self._resolve()[index]
+
+    def __len__(self) -> int:
+        return len(self._resolve())
+
+    def __iter__(self):
+        return iter(self._resolve())
+
+
+team_registry = TeamRegistry()
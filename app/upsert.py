@@ -0,0 +1,20 @@
+"""
+Unique keys over nullable columns for SQLite upserts of rollup rows
+"""
+
+from sqlalchemy import literal_column
+
+from app.extensions import db
+
+# SQLite treats NULLs in a unique index as distinct, so nullable key columns are indexed
+# through ifnull() with a blob: a blob never equals a text value, unlike '' or any marker
+NULL_KEY = literal_column("x'00'")
+
+
+def null_safe(column):
+    """Index and ON CONFLICT target expression of a nullable key column.
+
+    SQLite only matches a conflict target to an index with the very same
+    expressions, so both have to be built with this function.
+    """
+    return db.func.ifnull(column, NULL_KEY)
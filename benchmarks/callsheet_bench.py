@@ -0,0 +1,123 @@
+"""
+Compare the team filtered call sheet built by walking games -> drives -> plays with
+the joined query over the persisted call sheet stat rows.
+
+    python -m benchmarks.callsheet_bench [games...]
+
+Builds a throwaway SQLite database per size with a fixed seed; every game is against
+the same opponent, alternating home and away.
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from flask import Flask
+
+from app.extensions import db
+from app.controllers.call_sheet import CallSheetController
+from app.models.callsheet_stat import CallSheetStatModel
+from app.models.drive import DriveModel
+from app.models.game import GameModel
+from app.models.play import PlayModel
+from app.models.team import TeamModel
+
+OPPONENT = 'Opponent'
+DRIVES_PER_GAME = 12
+PLAYS_PER_DRIVE = 8
+OFF_PLAYS = ['Breakfast', 'Lunch', 'Fade', 'Dive', 'Stick', 'Stretch', 'Power']
+OFF_FORMS = ['Right', 'Left', 'Trey', 'Ace', 'Trips']
+FORM_ADJS = ['Strong', 'Strong Wing', 'Weak', 'Weak Wing', 'Weak Slot', None]
+
+
+def make_app(path: str) -> Flask:
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{path}'
+    db.init_app(app)
+    return app
+
+
+def seed(games: int, seed_value: int = 7) -> None:
+    rng = random.Random(seed_value)
+    home = TeamModel(name='Home', icon='', primary_color='#000000', secondary_color='#ffffff')
+    opponent = TeamModel(name=OPPONENT, icon='', primary_color='#ffffff', secondary_color='#000000')
+    db.session.add_all([home, opponent])
+    db.session.flush()
+
+    start = datetime(2020, 9, 1)
+    for number in range(games):
+        sides = (home.id, opponent.id) if number % 2 == 0 else (opponent.id, home.id)
+        game = GameModel(f'Game {number}', start + timedelta(days=7 * number), '15:00', *sides)
+        db.session.add(game)
+        db.session.flush()
+        for _ in range(DRIVES_PER_GAME):
+            drive = DriveModel(game_id=game.id)
+            db.session.add(drive)
+            db.session.flush()
+            db.session.add_all([
+                PlayModel(drive_id=drive.id, odk=rng.choice('OODK'), off_play=rng.choice(OFF_PLAYS),
+                          off_form=rng.choice(OFF_FORMS), form_adj=rng.choice(FORM_ADJS),
+                          gain_loss=rng.randint(-10, 40))
+                for _ in range(PLAYS_PER_DRIVE)
+            ])
+        db.session.flush()
+        CallSheetStatModel.rebuild_game(game.id)
+    db.session.commit()
+
+
+def nested_loops(team: str) -> int:
+    """The lazy relationship walk the team call sheet used before (away side only)"""
+    plays = []
+    for game in GameModel.query.filter(GameModel.away_team.has(name=team)):
+        for drive in game.drives:
+            for play in drive.plays:
+                if play.odk == 'O':
+                    plays.append(play)
+    return len(plays)
+
+
+def joined_query(team: str, side: str) -> int:
+    return sum(stats.count for _, stats in CallSheetController._merged_stats(team, side))
+
+
+def timed(func, *args, repeat: int = 5):
+    best, result = None, None
+    for _ in range(repeat):
+        db.session.expire_all()
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main(sizes) -> None:
+    print(f"{'games':>6} {'plays':>7} {'loops (s)':>10} {'away (s)':>10} {'home (s)':>10} {'either (s)':>10} {'speedup':>8}")
+    for games in sizes:
+        handle, path = tempfile.mkstemp(suffix='.db')
+        os.close(handle)
+        try:
+            app = make_app(path)
+            with app.app_context():
+                db.create_all()
+                seed(games)
+                loop_time, loop_count = timed(nested_loops, OPPONENT)
+                timings = {}
+                for side in ('away', 'home', 'either'):
+                    timings[side], count = timed(joined_query, OPPONENT, side)
+                    if side == 'away' and count != loop_count:
+                        raise SystemExit(f'[!] play counts differ: {loop_count} vs {count}')
+                total = PlayModel.query.count()
+                db.session.remove()
+                db.engine.dispose()
+            print(f"{games:>6} {total:>7} {loop_time:>10.4f} {timings['away']:>10.4f} {timings['home']:>10.4f} "
+                  f"{timings['either']:>10.4f} {loop_time / timings['away']:>7.1f}x")
+        finally:
+            os.remove(path)
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [50, 100, 200])
@@ -0,0 +1,244 @@
+"""
+Latency, SQL statement counts and peak memory of the main pages over generated databases.
+
+    python -m benchmarks.endpoint_bench [--sizes small medium huge] [--repeat N] [--output PATH]
+                                        [--compare PATH]
+
+Every size gets a fresh temporary database filled by generate_data.generate() with a fixed
+seed, then each endpoint is requested through the Flask test client: one cold request after
+clearing the in-process caches, then --repeat warm ones. Peak memory is the tracemalloc peak
+of one extra request. Results go to a JSON baseline (benchmarks/endpoint_baseline.json by
+default) without timestamps, so committing it makes regressions show up as a diff.
+--compare prints the changes against an earlier baseline and exits non-zero when an endpoint
+issues more SQL statements than before.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import event
+from werkzeug.security import generate_password_hash
+
+from app.cache import result_cache
+from app.config import ServerConfig
+from app.extensions import db
+from app.identity import identity_cache
+from app.models.drive import DriveModel
+from app.models.game import GameModel
+from app.models.play import PlayModel
+from app.models.user import UserModel
+from app.option_catalogue import play_option_catalogue
+from app.team_registry import team_registry
+from generate_data import generate
+
+SIZES = {
+    'small': dict(teams=8, seasons=1, games_per_team=6),
+    'medium': dict(teams=32, seasons=1, games_per_team=12),
+    'huge': dict(teams=32, seasons=10, games_per_team=12),
+}
+SEED = 17
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(__file__), 'endpoint_baseline.json')
+
+PLAY_FORM = dict(odk='O', down='1', distance='10', yard_line='-25', hash='M', personnel='11', off_form='Ace',
+                 form_str='Right', form_adj='Strong', off_play='Dive', result='Rush', gain_loss='4', quarter='1')
+
+
+class StatementCounter:
+    """Counts the statements an engine sends to the database"""
+
+    def __init__(self, engine) -> None:
+        self.count = 0
+        self.engine = engine
+        event.listen(engine, 'before_cursor_execute', self._count)
+
+    def _count(self, *_args) -> None:
+        self.count += 1
+
+    def close(self) -> None:
+        event.remove(self.engine, 'before_cursor_execute', self._count)
+
+
+def reset_caches() -> None:
+    result_cache.clear()
+    identity_cache.clear()
+    team_registry.invalidate()
+    play_option_catalogue.invalidate()
+
+
+def build_app(path: str, size: dict):
+    """App on a fresh database at ``path`` filled with generated data, and its admin user id"""
+    ServerConfig.SQLALCHEMY_DATABASE_URI = f'sqlite:///{path}'
+    from run import PlaybookApp
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        app = PlaybookApp().app
+        app.config['TESTING'] = True
+        with app.app_context():
+            generate(size['teams'], size['seasons'], size['games_per_team'], SEED, chunk_size=50000)
+            user = UserModel(username='bench', password=generate_password_hash('bench'), role='admin')
+            db.session.add(user)
+            db.session.commit()
+            user_id = user.id
+    return app, user_id
+
+
+def endpoints(game_id: int, drive_id: int, new_drive_id: int, play_id: int) -> Dict[str, tuple]:
+    """name -> (method, url, form data, expected status)"""
+    return {
+        'game_options': ('GET', '/games', None, 200),
+        'game_detail': ('GET', f'/games/{game_id}', None, 200),
+        'filter_drives': ('GET', f'/filter_drives?Odk=O&Id={game_id}', None, 200),
+        'dashboard': ('GET', f'/game/{game_id}/dashboard', None, 200),
+        'dashboard_data': ('GET', f'/game/{game_id}/dashboard-data', None, 200),
+        'drive_chart': ('GET', f'/games/{game_id}/drive-chart', None, 200),
+        'drive_play_chart': ('GET', f'/games/{game_id}/drive/{drive_id}/play-chart', None, 200),
+        'export_game': ('GET', f'/games/{game_id}/export', None, 200),
+        'callsheet': ('GET', '/callsheet', None, 200),
+        'game_callsheet': ('GET', f'/game/{game_id}/game_callsheet', None, 200),
+        'game_situations': ('GET', f'/game/{game_id}/situations', None, 200),
+        'drive_detail': ('GET', f'/drive/{drive_id}', None, 200),
+        'add_play_form': ('GET', f'/drives/{new_drive_id}/add_play', None, 200),
+        'add_play': ('POST', f'/drives/{new_drive_id}/add_play', PLAY_FORM, 302),
+        'edit_play_form': ('GET', f'/play/{play_id}/edit', None, 200),
+        'edit_play': ('POST', f'/play/{play_id}/edit', PLAY_FORM, 302),
+    }
+
+
+def timed(request: Callable, counter: StatementCounter) -> tuple:
+    counter.count = 0
+    started = time.perf_counter()
+    request()
+    return (time.perf_counter() - started) * 1000, counter.count
+
+
+def run_size(name: str, repeat: int) -> dict:
+    handle, path = tempfile.mkstemp(suffix='.db')
+    os.close(handle)
+    try:
+        started = time.perf_counter()
+        app, user_id = build_app(path, SIZES[name])
+        generated = time.perf_counter() - started
+        reset_caches()
+
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['_user_id'] = str(user_id)
+            session['_fresh'] = True
+
+        with app.app_context():
+            counts = {'games': GameModel.query.count(), 'drives': DriveModel.query.count(),
+                      'plays': PlayModel.query.count()}
+            game = GameModel.query.order_by(GameModel.id).offset(counts['games'] // 2).first()
+            game_id, drive_id = game.id, game.drives[len(game.drives) // 2].id
+            play_id = PlayModel.query.filter_by(drive_id=drive_id).order_by(PlayModel.id).first().id
+            counter = StatementCounter(db.engine)
+        with contextlib.redirect_stdout(io.StringIO()):
+            client.post(f'/games/{game_id}/add-drive')
+        with app.app_context():
+            new_drive_id = DriveModel.query.filter_by(game_id=game_id).order_by(DriveModel.id.desc()).first().id
+
+        results = {}
+        try:
+            for endpoint, (method, url, data, status) in endpoints(game_id, drive_id, new_drive_id, play_id).items():
+                def request() -> None:
+                    response = client.open(url, method=method, data=data)
+                    if response.status_code != status:
+                        raise RuntimeError(f'{method} {url} answered {response.status_code}, expected {status}')
+
+                with contextlib.redirect_stdout(io.StringIO()):
+                    reset_caches()
+                    cold_ms, cold_statements = timed(request, counter)
+                    warm = [timed(request, counter) for _ in range(repeat)]
+                    tracemalloc.start()
+                    request()
+                    peak = tracemalloc.get_traced_memory()[1]
+                    tracemalloc.stop()
+                latencies = np.array([ms for ms, _ in warm])
+                p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+                results[endpoint] = {
+                    'cold_ms': round(cold_ms, 2),
+                    'p50_ms': round(float(p50), 2),
+                    'p95_ms': round(float(p95), 2),
+                    'p99_ms': round(float(p99), 2),
+                    'cold_statements': cold_statements,
+                    'warm_statements': max(statements for _, statements in warm),
+                    'peak_kib': round(peak / 1024),
+                }
+                print(f"{name:>6} {endpoint:<17} cold {cold_ms:>8.1f} ms  p50 {p50:>8.1f}  p95 {p95:>8.1f}  "
+                      f"p99 {p99:>8.1f}  sql {cold_statements:>4}/{results[endpoint]['warm_statements']:<4}  "
+                      f"peak {results[endpoint]['peak_kib']:>7} KiB")
+        finally:
+            with app.app_context():
+                counter.close()
+                db.session.remove()
+                db.engine.dispose()
+        return {'dataset': dict(SIZES[name], seed=SEED, **counts), 'generate_s': round(generated, 1),
+                'endpoints': results}
+    finally:
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+
+def compare(previous: dict, current: dict) -> bool:
+    """Print what changed against an earlier baseline, False when statement counts grew"""
+    ok = True
+    for size, result in current['sizes'].items():
+        before = previous.get('sizes', {}).get(size, {}).get('endpoints', {})
+        for endpoint, now in result['endpoints'].items():
+            old = before.get(endpoint)
+            if old is None:
+                continue
+            grew = now['cold_statements'] > old['cold_statements'] or now['warm_statements'] > old['warm_statements']
+            ratio = now['p95_ms'] / old['p95_ms'] if old['p95_ms'] else 1.0
+            if grew or ratio > 1.5:
+                print(f"[!] {size} {endpoint}: sql {old['cold_statements']}/{old['warm_statements']} -> "
+                      f"{now['cold_statements']}/{now['warm_statements']}, p95 {old['p95_ms']} -> {now['p95_ms']} ms")
+            ok = ok and not grew
+    return ok
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', nargs='+', choices=list(SIZES), default=list(SIZES))
+    parser.add_argument('--repeat', type=int, default=20, help='warm requests per endpoint')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT)
+    parser.add_argument('--compare', help='earlier baseline to compare against')
+    args = parser.parse_args()
+
+    previous: Optional[dict] = None
+    if args.compare:
+        with open(args.compare) as file:
+            previous = json.load(file)
+
+    baseline = {
+        'environment': {'python': platform.python_version(), 'sqlite': sqlite3.sqlite_version,
+                        'sqlite_profile': ServerConfig.SQLITE_PROFILE, 'repeat': args.repeat},
+        'sizes': {size: run_size(size, args.repeat) for size in args.sizes},
+    }
+    baseline['environment']['max_rss_mib'] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024)
+
+    with open(args.output, 'w') as file:
+        json.dump(baseline, file, indent=2, sort_keys=True)
+        file.write('\n')
+    print(f'Baseline written to {args.output}')
+
+    if previous is not None and not compare(previous, baseline):
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
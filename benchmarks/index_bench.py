@@ -0,0 +1,180 @@
+"""
+Check that the hot queries use an index and time them before and after ensure_indexes().
+
+    python -m benchmarks.index_bench [games]
+
+Builds a temporary SQLite database with the given number of games (default 1000,
+12 drives of 12 plays each), drops the indexes the migration adds, prints
+EXPLAIN QUERY PLAN and timings per query, runs the migration and repeats. Exits
+non-zero when a hot query still scans a whole table after the migration.
+"""
+
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from statistics import median
+
+from flask import Flask
+from sqlalchemy import func, insert, select, text
+
+from app.extensions import db
+from app.migrations import ensure_indexes
+from app.models.drive import DriveModel
+from app.models.game import GameModel
+from app.models.play import PlayModel
+from app.models.play_call import PlayCallModel
+from app.models.play_option import PlayOptionModel
+from app.models.team import TeamModel
+from app.config import ApplicationData
+
+DRIVES_PER_GAME = 12
+PLAYS_PER_DRIVE = 12
+REPEAT = 20
+FULL_SCAN = re.compile(r'^SCAN \w+$')  # a table scan without any index
+
+
+def make_app(path: str) -> Flask:
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{path}'
+    db.init_app(app)
+    return app
+
+
+def seed(games: int, seed_value: int = 7) -> None:
+    rng = random.Random(seed_value)
+    options = list(dict.fromkeys(ApplicationData.PLAY_OPTIONS))  # the seed list repeats a few pairs
+    connection = db.session.connection()
+    connection.execute(insert(TeamModel), [
+        {'id': i, 'name': f'Team {i}', 'icon': '', 'primary_color': '#000000', 'secondary_color': '#ffffff'}
+        for i in range(1, 21)
+    ])
+    connection.execute(insert(PlayCallModel), [{'id': 1, 'name': 'RUN', 'status': True}])
+    connection.execute(insert(PlayOptionModel), [
+        {'parameter_name': param, 'value': value, 'enabled': True, 'play_call_id': 1 if param == 'off_play' else None}
+        for param, value in options
+    ])
+    off_plays = [value for param, value in options if param == 'off_play']
+    off_forms = [value for param, value in options if param == 'off_form']
+    form_adjs = [value for param, value in options if param == 'form_adj']
+
+    start = datetime(2015, 9, 1)
+    connection.execute(insert(GameModel), [
+        {'id': g, 'name': f'Game {g}', 'date': start + timedelta(days=3 * g), 'time': '15:00',
+         'home_team_id': 1 + g % 20, 'away_team_id': 1 + (g + 7) % 20}
+        for g in range(1, games + 1)
+    ])
+    drives = [{'id': d, 'game_id': 1 + (d - 1) // DRIVES_PER_GAME, 'result': 'In Progress', 'ended': False}
+              for d in range(1, games * DRIVES_PER_GAME + 1)]
+    connection.execute(insert(DriveModel), drives)
+    connection.execute(insert(PlayModel), [
+        {'drive_id': drive['id'], 'odk': rng.choice('OODK'), 'down': rng.randint(1, 4), 'distance': 10,
+         'yard_line': rng.randint(-49, 50), 'off_play': rng.choice(off_plays), 'off_form': rng.choice(off_forms),
+         'form_adj': rng.choice(form_adjs), 'gain_loss': rng.randint(-10, 40), 'result': 'Rush'}
+        for drive in drives for _ in range(PLAYS_PER_DRIVE)
+    ])
+    db.session.commit()
+
+
+def hot_queries(games: int) -> dict:
+    """The statements behind the busiest pages, keyed by a short label"""
+    game_id = games // 2
+    drive_id = game_id * DRIVES_PER_GAME
+    middle = datetime(2015, 9, 1) + timedelta(days=3 * game_id)
+    return {
+        'last play of drive': select(PlayModel.id).where(PlayModel.drive_id == drive_id)
+        .order_by(PlayModel.id.desc()).limit(1),
+        'play count of drive': select(func.count()).select_from(PlayModel).where(PlayModel.drive_id == drive_id),
+        'drives of game': select(DriveModel.id).where(DriveModel.game_id == game_id).order_by(DriveModel.id),
+        'plays of game': select(PlayModel.odk, PlayModel.off_play, PlayModel.gain_loss)
+        .join(DriveModel, DriveModel.id == PlayModel.drive_id).where(DriveModel.game_id == game_id),
+        'offense call sheet': select(PlayModel.off_play, PlayModel.off_form, PlayModel.form_adj,
+                                     func.count(), func.sum(PlayModel.gain_loss))
+        .where(PlayModel.odk == 'O').group_by(PlayModel.off_play, PlayModel.off_form, PlayModel.form_adj),
+        'option by value': select(PlayOptionModel.id).where(PlayOptionModel.value == 'Dive').limit(1),
+        'enabled options': select(PlayOptionModel.id, PlayOptionModel.value)
+        .where(PlayOptionModel.enabled.is_(True))
+        .order_by(PlayOptionModel.parameter_name, PlayOptionModel.value),
+        'games in date range': select(GameModel.id).where(GameModel.date.between(middle, middle + timedelta(days=90))),
+        'games of team': select(GameModel.id).where(GameModel.away_team_id == 3),
+    }
+
+
+def drop_migrated_indexes() -> None:
+    """Make the fresh database look like one created before the indexes were declared"""
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            db.session.execute(text(f'DROP INDEX IF EXISTS {index.name}'))
+    db.session.commit()
+
+
+def measure(queries: dict) -> dict:
+    results = {}
+    connection = db.session.connection()
+    for label, statement in queries.items():
+        sql = str(statement.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True}))
+        plan = [row[3] for row in connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {sql}')]
+        timings = []
+        for _ in range(REPEAT):
+            start = time.perf_counter()
+            connection.exec_driver_sql(sql).fetchall()
+            timings.append(time.perf_counter() - start)
+        results[label] = {'plan': plan, 'ms': median(timings) * 1000,
+                          'scans': any(FULL_SCAN.match(step) for step in plan)}
+    db.session.rollback()
+    return results
+
+
+def report(title: str, results: dict) -> None:
+    print(f'\n== {title}')
+    for label, result in results.items():
+        flag = 'FULL SCAN' if result['scans'] else 'indexed'
+        print(f"{label:<22} {result['ms']:>9.3f} ms  {flag:<9}  {' | '.join(result['plan'])}")
+
+
+def main(games: int) -> int:
+    handle, path = tempfile.mkstemp(suffix='.db')
+    os.close(handle)
+    try:
+        app = make_app(path)
+        with app.app_context():
+            db.create_all()
+            drop_migrated_indexes()
+            started = time.perf_counter()
+            seed(games)
+            print(f'{games} games, {games * DRIVES_PER_GAME * PLAYS_PER_DRIVE} plays seeded '
+                  f'in {time.perf_counter() - started:.1f} s')
+
+            queries = hot_queries(games)
+            before = measure(queries)
+            report('before migration', before)
+
+            started = time.perf_counter()
+            created = ensure_indexes()
+            print(f'\nensure_indexes() created {len(created)} indexes in {time.perf_counter() - started:.2f} s')
+
+            after = measure(queries)
+            report('after migration', after)
+
+            print(f"\n{'query':<22} {'before ms':>10} {'after ms':>10} {'speedup':>8}")
+            for label in queries:
+                speedup = before[label]['ms'] / after[label]['ms'] if after[label]['ms'] else float('inf')
+                print(f"{label:<22} {before[label]['ms']:>10.3f} {after[label]['ms']:>10.3f} {speedup:>7.1f}x")
+
+            failing = [label for label, result in after.items() if result['scans']]
+            db.session.remove()
+            db.engine.dispose()
+        if failing:
+            print(f"\n[!] still scanning whole tables: {', '.join(failing)}")
+            return 1
+        print('\nall hot queries use an index')
+        return 0
+    finally:
+        os.remove(path)
+
+
+if __name__ == '__main__':
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000))
@@ -0,0 +1,112 @@
+"""
+Compare the dashboard play tallies over ORM play objects with the PlayFrame path the
+dashboard uses: a column load, value_counts and a filtered value_counts.
+
+    python -m benchmarks.play_frame_bench [sizes...]
+
+Builds a throwaway SQLite database per size with a fixed seed; all plays belong to one game.
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime
+
+from flask import Flask
+
+from app.analytics.play_frame import PlayFrame
+from app.extensions import db
+from app.models.drive import DriveModel
+from app.models.game import GameModel
+from app.models.play import PlayModel
+from app.models.team import TeamModel
+
+PLAYS_PER_DRIVE = 8
+OFF_PLAYS = ['Breakfast', 'Lunch', 'Fade', 'Dive', 'Stick', 'Stretch', 'Power', None]
+RESULTS = ['Rush', 'Complete', 'Incomplete', 'Penalty']
+PENALTY_TYPES = ['Offside', 'False Start', 'Holding', 'Pass Interference', None]
+
+
+def make_app(path: str) -> Flask:
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{path}'
+    db.init_app(app)
+    return app
+
+
+def seed(size: int, seed_value: int = 7) -> int:
+    rng = random.Random(seed_value)
+    home = TeamModel(name='Home', icon='', primary_color='#000000', secondary_color='#ffffff')
+    away = TeamModel(name='Away', icon='', primary_color='#ffffff', secondary_color='#000000')
+    db.session.add_all([home, away])
+    db.session.flush()
+    game = GameModel('Game', datetime(2020, 9, 1), '15:00', home.id, away.id)
+    db.session.add(game)
+    db.session.flush()
+
+    drives = -(-size // PLAYS_PER_DRIVE)
+    db.session.execute(db.insert(DriveModel), [dict(game_id=game.id) for _ in range(drives)])
+    drive_ids = db.session.scalars(db.select(DriveModel.id).order_by(DriveModel.id)).all()
+    rows = []
+    for index in range(size):
+        result = rng.choice(RESULTS)
+        rows.append(dict(drive_id=drive_ids[index // PLAYS_PER_DRIVE], odk='O', off_play=rng.choice(OFF_PLAYS),
+                         result=result, penalty_type=rng.choice(PENALTY_TYPES) if result == 'Penalty' else None))
+    db.session.execute(db.insert(PlayModel), rows)
+    db.session.commit()
+    return game.id
+
+
+def object_tallies(game_id: int) -> tuple:
+    """The per-play Counter tallies the dashboard used before PlayFrame"""
+    plays = PlayModel.query.join(DriveModel).filter(DriveModel.game_id == game_id).order_by(PlayModel.id).all()
+    off_plays = Counter(play.off_play for play in plays)
+    penalties = Counter(play.penalty_type for play in plays if play.result == 'Penalty')
+    return dict(off_plays), dict(penalties)
+
+
+def frame_tallies(game_id: int) -> tuple:
+    frame = PlayFrame.load(('off_play', 'result', 'penalty_type'), DriveModel.game_id == game_id,
+                           joins=((DriveModel, DriveModel.id == PlayModel.drive_id),))
+    penalties = frame.filter(frame.equals('result', 'Penalty')).value_counts('penalty_type')
+    return frame.value_counts('off_play'), penalties
+
+
+def timed(func, *args, repeat: int = 3):
+    best, result = None, None
+    for _ in range(repeat):
+        db.session.expire_all()
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        db.session.remove()
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main(sizes) -> None:
+    print(f"{'plays':>10} {'objects (s)':>12} {'frame (s)':>10} {'speedup':>8}")
+    for size in sizes:
+        handle, path = tempfile.mkstemp(suffix='.db')
+        os.close(handle)
+        try:
+            app = make_app(path)
+            with app.app_context():
+                db.create_all()
+                game_id = seed(size)
+                object_time, expected = timed(object_tallies, game_id)
+                frame_time, tallies = timed(frame_tallies, game_id)
+                if tallies != expected:
+                    raise SystemExit(f'[!] tallies differ: {expected} vs {tallies}')
+                db.session.remove()
+                db.engine.dispose()
+            print(f"{size:>10} {object_time:>12.3f} {frame_time:>10.3f} {object_time / frame_time:>7.1f}x")
+        finally:
+            os.remove(path)
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 500_000])
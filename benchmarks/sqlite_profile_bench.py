@@ -0,0 +1,157 @@
+"""
+Concurrent play writers against dashboard readers for each SQLite storage profile.
+
+Every profile gets a fresh temporary database with one game. Writers enter plays the
+way the add play form does (insert, call sheet row, drive status, commit); readers
+poll the change stamp, drive summaries and the game call sheet. Reports committed
+plays/sec, lock errors and read latency percentiles.
+
+    python -m benchmarks.sqlite_profile_bench [--writers N] [--readers M] [--seconds S] [--interval S]
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+from flask import Flask
+
+from app.extensions import db
+from app.storage import STORAGE_PROFILES, configure_storage, apply_storage_pragmas
+from app.models.callsheet_stat import CallSheetStatModel
+from app.models.drive import DriveModel
+from app.models.drive_summary import DriveSummaryModel
+from app.models.game import GameModel
+from app.models.game_change import GameChangeModel
+from app.models.play import PlayModel
+from app.models.team import TeamModel
+
+OFF_PLAYS = ['Breakfast', 'Lunch', 'Fade', 'Dive', 'Stick', 'Stretch', 'Power']
+
+
+def make_app(path: str, profile: str) -> Flask:
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{path}'
+    app.config['SQLITE_PROFILE'] = profile
+    configure_storage(app)
+    db.init_app(app)
+    apply_storage_pragmas(app)
+    return app
+
+
+def seed(writers: int) -> tuple:
+    home = TeamModel(name='Home', icon='', primary_color='#000000', secondary_color='#ffffff')
+    away = TeamModel(name='Away', icon='', primary_color='#ffffff', secondary_color='#000000')
+    db.session.add_all([home, away])
+    db.session.flush()
+    game = GameModel('Bench Game', datetime(2025, 9, 6), '15:00', home.id, away.id)
+    db.session.add(game)
+    db.session.flush()
+    drives = [DriveModel(game_id=game.id) for _ in range(writers)]
+    db.session.add_all(drives)
+    db.session.flush()
+    for drive in drives:
+        drive.refresh_status()
+    db.session.commit()
+    return game.id, [drive.id for drive in drives]
+
+
+def writer(app: Flask, drive_id: int, stop: threading.Event, counters: dict, lock: threading.Lock) -> None:
+    rng = random.Random(drive_id)
+    with app.app_context():
+        drive = db.session.get(DriveModel, drive_id)
+        while not stop.is_set():
+            try:
+                play = PlayModel(drive_id=drive_id, odk='O', down=1, distance=10, yard_line=-25,
+                                 off_play=rng.choice(OFF_PLAYS), gain_loss=rng.randint(-5, 9), result='Rush')
+                db.session.add(play)
+                db.session.flush()
+                CallSheetStatModel.add_play(CallSheetStatModel.snapshot(play, drive.game_id))
+                drive.update_status()
+                key = 'plays'
+            except Exception as e:
+                db.session.rollback()
+                key = 'locked' if 'locked' in str(e) else 'errors'
+            with lock:
+                counters[key] += 1
+
+
+def reader(app: Flask, game_id: int, stop: threading.Event, latencies: list, interval: float) -> None:
+    with app.app_context():
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                GameChangeModel.stamp(game_id)
+                DriveSummaryModel.query.filter_by(game_id=game_id).all()
+                CallSheetStatModel.merged(CallSheetStatModel.game_id == game_id, CallSheetStatModel.odk == 'O')
+                db.session.rollback()  # end the read transaction like a request teardown
+            except Exception:
+                db.session.rollback()
+                stop.wait(interval)
+                continue
+            latencies.append(time.perf_counter() - start)
+            stop.wait(interval)
+
+
+def run_profile(profile: str, writers: int, readers: int, seconds: float, interval: float) -> dict:
+    handle, path = tempfile.mkstemp(suffix='.db')
+    os.close(handle)
+    try:
+        app = make_app(path, profile)
+        with app.app_context():
+            db.create_all()
+            game_id, drive_ids = seed(writers)
+
+        stop = threading.Event()
+        lock = threading.Lock()
+        counters = {'plays': 0, 'locked': 0, 'errors': 0}
+        latencies = [[] for _ in range(readers)]
+        threads = [threading.Thread(target=writer, args=(app, drive_ids[i], stop, counters, lock))
+                   for i in range(writers)]
+        threads += [threading.Thread(target=reader, args=(app, game_id, stop, latencies[i], interval))
+                    for i in range(readers)]
+        for thread in threads:
+            thread.start()
+        time.sleep(seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+        with app.app_context():
+            db.engine.dispose()
+        reads = np.array([value for values in latencies for value in values]) * 1000
+        percentiles = np.percentile(reads, [50, 95, 99]) if len(reads) else [float('nan')] * 3
+        return dict(counters, reads=len(reads), plays_per_sec=counters['plays'] / seconds,
+                    p50=percentiles[0], p95=percentiles[1], p99=percentiles[2])
+    finally:
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--interval', type=float, default=0.05,
+                        help='pause between polls of one reader in seconds (threads share the GIL, '
+                             'readers polling back to back mostly measure Python contention)')
+    args = parser.parse_args()
+
+    print(f"{args.writers} writers, {args.readers} readers polling every {args.interval * 1000:.0f} ms, "
+          f"{args.seconds:.0f} s per profile")
+    print(f"{'profile':>8} {'plays/s':>8} {'locked':>7} {'errors':>7} {'reads':>7} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for profile in STORAGE_PROFILES:
+        result = run_profile(profile, args.writers, args.readers, args.seconds, args.interval)
+        print(f"{profile:>8} {result['plays_per_sec']:>8.1f} {result['locked']:>7} {result['errors']:>7} "
+              f"{result['reads']:>7} {result['p50']:>8.2f} {result['p95']:>8.2f} {result['p99']:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,420 @@
+"""
+Deterministic synthetic data for load testing: teams, seasons of games, drives and plays.
+
+    python generate_data.py --teams 32 --seasons 5 --games-per-team 12 --seed 7
+
+The same seed and options always produce the same data. Plays are simulated per drive
+(down, distance, field position, run/pass outcomes, punts, turnovers) for offense and
+defense drives, with penalties drawn from PENALTY_RULES and enforced in batches by the penalty
+catalogue. Rows are buffered and bulk inserted in chunks of --chunk-size plays, one
+commit per chunk, so memory stays bounded however many plays are written. Drive
+summaries, call sheet stats and game change stamps are written alongside, the app
+needs no backfill afterwards.
+
+New games are added next to the existing ones. With --replace every existing game, drive
+and play of the target database is deleted first (teams and users stay).
+"""
+
+import argparse
+import json
+import os
+import random
+import time
+from collections import deque
+from operator import itemgetter
+from datetime import datetime, timedelta, UTC
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import func, insert, text
+
+from app.analytics.running_stats import RunningStats
+from app.config import ApplicationData, ServerConfig
+from app.extensions import db
+from app.models.callsheet_stat import CALLSHEET_KEYS, CallSheetStatModel
+from app.models.drive import DriveModel
+from app.models.drive_summary import DriveSummaryModel
+from app.models.game import GameModel
+from app.models.game_change import GameChangeModel
+from app.models.team_tendency import TeamTendencyModel
+from app.models.play import PlayModel
+from app.models.play_call import PlayCallModel
+from app.models.play_option import PlayOptionModel
+from app.models.team import TeamModel
+from app.penalty_catalogue import PenaltyRule, penalty_catalogue
+
+OPTIONS: Dict[str, List[str]] = {}
+for _parameter, _value in ApplicationData.PLAY_OPTIONS:
+    if _value not in OPTIONS.setdefault(_parameter, []):
+        OPTIONS[_parameter].append(_value)
+
+PERSONNEL_GROUPS = ['10', '11', '12', '21', '22']
+GAME_TIMES = ['13:00', '15:30', '18:00', '19:30']
+PASSERS = [3, 7, 12, 16]
+RUSHERS = [21, 22, 28, 34]
+RECEIVERS = [1, 11, 13, 80, 81, 84, 88]
+DEFENDERS = list(range(20, 60))
+KICKERS = [4, 17, 39]
+
+PENALTY_RATE = 0.06
+PENALTY_BATCH = 256  # penalties drawn and enforced at once
+MAX_PLAYS_PER_DRIVE = 18
+FIRST_SEASON = 2015
+
+PLAY_COLUMNS = [column.name for column in PlayModel.__table__.columns if column.name != 'id']
+
+
+def to_field(raw: int) -> int:
+    """0-100 distance from the own goal line -> stored yard line (own half negative)"""
+    if raw < 50:
+        return -raw
+    if raw == 50:
+        return 50
+    return 100 - raw
+
+
+class PlaySimulator:
+    """Simulates the plays of drives with one random generator, so a seed fixes everything"""
+
+    def __init__(self, rng: random.Random, play_types: Dict[str, Optional[str]]) -> None:
+        self.rng = rng
+        self.play_types = play_types
+        self.penalties = list(penalty_catalogue)
+        self._pending: Deque[Tuple[PenaltyRule, str, Optional[int], int]] = deque()
+
+    def drive(self, odk: str, quarter: int) -> List[dict]:
+        """Plays of one drive for the analysed team on offense ("O") or defense ("D")"""
+        rng = self.rng
+        raw = max(1, min(60, int(rng.gauss(27, 8))))
+        down, distance = 1, 10
+        plays = []
+        for _ in range(MAX_PLAYS_PER_DRIVE):
+            if down == 4 and not (distance <= 2 and raw >= 40):
+                plays.append(self._punt(raw, quarter))
+                break
+            play = self._scrimmage(odk, quarter, down, distance, raw)
+            plays.append(play)
+            gain = play['gain_loss']
+            if play['result'] in ApplicationData.DRIVE_ENDING_RESULTS:
+                break
+            if down == 4 and gain < distance:
+                break  # turnover on downs
+            rule = penalty_catalogue.get(play['penalty_type'])
+            raw = max(1, min(99, raw + gain))
+            if gain >= distance or (rule and rule.automatic_first_down):
+                down, distance = 1, min(10, 100 - raw)
+            elif rule and not rule.loss_of_down:
+                distance -= gain
+            else:
+                down, distance = down + 1, distance - gain
+            distance = max(1, distance)
+        return plays
+
+    def _scrimmage(self, odk: str, quarter: int, down: int, distance: int, raw: int) -> dict:
+        rng = self.rng
+        play = dict.fromkeys(PLAY_COLUMNS)
+        play.update(odk=odk, quarter=quarter, down=down, distance=distance, yard_line=to_field(raw),
+                    hash=rng.choice('LMR'), touchdown=False)
+
+        if odk == 'O':
+            off_play = rng.choice(OPTIONS['off_play'])
+            play_type = self.play_types.get(off_play)
+            play.update(personnel=rng.choice(PERSONNEL_GROUPS), off_form=rng.choice(OPTIONS['off_form']),
+                        form_str=rng.choice(OPTIONS['form_str']), form_adj=rng.choice(OPTIONS['form_adj']),
+                        motion=rng.choice(OPTIONS['motion']), protection=rng.choice(OPTIONS['protection']),
+                        off_play=off_play, play_type=play_type, dir_call=rng.choice(OPTIONS['dir_call']),
+                        tag=rng.choice(OPTIONS['tag']))
+            kind = {'RUN': 'Run', 'PASS': 'Pass', 'SCREEN': 'Pass'}.get(play_type) or rng.choice(['Run', 'Pass'])
+        else:
+            kind = rng.choices(['Run', 'Pass'], weights=[45, 55])[0]
+            play.update(play_type1=kind, defense_front=rng.choice(OPTIONS['defense_front']),
+                        defense_strongside=rng.choice(OPTIONS['defense_strongside']),
+                        blitz=rng.choice(OPTIONS['blitz']) if rng.random() < 0.3 else None,
+                        slants=rng.choice(OPTIONS['slants']) if rng.random() < 0.4 else None,
+                        coverage=rng.choice(OPTIONS['coverage']) if kind == 'Pass' else None,
+                        tackler1=rng.choice(DEFENDERS),
+                        tackler2=rng.choice(DEFENDERS) if rng.random() < 0.35 else None)
+
+        if rng.random() < PENALTY_RATE:
+            return self._penalty(play, raw)
+
+        to_goal = 100 - raw
+        if kind == 'Run':
+            play['rusher_number'] = rng.choice(RUSHERS)
+            outcome = rng.random()
+            if outcome < 0.015:
+                result, gain = 'Fumble', 0
+            else:
+                gain = max(-5, min(to_goal, int(rng.gauss(4, 5)) if rng.random() > 0.03 else rng.randint(15, 70)))
+                result = 'Rush, TD' if gain >= to_goal else 'Rush'
+        else:
+            play['passer'] = rng.choice(PASSERS)
+            outcome = rng.random()
+            if outcome < 0.025:
+                result, gain = 'Interception', 0
+                if odk == 'D':
+                    play['interceptor'] = rng.choice(DEFENDERS)
+            elif outcome < 0.085:
+                result, gain = 'Sack', -rng.randint(3, 10)
+            elif outcome < 0.45:
+                result, gain = 'Incomplete', 0
+            else:
+                play['receiver'] = rng.choice(RECEIVERS)
+                gain = max(0, min(to_goal, int(rng.gauss(9, 7)) if rng.random() > 0.05 else rng.randint(20, 80)))
+                result = 'Complete, TD' if gain >= to_goal else 'Complete'
+        play.update(result=result, gain_loss=gain, touchdown=result.endswith('TD'))
+        return play
+
+    def _penalty(self, play: dict, raw: int) -> dict:
+        if not self._pending:
+            self._pending.extend(self._draw_penalties(PENALTY_BATCH))
+        rule, foul_team, offset, gain = self._pending.popleft()
+        spot = None
+        if offset is not None:
+            spot = min(99, raw + offset)
+            gain -= raw + offset - spot  # the spot stays on the field, the enforcement moves with it
+        gain = max(1 - raw, min(99 - raw, gain))  # stay on the field
+        play.update(result='Penalty', gain_loss=gain, penalty_type=rule.type, foul_team=foul_team,
+                    penalty_spot_yard=to_field(spot) if spot else None)
+        return play
+
+    def _draw_penalties(self, count: int) -> List[Tuple[PenaltyRule, str, Optional[int], int]]:
+        """(rule, fouling team, spot offset, gain) of the next penalties, enforced in one batch.
+
+        Spots are drawn relative to the line of scrimmage, and so is the gain: enforcing
+        against a line at 0 gives the gain of any line, clamping aside.
+        """
+        rng = self.rng
+        rules = [rng.choice(self.penalties) for _ in range(count)]
+        teams = [rng.choice('HO') for _ in range(count)]
+        offsets = [rng.randint(0, 15) if rule.spot_foul else None for rule in rules]
+        gains = penalty_catalogue.enforce_many([rule.type for rule in rules], teams, [0] * count, offsets)
+        return list(zip(rules, teams, offsets, gains.astype(int).tolist()))
+
+    def _punt(self, raw: int, quarter: int) -> dict:
+        rng = self.rng
+        kick = rng.randint(30, 55)
+        returned = rng.randint(0, 15) if rng.random() < 0.6 else 0
+        play = dict.fromkeys(PLAY_COLUMNS)
+        play.update(odk='K', quarter=quarter, down=4, distance=None, yard_line=to_field(raw), hash=rng.choice('LMR'),
+                    play_type='Punt', result='Punt', gain_loss=0, touchdown=False, kicker=rng.choice(KICKERS),
+                    kicker_yard=kick, returner=rng.choice(RECEIVERS) if returned else None,
+                    returner_yard=returned if returned else None)
+        return play
+
+
+def schedule(rng: random.Random, team_ids: List[int], seasons: int,
+             games_per_team: int) -> Iterator[Tuple[datetime, str, int, int]]:
+    """(date, time, home team id, away team id) of every game, week by week"""
+    for season in range(seasons):
+        september = datetime(FIRST_SEASON + season, 9, 1)
+        first_saturday = september + timedelta(days=(5 - september.weekday()) % 7)
+        for week in range(games_per_team):
+            order = list(team_ids)
+            rng.shuffle(order)
+            for home, away in zip(order[::2], order[1::2]):
+                yield first_saturday + timedelta(weeks=week), rng.choice(GAME_TIMES), home, away
+
+
+class ChunkWriter:
+    """Buffers rows per table and bulk inserts them once enough plays are buffered.
+
+    Each flush runs one executemany per table straight on the driver cursor with the
+    columns' own bind processors applied, which skips SQLAlchemy's per row parameter
+    handling (the bulk of the cost of ``connection.execute(insert(table), rows)``).
+    """
+
+    TABLES = (GameModel, GameChangeModel, DriveModel, DriveSummaryModel, CallSheetStatModel, PlayModel)
+
+    def __init__(self, chunk_size: int) -> None:
+        self.chunk_size = chunk_size
+        self.buffers: Dict[type, List[dict]] = {model: [] for model in self.TABLES}
+        self.written: Dict[str, int] = {model.__tablename__: 0 for model in self.TABLES}
+        self.started = time.perf_counter()
+
+    def add(self, model: type, rows: List[dict]) -> None:
+        self.buffers[model].extend(rows)
+        if len(self.buffers[PlayModel]) >= self.chunk_size:
+            self.flush()
+
+    def flush(self) -> None:
+        connection = db.session.connection()
+        dialect = connection.dialect
+        cursor = connection.connection.cursor()
+        try:
+            for model, rows in self.buffers.items():
+                if not rows:
+                    continue
+                columns = [column for column in model.__table__.columns if column.name in rows[0]]
+                names = [column.name for column in columns]
+                processors = [(index, process) for index, process in
+                              enumerate(column.type.bind_processor(dialect) for column in columns) if process]
+                values = list(map(itemgetter(*names), rows))
+                if processors:
+                    values = [_processed(row, processors) for row in values]
+                sql = (f"INSERT INTO {model.__tablename__} ({', '.join(names)}) "
+                       f"VALUES ({', '.join('?' * len(names))})")
+                cursor.executemany(sql, values)
+                self.written[model.__tablename__] += len(rows)
+                rows.clear()
+        finally:
+            cursor.close()
+        db.session.commit()
+        elapsed = time.perf_counter() - self.started
+        plays = self.written[PlayModel.__tablename__]
+        print(f"[+] {plays:,} plays, {self.total:,} rows, {self.total / elapsed:,.0f} rows/sec")
+
+    @property
+    def total(self) -> int:
+        return sum(self.written.values())
+
+
+def _processed(row: tuple, processors: List[tuple]) -> list:
+    row = list(row)
+    for index, process in processors:
+        if row[index] is not None:
+            row[index] = process(row[index])
+    return row
+
+
+def callsheet_rows(game_id: int, plays: List[dict]) -> List[dict]:
+    """Call sheet stat rows of one game, the same as CallSheetStatModel.rebuild_game"""
+    grouped: Dict[tuple, RunningStats] = {}
+    for play in plays:
+        key = (play['odk'], *(play[name] for name in CALLSHEET_KEYS))
+        grouped.setdefault(key, RunningStats()).add(int(play['gain_loss'] or 0))
+    return [
+        dict(game_id=game_id, odk=odk, off_play=off_play, off_form=off_form, form_adj=form_adj,
+             count=stats.count, total=stats.total, mean=stats.mean, m2=stats.m2,
+             histogram=json.dumps(stats.histogram))
+        for (odk, off_play, off_form, form_adj), stats in grouped.items()
+    ]
+
+
+def drive_status(plays: List[dict]) -> Tuple[str, bool]:
+    """Result and ended flag the way DriveModel.refresh_status derives them"""
+    last = plays[-1]
+    turnover_on_downs = (last['down'] == 4 and last['gain_loss'] is not None and last['distance'] is not None
+                         and last['gain_loss'] < last['distance'])
+    return last['result'], last['result'] in ApplicationData.DRIVE_ENDING_RESULTS or turnover_on_downs
+
+
+def ensure_teams(rng: random.Random, count: int) -> List[int]:
+    """Ids of the generated teams, creating the ones that do not exist yet"""
+    icon_folder = os.path.join('app', 'static', 'team_creation_assets', 'icons')
+    icons = sorted(name for name in os.listdir(icon_folder) if name.endswith(('.svg', '.png')))
+    wanted = []
+    for number in range(1, count + 1):
+        wanted.append(dict(name=f'Synthetic Team {number:03d}',
+                           icon=f'/static/team_creation_assets/icons/{rng.choice(icons)}',
+                           primary_color=f'#{rng.randrange(0x1000000):06X}',
+                           secondary_color=f'#{rng.randrange(0x1000000):06X}'))
+    existing = dict(db.session.query(TeamModel.name, TeamModel.id)
+                    .filter(TeamModel.name.in_([team['name'] for team in wanted])))
+    missing = [team for team in wanted if team['name'] not in existing]
+    if missing:
+        db.session.execute(insert(TeamModel.__table__), missing)
+        db.session.commit()
+        existing = dict(db.session.query(TeamModel.name, TeamModel.id)
+                        .filter(TeamModel.name.in_([team['name'] for team in wanted])))
+    return [existing[team['name']] for team in wanted]
+
+
+def clear_games() -> None:
+    for model in (CallSheetStatModel, TeamTendencyModel, DriveSummaryModel, GameChangeModel, PlayModel, DriveModel, GameModel):
+        db.session.query(model).delete()
+    db.session.commit()
+
+
+def generate(teams: int, seasons: int, games_per_team: int, seed: int, chunk_size: int,
+             replace: bool = False) -> Dict[str, int]:
+    """Write the synthetic data inside an app context, returns the rows written per table.
+
+    Existing games are kept unless ``replace`` is set.
+    """
+    rng = random.Random(seed)
+    if replace:
+        clear_games()
+    team_ids = ensure_teams(rng, teams)
+    names = dict(db.session.query(TeamModel.id, TeamModel.name).filter(TeamModel.id.in_(team_ids)))
+    # play type of each off play the way the add play form resolves it
+    play_types = dict(db.session.query(PlayOptionModel.value, PlayCallModel.name)
+                      .outerjoin(PlayCallModel, PlayCallModel.id == PlayOptionModel.play_call_id)
+                      .filter(PlayOptionModel.parameter_name == 'off_play'))
+    simulator = PlaySimulator(rng, play_types)
+    writer = ChunkWriter(chunk_size)
+
+    game_id = first_game_id = (db.session.query(func.max(GameModel.id)).scalar() or 0)
+    drive_id = (db.session.query(func.max(DriveModel.id)).scalar() or 0)
+    now = datetime.now(UTC).replace(tzinfo=None)
+
+    for game_date, game_time, home, away in schedule(rng, team_ids, seasons, games_per_team):
+        game_id += 1
+        writer.add(GameModel, [dict(id=game_id, name=f'{names[away]} @ {names[home]}', date=game_date,
+                                    time=game_time, home_team_id=home, away_team_id=away)])
+        writer.add(GameChangeModel, [dict(game_id=game_id, version=1, changed_at=now)])
+
+        drive_count = max(16, min(28, int(rng.gauss(22, 2.5))))
+        odk = rng.choice('OD')
+        game_plays, drives, summaries = [], [], []
+        for index in range(drive_count):
+            drive_id += 1
+            plays = simulator.drive(odk, quarter=1 + 4 * index // drive_count)
+            result, ended = drive_status(plays)
+            drives.append(dict(id=drive_id, game_id=game_id, result=result, ended=ended))
+            summaries.append(dict(drive_id=drive_id, game_id=game_id, odk=plays[0]['odk'], play_count=len(plays),
+                                  start_yard_line=plays[0]['yard_line'], end_yard_line=plays[-1]['yard_line'],
+                                  last_gain_loss=plays[-1]['gain_loss'], result=result))
+            for play in plays:
+                play['drive_id'] = drive_id
+            game_plays.extend(plays)
+            odk = 'D' if odk == 'O' else 'O'
+
+        writer.add(DriveModel, drives)
+        writer.add(DriveSummaryModel, summaries)
+        writer.add(CallSheetStatModel, callsheet_rows(game_id, game_plays))
+        writer.add(PlayModel, game_plays)
+
+    writer.flush()
+    # season rollups span games, so they are summed by the database once everything is in
+    TeamTendencyModel.rebuild(GameModel.id > first_game_id)
+    writer.written[TeamTendencyModel.__tablename__] = TeamTendencyModel.query.count()
+    db.session.execute(text('ANALYZE'))
+    db.session.commit()
+    return writer.written
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--teams', type=int, default=32)
+    parser.add_argument('--seasons', type=int, default=1)
+    parser.add_argument('--games-per-team', type=int, default=12, help='games per team and season')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--chunk-size', type=int, default=50000, help='plays per bulk insert and commit')
+    parser.add_argument('--database', help='SQLAlchemy URI, defaults to the app database')
+    parser.add_argument('--replace', action='store_true',
+                        help='delete all existing games, drives and plays of the database first')
+    args = parser.parse_args()
+    if args.teams < 2:
+        parser.error('--teams must be at least 2')
+
+    if args.database:
+        ServerConfig.SQLALCHEMY_DATABASE_URI = args.database
+    from run import PlaybookApp
+
+    app = PlaybookApp().app
+    with app.app_context():
+        if args.replace:
+            print(f"[!] Deleting the existing games of {db.engine.url.render_as_string(hide_password=True)}")
+        started = time.perf_counter()
+        written = generate(args.teams, args.seasons, args.games_per_team, args.seed, args.chunk_size, args.replace)
+        elapsed = time.perf_counter() - started
+
+    total = sum(written.values())
+    print(', '.join(f'{count:,} {table}' for table, count in written.items()))
+    print(f"{total:,} rows in {elapsed:.1f} s: {total / elapsed:,.0f} rows/sec, "
+          f"{written[PlayModel.__tablename__] / elapsed:,.0f} plays/sec")
+    print("Restart a running server, its caches do not see rows written by another process.")
+
+
+if __name__ == '__main__':
+    main()
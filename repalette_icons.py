@@ -0,0 +1,83 @@
+"""
+Re-extract the color palette of every team icon, optionally storing the suggested team colors.
+
+    python repalette_icons.py             # report only
+    python repalette_icons.py --apply     # save the top two colors as primary/secondary
+
+The palette comes from the team's raster icon: the largest thumbnail of a stored icon, the
+icon itself, or the PNG/JPEG uploaded next to its team_icon.svg. Teams without one (vector
+icons) are listed and left unchanged. Palettes are
+cached by image content, so an image shared by several teams is analysed once.
+"""
+
+import argparse
+import time
+
+from app.config import ServerConfig
+from app.models.team import TeamModel
+from app.palette import PALETTE_SIZE, cached_palette, dominant_colors, palette_cache, team_icon_source
+
+
+def repalette(static_folder: str, size: int = PALETTE_SIZE, apply: bool = False) -> dict:
+    """Palette every team icon, returns counts of analysed, changed and skipped teams"""
+    from app.extensions import db
+
+    counts = {'analysed': 0, 'changed': 0, 'skipped': 0}
+    for team in TeamModel.query.order_by(TeamModel.name):
+        source = team_icon_source(team.icon, static_folder)
+        if source is None:
+            counts['skipped'] += 1
+            print(f"[!] {team.name}: no raster icon found for {team.icon}")
+            continue
+        try:
+            with open(source, 'rb') as file:
+                palette = cached_palette(file.read(), size)
+        except Exception as e:
+            counts['skipped'] += 1
+            print(f"[!] {team.name}: {str(e)} ({type(e).__name__})")
+            continue
+        counts['analysed'] += 1
+        primary_color, secondary_color = dominant_colors(palette)
+        current = (team.primary_color.lower(), team.secondary_color.lower())
+        changed = current != (primary_color, secondary_color)
+        colors = ' '.join(f'{color.hex} {color.share:.0%}' for color in palette)
+        print(f"{'*' if changed else ' '} {team.name}: {colors} | "
+              f"{current[0]} {current[1]} -> {primary_color} {secondary_color}")
+        if changed:
+            counts['changed'] += 1
+            if apply:
+                team.primary_color, team.secondary_color = primary_color, secondary_color
+    if apply:
+        db.session.commit()
+    return counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--colors', type=int, default=PALETTE_SIZE, help='palette size per icon')
+    parser.add_argument('--apply', action='store_true', help='store the suggested primary/secondary colors')
+    parser.add_argument('--database', help='SQLAlchemy URI, defaults to the app database')
+    args = parser.parse_args()
+    if args.colors < 1:
+        parser.error('--colors must be at least 1')
+
+    if args.database:
+        ServerConfig.SQLALCHEMY_DATABASE_URI = args.database
+    from run import PlaybookApp
+
+    app = PlaybookApp().app
+    with app.app_context():
+        started = time.perf_counter()
+        counts = repalette(app.static_folder, args.colors, args.apply)
+        elapsed = time.perf_counter() - started
+
+    print(f"{counts['analysed']} icons analysed in {elapsed:.2f} s "
+          f"({palette_cache.stats()['misses']} distinct images), "
+          f"{counts['changed']} with different colors{' (saved)' if args.apply else ''}, "
+          f"{counts['skipped']} skipped")
+    if args.apply and counts['changed']:
+        print("Restart a running server, its caches do not see rows written by another process.")
+
+
+if __name__ == '__main__':
+    main()
@@ -2,10 +2,25 @@ from flask import Flask
 from flask_login import LoginManager
 
 from app.extensions import db
+from app.storage import configure_storage, apply_storage_pragmas
+from app.migrations import ensure_indexes
+from app.cache import result_cache
+from app.identity import identity_cache
+from app.profiling import request_profiler
+from app.jobs import job_runner
+from app.charts import chart_store
+from app.palette import palette_cache
+from app.icons import icon_store, migrate_team_icons
+from app.team_registry import team_registry
 from app.models.user import UserModel
 from app.models.play_option import PlayOptionModel
 from app.models.play_call import PlayCallModel
 from app.models.team import TeamModel
+from app.models.drive_summary import DriveSummaryModel
+from app.models.callsheet_stat import CallSheetStatModel
+from app.models.game_change import GameChangeModel
+from app.models.job import JobModel
+from app.models.team_tendency import TeamTendencyModel
 from app.config import ApplicationData as AD
 
 from app.controllers.user import UserController
@@ -14,8 +29,11 @@ from app.controllers.game import GameController
 from app.controllers.drive import DriveController
 from app.controllers.play import PlayController
 from app.controllers.call_sheet import CallSheetController
+from app.controllers.tendency import TendencyController
+from app.controllers.situation import SituationController
 from app.controllers.settings import SettingsController
 from app.controllers.error import ErrorController
+from app.controllers.job import JobController
 from app.controllers.team import team_bp
 
 class PlaybookApp:
@@ -36,11 +54,24 @@ class PlaybookApp:
             self.login_manager = LoginManager()
             self.login_manager.login_view = 'login'
 
+            profile = configure_storage(self.app)
             db.init_app(self.app)
+            apply_storage_pragmas(self.app)
+            print(f"SQLite storage profile: {profile}")
+            result_cache.init_app(self.app)
+            identity_cache.init_app(self.app)
+            request_profiler.init_app(self.app)
+            if request_profiler.enabled:
+                print("Request profiling enabled")
+            job_runner.init_app(self.app)
+            chart_store.init_app(self.app)
+            palette_cache.init_app(self.app)
+            icon_store.init_app(self.app)
             self.login_manager.init_app(self.app)
 
             self._register_controllers()
             self._inject_context()
+            self._prepare_database()
 
             print("Application initialized successfully")
         except Exception as e:
@@ -55,7 +86,10 @@ class PlaybookApp:
             DriveController(app=self.app, play_parameters=AD.PLAY_PARAMETERS)
             PlayController(app=self.app, play_parameters=AD.PLAY_PARAMETERS)
             CallSheetController(app=self.app)
+            TendencyController(app=self.app)
+            SituationController(app=self.app)
             SettingsController(app=self.app, play_parameters=AD.PLAY_PARAMETERS)
+            JobController(app=self.app)
             ErrorController(app=self.app)
             self.app.register_blueprint(team_bp)
             print("Controllers registered successfully")
@@ -66,12 +100,41 @@ class PlaybookApp:
         @self.app.context_processor
         def inject_teams() -> dict:
             try:
-                teams = TeamModel.query.all()
-                return dict(teams=teams)
+                # resolved on first use, templates that never read teams cost no query
+                return dict(teams=team_registry.lazy_teams())
             except Exception as e:
                 print(f"[!] Error injecting teams: {str(e)} ({type(e).__name__})")
                 return dict(teams=[])
 
+    def _prepare_database(self) -> None:
+        with self.app.app_context():
+            try:
+                db.create_all()
+                indexes = ensure_indexes()
+                if indexes:
+                    print(f"[+] Created indexes: {', '.join(indexes)}")
+                created = DriveSummaryModel.backfill()
+                if created:
+                    print(f"[+] Built {created} drive summaries")
+                rebuilt = CallSheetStatModel.backfill()
+                if rebuilt:
+                    print(f"[+] Built call sheet statistics for {rebuilt} games")
+                rolled_up = TeamTendencyModel.backfill()
+                if rolled_up:
+                    print(f"[+] Built team tendency rollups for {rolled_up} games")
+                stamped = GameChangeModel.backfill()
+                if stamped:
+                    print(f"[+] Created change stamps for {stamped} games")
+                migrated = migrate_team_icons(self.app.static_folder)
+                if migrated:
+                    print(f"[+] Moved {migrated} team icons to the icon store")
+                recovered = job_runner.recover()
+                if recovered:
+                    print(f"[+] Recovered {recovered} background jobs")
+            except Exception as e:
+                db.session.rollback()
+                print(f"[!] Database preparation error: {str(e)} ({type(e).__name__})")
+
     @staticmethod
     def _ensure_play_calls() -> None:
         for name in AD.PLAY_CALLS:
@@ -0,0 +1,103 @@
+"""
+Shared fixtures: the app on a small generated database, a logged-in client and SQL statement counting
+"""
+
+import contextlib
+import io
+import os
+import tempfile
+from typing import Callable
+
+import pytest
+from sqlalchemy import event
+from werkzeug.security import generate_password_hash
+
+from app.cache import result_cache
+from app.config import ServerConfig
+from app.extensions import db
+from app.identity import identity_cache
+from app.models.user import UserModel
+from app.option_catalogue import play_option_catalogue
+from app.team_registry import team_registry
+from generate_data import generate
+
+SIZE = dict(teams=4, seasons=1, games_per_team=4)
+SEED = 17
+
+
+class StatementCounter:
+    """Counts the statements an engine sends to the database"""
+
+    def __init__(self, engine) -> None:
+        self.count = 0
+        self.engine = engine
+        event.listen(engine, 'before_cursor_execute', self._count)
+
+    def _count(self, *_args) -> None:
+        self.count += 1
+
+    def cold(self, request: Callable[[], object]) -> int:
+        """Statements of ``request`` after clearing the in-process caches"""
+        reset_caches()
+        self.count = 0
+        with contextlib.redirect_stdout(io.StringIO()):
+            request()
+        return self.count
+
+    def close(self) -> None:
+        event.remove(self.engine, 'before_cursor_execute', self._count)
+
+
+def reset_caches() -> None:
+    result_cache.clear()
+    identity_cache.clear()
+    team_registry.invalidate()
+    play_option_catalogue.invalidate()
+
+
+@pytest.fixture(scope='session')
+def app():
+    """App on a throwaway database filled by generate_data with a fixed seed"""
+    handle, path = tempfile.mkstemp(suffix='.db')
+    os.close(handle)
+    database_uri = ServerConfig.SQLALCHEMY_DATABASE_URI
+    ServerConfig.SQLALCHEMY_DATABASE_URI = f'sqlite:///{path}'
+    try:
+        from run import PlaybookApp
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            app = PlaybookApp().app
+            app.config['TESTING'] = True
+            with app.app_context():
+                generate(SIZE['teams'], SIZE['seasons'], SIZE['games_per_team'], SEED, chunk_size=50000)
+                user = UserModel(username='tests', password=generate_password_hash('tests'), role='admin')
+                db.session.add(user)
+                db.session.commit()
+                app.config['TEST_USER_ID'] = user.id
+        yield app
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+    finally:
+        ServerConfig.SQLALCHEMY_DATABASE_URI = database_uri
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+
+@pytest.fixture(scope='session')
+def client(app):
+    """Test client logged in as an admin"""
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(app.config['TEST_USER_ID'])
+        session['_fresh'] = True
+    return client
+
+
+@pytest.fixture
+def statements(app):
+    with app.app_context():
+        counter = StatementCounter(db.engine)
+    yield counter
+    counter.close()
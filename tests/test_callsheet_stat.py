@@ -0,0 +1,66 @@
+"""
+Call sheet stat rows must match the plays after deletes and edits, also when a row
+no longer matches its plays and the game is rebuilt instead.
+
+    python -m pytest -q tests/test_callsheet_stat.py
+"""
+
+import json
+
+import pytest
+
+from app.extensions import db
+from app.models.callsheet_stat import CallSheetStatModel
+from app.models.drive import DriveModel
+from app.models.play import PlayModel
+
+
+def stat_rows(game_id: int) -> list:
+    rows = CallSheetStatModel.query.filter_by(game_id=game_id)
+    return sorted((row.odk or '', row.off_play or '', row.off_form or '', row.form_adj or '',
+                   row.count, row.total, json.loads(row.histogram)) for row in rows)
+
+
+def assert_matches_plays(game_id: int) -> None:
+    """The stored rows equal a rebuild from the plays, and count every play once"""
+    stored = stat_rows(game_id)
+    CallSheetStatModel.rebuild_game(game_id)
+    db.session.flush()
+    rebuilt = stat_rows(game_id)
+    db.session.rollback()
+    assert stored == rebuilt
+    plays = PlayModel.query.join(DriveModel).filter(DriveModel.game_id == game_id).count()
+    assert sum(row[4] for row in stored) == plays
+
+
+def mismatched_play() -> PlayModel:
+    """A play whose stat row no longer holds its gain, committed that way"""
+    play = PlayModel.query.filter(PlayModel.odk == 'O', PlayModel.result != 'Penalty').order_by(PlayModel.id).first()
+    row = CallSheetStatModel.query.filter_by(game_id=play.drive.game_id, odk=play.odk, off_play=play.off_play,
+                                             off_form=play.off_form, form_adj=play.form_adj).one()
+    histogram = json.loads(row.histogram)
+    histogram.pop(str(int(play.gain_loss or 0)))
+    row.histogram = json.dumps(histogram)
+    db.session.commit()
+    return play
+
+
+@pytest.mark.parametrize('change', ['delete', 'edit'])
+def test_mismatched_row_is_rebuilt_without_double_counting(app, client, change):
+    with app.app_context():
+        play = mismatched_play()
+        play_id, game_id = play.id, play.drive.game_id
+        form = dict(odk=play.odk, quarter=play.quarter or 1, down=play.down, distance=play.distance,
+                    yard_line=play.yard_line, hash=play.hash or 'M', off_play=play.off_play or '',
+                    off_form=play.off_form or '', form_adj=play.form_adj or '', result='Rush',
+                    gain_loss=int(play.gain_loss or 0) + 3)
+
+    if change == 'delete':
+        response = client.post(f'/play/{play_id}/delete')
+    else:
+        response = client.post(f'/play/{play_id}/edit', data=form)
+    assert response.status_code == 302
+
+    with app.app_context():
+        assert (db.session.get(PlayModel, play_id) is None) == (change == 'delete')
+        assert_matches_plays(game_id)
@@ -0,0 +1,56 @@
+"""
+The vectorized penalty enforcement must agree with the per-play one.
+
+    python -m pytest -q tests/test_penalty_catalogue.py
+"""
+
+import itertools
+import math
+
+from app.penalty_catalogue import penalty_catalogue
+
+
+def convert(yard_line: int) -> int:
+    """Stored field position -> 0-100, as the play controllers convert it"""
+    if yard_line < 0:
+        return -yard_line
+    if yard_line == 50:
+        return 50
+    return 100 - yard_line
+
+
+CASES = list(itertools.product(
+    [rule.type for rule in penalty_catalogue] + ['Not A Penalty', None],
+    ['H', 'O', None],
+    [-25, -1, 50, 30, 1],  # yard lines as stored
+    [None, 0, -40, 50, 10],  # spots as stored, None and 0 mean no spot
+))
+
+
+def expected(penalty_type, foul_team, yard_line, spot):
+    return penalty_catalogue.enforce(penalty_type, foul_team, convert(yard_line), convert(spot) if spot else None)
+
+
+def test_enforce_many_matches_enforce_on_stored_positions():
+    types, teams, lines, spots = zip(*CASES)
+    gains = penalty_catalogue.enforce_many(types, teams, lines, spots, raw=False)
+    for case, gain in zip(CASES, gains.tolist()):
+        want = expected(*case)
+        if want is None:
+            assert math.isnan(gain), case
+        else:
+            assert gain == want, case
+
+
+def test_enforce_many_matches_enforce_on_raw_positions():
+    types, teams, lines, spots = zip(*CASES)
+    raw_lines = [convert(line) for line in lines]
+    raw_spots = [convert(spot) if spot else spot for spot in spots]
+    gains = penalty_catalogue.enforce_many(types, teams, raw_lines, raw_spots)
+    for case, gain in zip(CASES, gains.tolist()):
+        want = expected(*case)
+        assert (math.isnan(gain) if want is None else gain == want), case
+
+
+def test_enforce_many_of_an_empty_batch():
+    assert penalty_catalogue.enforce_many([], [], [], []).shape == (0,)
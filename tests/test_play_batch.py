@@ -0,0 +1,77 @@
+"""
+The play batch endpoint rejects a bad batch with a 400 naming the play and the problem,
+and stores none of its plays.
+
+    python -m pytest -q tests/test_play_batch.py
+"""
+
+import pytest
+
+from app.extensions import db
+from app.models.drive import DriveModel
+from app.models.game import GameModel
+from app.models.play import PlayModel
+from app.penalty_catalogue import penalty_catalogue
+
+
+@pytest.fixture(scope='module')
+def drive_id(app):
+    """An open drive without plays"""
+    with app.app_context():
+        drive = DriveModel(game_id=GameModel.query.order_by(GameModel.id).first().id)
+        db.session.add(drive)
+        db.session.flush()
+        drive.refresh_status()
+        db.session.commit()
+        return drive.id
+
+
+def play(drive_id: int, **fields) -> dict:
+    return dict(dict(drive_id=drive_id, odk='O', down=1, distance=10, yard_line=-25, result='Rush', gain_loss=4),
+                **fields)
+
+
+def team_required_penalty() -> str:
+    return next(rule.type for rule in penalty_catalogue if penalty_catalogue.enforce(rule.type, None, 25, None) is None)
+
+
+CASES = {
+    'not an object': ([1, 2], None, 'Expected a non-empty "plays" list'),
+    'no plays': ({'plays': []}, None, 'Expected a non-empty "plays" list'),
+    'boolean drive id': (lambda drive: {'plays': [play(True)]}, 0, 'Play 1: unknown drive'),
+    'text yard line': (lambda drive: {'plays': [play(drive), play(drive, yard_line='x')]}, 1,
+                       "Play 2: yard_line must be an integer, got 'x'"),
+    'text gain': (lambda drive: {'plays': [play(drive, gain_loss='4y')]}, 0,
+                  "Play 1: gain_loss must be an integer, got '4y'"),
+    'object value': (lambda drive: {'plays': [play(drive, hash={'side': 'L'})]}, 0,
+                     'Play 1: hash: expected a string or a number'),
+    'missing odk': (lambda drive: {'plays': [{k: v for k, v in play(drive).items() if k != 'odk'}]}, 0,
+                    'Play 1: odk is required'),
+    'no foul team': (lambda drive: {'plays': [play(drive, result='Penalty', penalty_type=team_required_penalty())]},
+                     0, 'Play 1: foul team is required to enforce'),
+    'ended in batch': (lambda drive: {'plays': [play(drive, result='Punt'), play(drive)]}, 1,
+                       'Play 2: drive {drive} has ended'),
+}
+
+
+@pytest.mark.parametrize('case', CASES)
+def test_bad_batch_is_rejected(app, client, drive_id, case):
+    body, index, error = CASES[case]
+    body = body(drive_id) if callable(body) else body
+    with app.app_context():
+        plays_before = PlayModel.query.count()
+
+    response = client.post('/drives/plays/batch', json=body)
+
+    assert response.status_code == 400
+    assert response.json['error'].startswith(error.format(drive=drive_id))
+    assert response.json.get('index') == index
+    with app.app_context():
+        assert PlayModel.query.count() == plays_before
+
+
+def test_good_batch_is_stored(app, client, drive_id):
+    response = client.post('/drives/plays/batch', json={'plays': [play(drive_id, yard_line='-30'), play(drive_id)]})
+    assert response.status_code == 201, response.json
+    with app.app_context():
+        assert [p.yard_line for p in PlayModel.query.filter_by(drive_id=drive_id).order_by(PlayModel.id)] == [-30, -25]
@@ -0,0 +1,54 @@
+"""
+Game level pages must issue the same number of SQL statements however many drives a game has.
+
+    python -m pytest -q tests/test_query_counts.py
+
+Counts are taken on cold requests (in-process caches cleared) for the game with the fewest
+and the game with the most drives of the generated test database.
+"""
+
+from app.extensions import db
+from app.models.drive import DriveModel
+from app.models.game import GameModel
+
+
+def pages(game_id: int, drive_id: int) -> dict:
+    return {
+        'game_detail': f'/games/{game_id}',
+        'filter_drives': f'/filter_drives?Odk=O&Id={game_id}',
+        'dashboard': f'/game/{game_id}/dashboard',
+        'dashboard_data': f'/game/{game_id}/dashboard-data',
+        'drive_chart': f'/games/{game_id}/drive-chart',
+        'drive_play_chart': f'/games/{game_id}/drive/{drive_id}/play-chart',
+        'export_game': f'/games/{game_id}/export',
+    }
+
+
+def statement_counts(app, client, statements, game_id: int) -> dict:
+    """page -> statements of one cold request, streamed bodies included"""
+    with app.app_context():
+        drive_id = DriveModel.query.filter_by(game_id=game_id).order_by(DriveModel.id).first().id
+    counts = {}
+    for page, url in pages(game_id, drive_id).items():
+        responses = []
+
+        def request() -> None:
+            response = client.get(url)
+            response.get_data()  # exports stream their rows while the body is read
+            responses.append(response)
+
+        counts[page] = statements.cold(request)
+        assert responses[0].status_code == 200, url
+    return counts
+
+
+def test_statements_do_not_grow_with_drives(app, client, statements):
+    with app.app_context():
+        drive_counts = dict(db.session.query(GameModel.id, db.func.count(DriveModel.id))
+                            .join(DriveModel, DriveModel.game_id == GameModel.id)
+                            .group_by(GameModel.id))
+    fewest = min(drive_counts, key=drive_counts.get)
+    most = max(drive_counts, key=drive_counts.get)
+    assert drive_counts[most] > drive_counts[fewest]
+
+    assert statement_counts(app, client, statements, fewest) == statement_counts(app, client, statements, most)
@@ -0,0 +1,25 @@
+"""
+Write transactions on SQLite start with BEGIN IMMEDIATE, reads stay outside a transaction.
+
+    python -m pytest -q tests/test_storage.py
+"""
+
+from app.extensions import db
+
+
+def test_writes_begin_immediate(app):
+    with app.app_context():
+        connection = db.engine.raw_connection()
+    statements = []
+    try:
+        connection.driver_connection.set_trace_callback(statements.append)
+        cursor = connection.cursor()
+        last_play = cursor.execute('SELECT max(id) FROM play').fetchone()
+        assert not connection.driver_connection.in_transaction
+        cursor.execute('UPDATE play SET gain_loss = gain_loss WHERE id = ?', last_play)
+        assert connection.driver_connection.in_transaction
+        connection.rollback()
+    finally:
+        connection.driver_connection.set_trace_callback(None)
+        connection.close()
+    assert [statement for statement in statements if statement.startswith('BEGIN')] == ['BEGIN IMMEDIATE']